@@ -50,11 +50,15 @@ CRISPY_TEMPLATE_PACK = "bootstrap5"
 
 
 MIDDLEWARE = [
+    # Primero, para medir también las consultas de sesión del resto de middleware
+    'tienda.middleware.MetricasMiddleware',
+    'tienda.middleware.ConsultasLentasMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'tienda.middleware.PerfiladorMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -71,6 +75,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'tienda.permisos.contexto',
             ],
         },
     },
@@ -149,4 +154,92 @@ LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'home'
 
 # URL a la que redirige después de logout
-LOGOUT_REDIRECT_URL = 'login'
\ No newline at end of file
+LOGOUT_REDIRECT_URL = 'login'
+
+# Ventas con más de estos días se mueven a tienda_ventaarchivo (python manage.py archivar_ventas)
+VENTAS_DIAS_ARCHIVO = 365
+
+# Eventos de venta (tienda/eventos.py): un id que falta al avanzar un consumidor se vuelve a
+# buscar durante EVENTOS_ESPERA_HUECO segundos (más que la transacción de venta más larga);
+# pasado ese tiempo se da por revertido. Saltos de más de EVENTOS_MAXIMO_HUECOS ids no se vigilan.
+EVENTOS_ESPERA_HUECO = 600
+EVENTOS_MAXIMO_HUECOS = 1000
+
+# Sincronización de terminales (/api/sincronizar/): el cursor avanza por fecha_actualizacion,
+# que se asigna antes del COMMIT. Solo se entregan filas con más de este margen, que debe
+# cubrir la transacción más larga sobre el catálogo (p. ej. ajustar_precios de todo el catálogo).
+SINCRONIZACION_MARGEN_SEGUNDOS = 30
+
+# Snapshots comprimidos de los reportes de días cerrados (python manage.py cerrar_dia)
+REPORTES_DIR = BASE_DIR / 'reportes'
+
+# Caché compartida (sesiones y límite de intentos de login).
+# LocMemCache es por proceso; con varios workers usar una caché común, p. ej.:
+# {'BACKEND': 'tienda.cache.RedisCache', 'LOCATION': 'redis://127.0.0.1:6379'}
+# Los backends de tienda.cache son los de Django más el conteo de aciertos para /metrics.
+CACHES = {
+    'default': {
+        'BACKEND': 'tienda.cache.LocMemCache',
+    }
+}
+
+# Dónde se guardan las sesiones: 'db' (solo tabla django_session), 'cached_db'
+# (se leen de la caché y se escriben en ambas) o 'cache' (solo la caché; requiere
+# una caché compartida y persistente, si se reinicia se cierran las sesiones).
+SESIONES_ALMACEN = 'cached_db'
+SESSION_ENGINE = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+}[SESIONES_ALMACEN]
+
+# Límite de intentos de login: ventana deslizante por IP y por usuario (tienda/limites.py)
+LOGIN_INTENTOS_POR_USUARIO = 5
+LOGIN_INTENTOS_POR_IP = 20
+LOGIN_SEGUNDOS_POR_INTENTO = 60  # Se recupera un intento por minuto
+
+# Consultas lentas (tienda/consultas_lentas.py): umbral en milisegundos (None lo desactiva)
+# y archivo JSON lines que rota por tamaño. Resumen: python manage.py consultas_lentas
+CONSULTAS_LENTAS_MS = 200
+CONSULTAS_LENTAS_ARCHIVO = BASE_DIR / 'logs' / 'consultas_lentas.jsonl'
+CONSULTAS_LENTAS_TAMANO = 10 * 1024 * 1024
+CONSULTAS_LENTAS_RESPALDOS = 5
+
+# Perfilador por muestreo (tienda/perfilador.py): el personal lo pide con la cabecera
+# X-Perfilar: 1 o ?perfilar=1; además se perfila esta fracción aleatoria de peticiones.
+# Cada perfil queda en PERFILADOR_DIR en formato "collapsed" para flamegraph/speedscope.
+PERFILADOR_MUESTREO = 0.0
+PERFILADOR_INTERVALO_MS = 5
+PERFILADOR_DIR = BASE_DIR / 'logs' / 'perfiles'
+
+# IPs que pueden leer /metrics (None: cualquiera). Por defecto solo local.
+METRICAS_IPS = ['127.0.0.1', '::1']
+
+# Cola de tareas en la base de datos (tienda/tareas.py); se ejecutan con python manage.py worker.
+# Un fallo se reintenta tras TAREAS_ESPERA_BASE × 2^(intento-1) segundos, con tope TAREAS_ESPERA_MAXIMA.
+# Una tarea 'en_proceso' por más de TAREAS_TIEMPO_MAXIMO segundos se da por abandonada y vuelve a la cola.
+TAREAS_MAX_INTENTOS = 5
+TAREAS_ESPERA_BASE = 10
+TAREAS_ESPERA_MAXIMA = 3600
+TAREAS_TIEMPO_MAXIMO = 1800
+
+# Recibos de venta (tienda/recibos.py) en REPORTES_DIR/recibos; PDF si weasyprint está
+# instalado, si no HTML para imprimir. Procesos del pool que los genera al cerrar el día.
+RECIBOS_PROCESOS = 2
+
+# Resumen de compras de cada cliente en la caché (tienda/compras_cliente.py). Se invalida
+# al procesar sus eventos de venta; el tiempo de vida solo acota cuánto dura un mes viejo.
+COMPRAS_CLIENTE_SEGUNDOS = 3600
+
+# Sugerencias de pedido (tienda/pronostico.py), calculadas cada noche tras cerrar_dia con las
+# ventas de los últimos PEDIDOS_DIAS_HISTORIA días. La demanda pondera más los días recientes
+# (el peso se reduce a la mitad cada PEDIDOS_VIDA_MEDIA días); se sugiere pedir lo necesario
+# para cubrir la entrega del proveedor más PEDIDOS_DIAS_COBERTURA días, con stock de seguridad.
+PEDIDOS_DIAS_HISTORIA = 28
+PEDIDOS_VIDA_MEDIA = 7
+PEDIDOS_DIAS_ENTREGA = 7
+PEDIDOS_DIAS_COBERTURA = 14
+
+# Sucursales (tienda/sucursales.py). Las ventas y ajustes de quien no tiene sucursal asignada
+# se cargan a la principal, que la migración 0020 crea con las ventas y el stock existentes.
+SUCURSAL_PRINCIPAL = 'MATRIZ'
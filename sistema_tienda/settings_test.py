@@ -0,0 +1,35 @@
+# sistema_tienda/settings_test.py
+# Perfil SQLite para pruebas y desarrollo local, sin servidor MySQL:
+#   python manage.py test --settings=sistema_tienda.settings_test --parallel
+#   python manage.py migrate --settings=sistema_tienda.settings_test
+#   python manage.py runserver --settings=sistema_tienda.settings_test
+
+import sys
+import tempfile
+
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db_dev.sqlite3',
+        # Las pruebas usan una base en memoria (una por proceso con --parallel)
+    }
+}
+
+# MD5 no es seguro para producción; aquí evita que cada usuario de prueba cueste un PBKDF2
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+# Sin archivos de registro ni perfiles durante las pruebas
+CONSULTAS_LENTAS_MS = None
+PERFILADOR_MUESTREO = 0.0
+
+# En `manage.py test` las tablas se crean desde los modelos sin recorrer las migraciones
+# (con sus RunPython de datos), lo que reduce el arranque a menos de un segundo.
+# MigracionesTests las recorre (con MIGRATION_MODULES={}) desde 0003 sobre datos existentes.
+# Los reportes y recibos de las pruebas van a un directorio temporal; en desarrollo se
+# conserva REPORTES_DIR para que runserver, cerrar_dia y el worker compartan archivos.
+if 'test' in sys.argv[1:2]:
+    REPORTES_DIR = tempfile.mkdtemp(prefix='tienda-reportes-')
+    MIGRATION_MODULES = {app: None for app in ('admin', 'auth', 'contenttypes', 'sessions', 'tienda')}
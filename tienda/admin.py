@@ -1,13 +1,100 @@
 # tienda/admin.py
-from django.contrib import admin
-from .models import Categoria, Producto, Proveedor, Cliente, PerfilUsuario
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
+from django.core.paginator import Paginator
+from django.db import connection
+from django.shortcuts import render
+from django.utils.functional import cached_property
+from django.utils import timezone
+from .models import Categoria, Producto, Proveedor, Cliente, PerfilUsuario, Venta, MovimientoInventario, PrecioHistorico, Tarea, SugerenciaPedido, Sucursal, Existencia
+from .forms import AjustePreciosForm, StockVistoForm, stock_visto
+from .inventario import guardar_con_ajuste, registrar_ajuste
+from . import permisos, precios, sucursales, tareas
+
+# =================== PERMISOS ===================
+class TiendaAdmin(admin.ModelAdmin):
+    """
+    Base de los admins de la tienda: los permisos salen de la matriz de
+    tienda/permisos.py ('<modelo>.ver/crear/editar/eliminar') y no de
+    los permisos por usuario de django.contrib.auth. Los modelos con
+    sucursal se limitan a la del usuario, como en las vistas.
+    """
+    def _puede(self, request, accion):
+        return permisos.puede(request.user, f"{self.opts.model_name}.{accion}")
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if any(campo.name == 'sucursal' for campo in self.opts.fields):
+            queryset = sucursales.acotar(queryset, request.user)
+        return queryset
+
+    def has_module_permission(self, request):
+        return self._puede(request, 'ver')
+
+    def has_view_permission(self, request, obj=None):
+        return self._puede(request, 'ver')
+
+    def has_add_permission(self, request):
+        return self._puede(request, 'crear')
+
+    def has_change_permission(self, request, obj=None):
+        return self._puede(request, 'editar')
+
+    def has_delete_permission(self, request, obj=None):
+        return self._puede(request, 'eliminar')
+
+
+# =================== TABLAS GRANDES ===================
+# Debajo de este número de filas se cuenta exacto; arriba se usa la estimación del motor
+FILAS_CONTEO_EXACTO = 10000
+
+
+def estimar_filas(modelo):
+    """Filas aproximadas de la tabla según las estadísticas del motor, o None si no las hay."""
+    tabla = modelo._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'mysql':
+            cursor.execute(
+                "SELECT TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+                [tabla],
+            )
+        elif connection.vendor == 'postgresql':
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [tabla])
+        else:
+            return None
+        fila = cursor.fetchone()
+    return fila[0] if fila and fila[0] is not None and fila[0] >= 0 else None
+
+
+class PaginadorEstimado(Paginator):
+    """
+    Sin filtros ni búsqueda, el total sale de las estadísticas de la tabla
+    en lugar de un COUNT(*) sobre millones de filas.
+    """
+    @cached_property
+    def count(self):
+        consulta = getattr(self.object_list, 'query', None)
+        if consulta is not None and not consulta.where:
+            estimado = estimar_filas(self.object_list.model)
+            if estimado is not None and estimado > FILAS_CONTEO_EXACTO:
+                return estimado
+        return super().count
+
+
+class TablaGrandeAdmin(TiendaAdmin):
+    """Base para changelists de tablas grandes: total estimado y sin segundo COUNT(*)."""
+    paginator = PaginadorEstimado
+    show_full_result_count = False
+
 
 # =================== ADMIN PERFIL DE USUARIO ===================
 @admin.register(PerfilUsuario)
-class PerfilUsuarioAdmin(admin.ModelAdmin):
+class PerfilUsuarioAdmin(TablaGrandeAdmin):
     """Admin personalizado para Perfiles de Usuario"""
-    list_display = ('user', 'rol', 'departamento', 'activo', 'fecha_contratacion')
-    list_filter = ('rol', 'activo', 'departamento')
+    list_display = ('user', 'rol', 'sucursal', 'departamento', 'activo', 'fecha_contratacion')
+    list_filter = ('rol', 'activo', 'sucursal', 'departamento')
+    list_select_related = ('user', 'sucursal')
+    raw_id_fields = ('user',)
     search_fields = ('user__username', 'user__email', 'departamento')
     list_editable = ('rol', 'activo')
     ordering = ('-fecha_contratacion',)
@@ -15,9 +102,9 @@ class PerfilUsuarioAdmin(admin.ModelAdmin):
 
 # =================== ADMIN CATEGORÍA ===================
 @admin.register(Categoria)
-class CategoriaAdmin(admin.ModelAdmin):
+class CategoriaAdmin(TiendaAdmin):
     """Admin personalizado para Categorías"""
-    list_display = ('id', 'nombre', 'fecha_creacion')
+    list_display = ('id', 'nombre', 'productos_activos', 'valor_stock', 'fecha_creacion')
     search_fields = ('nombre',)
     list_filter = ('fecha_creacion',)
     ordering = ('nombre',)
@@ -25,30 +112,210 @@ class CategoriaAdmin(admin.ModelAdmin):
 
 # =================== ADMIN PRODUCTO ===================
 @admin.register(Producto)
-class ProductoAdmin(admin.ModelAdmin):
+class ProductoAdmin(TablaGrandeAdmin):
     """Admin personalizado para Productos"""
     list_display = ('id', 'nombre', 'categoria', 'precio_venta', 'stock', 'activo', 'fecha_creacion')
-    search_fields = ('nombre', 'descripcion')
-    list_filter = ('categoria', 'activo', 'fecha_creacion')
+    search_fields = ('nombre', '=sku')
+    # Las opciones de categoría salen de tienda_categoria; el filtro usa el índice de la FK
+    list_filter = ('activo', 'categoria', 'fecha_creacion')
+    list_select_related = ('categoria',)
+    autocomplete_fields = ('categoria', 'proveedor')
+    raw_id_fields = ('creado_por',)
     list_editable = ('precio_venta', 'stock', 'activo')
     ordering = ('-fecha_creacion',)
+    actions = ['ajustar_precios']
+    form = StockVistoForm
+
+    def get_changelist_form(self, request, **kwargs):
+        # La lista editable también manda el stock visto junto a cada fila
+        kwargs.setdefault('form', StockVistoForm)
+        return super().get_changelist_form(request, **kwargs)
+
+    @admin.action(description='Ajustar precios de los productos seleccionados')
+    def ajustar_precios(self, request, queryset):
+        """Pide el ajuste en una página intermedia y lo aplica con un solo UPDATE"""
+        form = AjustePreciosForm(request.POST if 'aplicar' in request.POST else None)
+        if form.is_valid():
+            cambiados = precios.ajustar_precios(
+                queryset, form.cleaned_data['tipo'], form.cleaned_data['valor'],
+                usuario=request.user, motivo=form.cleaned_data['motivo'],
+            )
+            self.message_user(request, f'Precios actualizados: {cambiados} productos.')
+            return None
+
+        return render(request, 'admin/tienda/producto/ajustar_precios.html', {
+            **self.admin_site.each_context(request),
+            'title': 'Ajustar precios',
+            'opts': self.model._meta,
+            'form': form,
+            'total': queryset.count(),
+            'select_across': request.POST.get('select_across', '0'),
+            'seleccionados': request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+            'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+        })
+
+    def save_model(self, request, obj, form, change):
+        # Los cambios de stock y precio hechos aquí también quedan en su historial
+        if not change:
+            super().save_model(request, obj, form, change)
+            registrar_ajuste(obj, 0, request.user, nota='Stock inicial')
+            return
+        # El stock se aplica como diferencia contra el que se vio al cargar la página:
+        # no pisa las ventas descontadas mientras tanto
+        guardar_con_ajuste(obj, stock_visto(form),
+                           lambda: super(ProductoAdmin, self).save_model(request, obj, form, change),
+                           request.user, nota='Ajuste desde el admin')
+        precios.registrar_cambio_precio(obj, form.initial.get('precio_venta'), request.user,
+                                        motivo='Edición desde el admin')
 
 
 # =================== ADMIN PROVEEDOR ===================
 @admin.register(Proveedor)
-class ProveedorAdmin(admin.ModelAdmin):
+class ProveedorAdmin(TiendaAdmin):
     """Admin personalizado para Proveedores"""
-    list_display = ('id', 'nombre', 'contacto', 'telefono')
+    list_display = ('id', 'nombre', 'contacto', 'telefono', 'productos_activos', 'valor_stock')
     search_fields = ('nombre', 'contacto', 'telefono')
-    list_filter = ('nombre',)
     ordering = ('nombre',)
 
 
 # =================== ADMIN CLIENTE ===================
 @admin.register(Cliente)
-class ClienteAdmin(admin.ModelAdmin):
+class ClienteAdmin(TablaGrandeAdmin):
     """Admin personalizado para Clientes"""
     list_display = ('id', 'nombre', 'apellido', 'email', 'telefono', 'fecha_registro')
-    search_fields = ('nombre', 'apellido', 'email')
+    search_fields = ('nombre', 'apellido', '=email')
     list_filter = ('fecha_registro',)
-    ordering = ('apellido', 'nombre')
\ No newline at end of file
+    raw_id_fields = ('user',)
+    ordering = ('apellido', 'nombre')
+
+    # Como en cliente_eliminar: las ventas se borran por lotes en la tarea 'eliminar_cliente'
+    def get_deleted_objects(self, objs, request):
+        """Sin recorrer la cascada (todas las ventas del cliente) para la página de confirmación."""
+        clientes = [str(cliente) for cliente in objs]
+        return clientes, {self.opts.verbose_name_plural: len(clientes)}, set(), []
+
+    def delete_model(self, request, obj):
+        tareas.encolar_una_vez('eliminar_cliente', cliente_id=obj.pk)
+        self.message_user(request, 'Sus ventas se borran en segundo plano.', messages.INFO)
+
+    def delete_queryset(self, request, queryset):
+        for pk in queryset.values_list('pk', flat=True):
+            tareas.encolar_una_vez('eliminar_cliente', cliente_id=pk)
+        self.message_user(request, 'Las ventas de los clientes se borran en segundo plano.', messages.INFO)
+
+
+# =================== ADMIN VENTA ===================
+@admin.register(Venta)
+class VentaAdmin(TablaGrandeAdmin):
+    """
+    Admin de solo lectura para ventas: el stock y los reportes dependen
+    de los eventos que se generan al registrarlas desde la tienda.
+    """
+    list_display = ('id', 'fecha_venta', 'sucursal', 'cliente', 'producto_nombre', 'cantidad', 'total', 'vendedor')
+    list_filter = ('sucursal',)
+    list_select_related = ('cliente', 'vendedor', 'sucursal')
+    raw_id_fields = ('cliente', 'vendedor', 'producto')
+    date_hierarchy = 'fecha_venta'
+    # Solo búsquedas exactas sobre columnas con índice único
+    search_fields = ('=id', '=clave_idempotencia', '=cliente__email')
+    sortable_by = ('id', 'fecha_venta')
+    ordering = ('-fecha_venta',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+# =================== ADMIN MOVIMIENTO DE INVENTARIO ===================
+@admin.register(MovimientoInventario)
+class MovimientoInventarioAdmin(TablaGrandeAdmin):
+    """Admin de solo lectura para el libro de inventario"""
+    list_display = ('id', 'producto', 'tipo', 'cantidad', 'usuario', 'nota', 'fecha')
+    list_filter = ('tipo',)
+    search_fields = ('producto__nombre', 'nota')
+    list_select_related = ('producto', 'usuario')
+    raw_id_fields = ('producto', 'usuario')
+    ordering = ('-id',)
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+# =================== ADMIN PRECIO HISTÓRICO ===================
+@admin.register(PrecioHistorico)
+class PrecioHistoricoAdmin(TablaGrandeAdmin):
+    """Admin de solo lectura para el historial de precios"""
+    list_display = ('id', 'producto', 'precio_anterior', 'precio_nuevo', 'usuario', 'motivo', 'fecha')
+    search_fields = ('producto__nombre', 'motivo')
+    list_select_related = ('producto', 'usuario')
+    raw_id_fields = ('producto', 'usuario')
+    ordering = ('-fecha',)
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+# =================== ADMIN TAREA ===================
+@admin.register(Tarea)
+class TareaAdmin(TablaGrandeAdmin):
+    """Cola de tareas: solo lectura, con una acción para reintentar las fallidas"""
+    list_display = ('id', 'nombre', 'estado', 'intentos', 'max_intentos', 'disponible_en', 'trabajador', 'fecha_fin')
+    list_filter = ('estado', 'nombre')
+    search_fields = ('=id',)
+    readonly_fields = [campo.name for campo in Tarea._meta.fields]
+    ordering = ('-id',)
+    actions = ['reintentar']
+
+    @admin.action(description='Reintentar las tareas seleccionadas')
+    def reintentar(self, request, queryset):
+        reintentadas = queryset.exclude(estado=Tarea.EN_PROCESO).update(
+            estado=Tarea.PENDIENTE, intentos=0, disponible_en=timezone.now(), fecha_fin=None,
+        )
+        self.message_user(request, f'Tareas devueltas a la cola: {reintentadas}.')
+
+    def has_add_permission(self, request):
+        return False
+
+
+# =================== ADMIN SUGERENCIA DE PEDIDO ===================
+@admin.register(SugerenciaPedido)
+class SugerenciaPedidoAdmin(TablaGrandeAdmin):
+    """Pronóstico de compras: solo lectura, lo reescribe el lote nocturno"""
+    list_display = ('fecha', 'proveedor', 'producto', 'stock', 'demanda_diaria', 'dias_restantes', 'cantidad_sugerida')
+    list_filter = ('fecha', 'proveedor')
+    list_select_related = ('producto', 'proveedor')
+    raw_id_fields = ('producto', 'proveedor')
+    ordering = ('-fecha', 'dias_restantes')
+
+
+# =================== ADMIN SUCURSAL ===================
+@admin.register(Sucursal)
+class SucursalAdmin(TiendaAdmin):
+    """Admin personalizado para Sucursales"""
+    list_display = ('id', 'codigo', 'nombre', 'direccion', 'activa', 'fecha_creacion')
+    list_filter = ('activa',)
+    search_fields = ('codigo', 'nombre')
+    ordering = ('nombre',)
+
+
+# =================== ADMIN EXISTENCIA ===================
+@admin.register(Existencia)
+class ExistenciaAdmin(TablaGrandeAdmin):
+    """Stock por sucursal: solo lectura, cambia con las ventas y los ajustes de stock"""
+    list_display = ('sucursal', 'producto', 'cantidad', 'fecha_actualizacion')
+    list_filter = ('sucursal',)
+    search_fields = ('producto__nombre', '=producto__sku')
+    list_select_related = ('sucursal', 'producto')
+    raw_id_fields = ('producto',)
+    ordering = ('sucursal', 'producto')
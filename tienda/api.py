@@ -0,0 +1,386 @@
+# tienda/api.py
+# ===============================================================
+# API JSON PARA TERMINALES DE PUNTO DE VENTA
+# Mismos modelos, formularios y permisos que las vistas HTML. La sesión
+# y el token CSRF se obtienen igual que en el sitio (login normal).
+# El catálogo lleva ETag/Last-Modified calculados con MAX() y COUNT(),
+# así un terminal que pregunta "¿cambió algo?" recibe un 304 sin que
+# se serialice ningún producto.
+# ===============================================================
+
+import base64
+import json
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db.models import Count, Max, Q
+from django.forms.models import model_to_dict
+from django.http import HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.views.decorators.http import condition
+
+from . import compras_cliente, permisos, sucursales
+from .forms import ClienteForm, ProductoForm, VentaForm, stock_visto
+from .inventario import guardar_con_ajuste, registrar_ajuste
+from .lote_ventas import MAXIMO_VENTAS_POR_LOTE, registrar_lote
+from .models import Categoria, Cliente, Producto, RegistroEliminado, Venta
+from .precios import registrar_cambio_precio
+from .reportes import datos_reporte, leer_snapshot
+from .views import registrar_cliente
+
+CAMPOS_PRODUCTO = (
+    'id', 'nombre', 'sku', 'descripcion', 'precio_venta', 'stock',
+    'categoria_id', 'proveedor_id', 'activo', 'fecha_actualizacion',
+)
+CAMPOS_CATEGORIA = ('id', 'nombre', 'descripcion', 'fecha_actualizacion')
+CAMPOS_CLIENTE = ('id', 'nombre', 'apellido', 'email', 'telefono', 'direccion', 'fecha_registro', 'fecha_actualizacion')
+CAMPOS_VENTA = (
+    'id', 'cliente_id', 'vendedor_id', 'producto_id', 'sucursal_id', 'producto_nombre', 'producto_sku',
+    'cantidad', 'precio_unitario', 'total', 'fecha_venta',
+)
+TAMANO_PAGINA = 100
+
+# Sincronización: filas por tabla en cada respuesta (el margen está en
+# settings.SINCRONIZACION_MARGEN_SEGUNDOS)
+LIMITE_SINCRONIZACION = 500
+MODELOS_SINCRONIZADOS = {
+    'productos': (Producto, CAMPOS_PRODUCTO),
+    'categorias': (Categoria, CAMPOS_CATEGORIA),
+    'clientes': (Cliente, CAMPOS_CLIENTE),
+}
+
+
+# ===============================================================
+# UTILIDADES
+# ===============================================================
+def _acceso_denegado(*permisos_requeridos):
+    roles = {rol for permiso in permisos_requeridos for rol in permisos.roles_con(permiso)}
+    return JsonResponse({'error': f'Acceso denegado. Rol requerido: {", ".join(sorted(roles))}'}, status=403)
+
+
+def api_permiso_requerido(*permisos_requeridos):
+    """Como permiso_requerido, pero responde 401/403 en JSON en lugar de redirigir."""
+    for permiso in permisos_requeridos:
+        permisos.validar(permiso)
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            if not request.user.is_authenticated:
+                return JsonResponse({'error': 'Debes iniciar sesión para acceder.'}, status=401)
+            if not permisos.puede(request.user, *permisos_requeridos):
+                return _acceso_denegado(*permisos_requeridos)
+            return view_func(request, *args, **kwargs)
+        _wrapped_view.permisos_requeridos = permisos_requeridos
+        return _wrapped_view
+    return decorator
+
+
+def _metodo_no_permitido(*permitidos):
+    respuesta = JsonResponse({'error': 'Método no permitido.'}, status=405)
+    respuesta['Allow'] = ', '.join(permitidos)
+    return respuesta
+
+
+def _leer_json(request):
+    """Cuerpo de la petición como dict, o None si no es un objeto JSON válido."""
+    try:
+        datos = json.loads(request.body or b'{}')
+    except ValueError:
+        return None
+    return datos if isinstance(datos, dict) else None
+
+
+def _json_invalido():
+    return JsonResponse({'error': 'El cuerpo debe ser un objeto JSON.'}, status=400)
+
+
+def _errores(form):
+    return JsonResponse({'errores': form.errors.get_json_data()}, status=400)
+
+
+# ===============================================================
+# VALIDADORES DEL CATÁLOGO (ETag / Last-Modified)
+# ===============================================================
+def _version_catalogo(request):
+    # condition() pide el ETag y la fecha por separado; una sola consulta para ambos
+    if not hasattr(request, '_version_catalogo'):
+        request._version_catalogo = Producto.objects.aggregate(
+            ultima=Max('fecha_actualizacion'), total=Count('id'),
+        )
+    return request._version_catalogo
+
+
+def _etag_catalogo(request, *args, **kwargs):
+    version = _version_catalogo(request)
+    ultima = version['ultima'].timestamp() if version['ultima'] else 0
+    return f"productos-{version['total']}-{ultima}"
+
+
+def _ultima_modificacion_catalogo(request, *args, **kwargs):
+    return _version_catalogo(request)['ultima']
+
+
+@condition(etag_func=_etag_catalogo, last_modified_func=_ultima_modificacion_catalogo)
+def _catalogo(request):
+    productos = list(Producto.objects.order_by('id').values(*CAMPOS_PRODUCTO))
+    return JsonResponse({'productos': productos})
+
+
+# ===============================================================
+# PRODUCTOS
+# ===============================================================
+def _guardar_producto(request, producto=None):
+    datos = _leer_json(request)
+    if datos is None:
+        return _json_invalido()
+
+    precio_anterior = producto.precio_venta if producto else None
+    if producto:
+        # El stock se cambia con un ajuste relativo (ajuste_stock) o fijándolo junto con el
+        # stock que el cliente leyó (stock_anterior): si otra operación lo movió mientras tanto, 409
+        if 'ajuste_stock' in datos:
+            ajuste = datos.pop('ajuste_stock')
+            if 'stock' in datos:
+                return JsonResponse({'error': 'Envíe stock o ajuste_stock, no ambos.'}, status=400)
+            if isinstance(ajuste, bool) or not isinstance(ajuste, int):
+                return JsonResponse({'error': 'ajuste_stock debe ser un entero.'}, status=400)
+            datos['stock'] = producto.stock + ajuste
+        elif 'stock' in datos:
+            if 'stock_anterior' not in datos:
+                return JsonResponse({'error': 'Para fijar el stock envíe también stock_anterior, '
+                                              'o use ajuste_stock.'}, status=400)
+            if str(datos.pop('stock_anterior')) != str(producto.stock):
+                return JsonResponse({'error': 'El stock cambió desde que se leyó.', 'stock': producto.stock},
+                                    status=409)
+        # Actualización parcial: lo que no venga en el JSON conserva su valor
+        datos = {**model_to_dict(producto, fields=ProductoForm.Meta.fields), **datos,
+                 ProductoForm().add_initial_prefix('stock'): producto.stock}
+
+    form = ProductoForm(datos, instance=producto)
+    if not form.is_valid():
+        return _errores(form)
+    if producto:
+        guardado = guardar_con_ajuste(producto, stock_visto(form), form.save, request.user, nota='Ajuste desde la API')
+        registrar_cambio_precio(guardado, precio_anterior, request.user, motivo='Edición desde la API')
+    else:
+        guardado = form.save()
+        registrar_ajuste(guardado, 0, request.user, nota='Stock inicial')
+    return JsonResponse(Producto.objects.values(*CAMPOS_PRODUCTO).get(pk=guardado.pk), status=200 if producto else 201)
+
+
+@api_permiso_requerido('catalogo.ver')
+def productos(request):
+    """GET: catálogo completo (con validadores HTTP). POST: crear producto."""
+    if request.method in ('GET', 'HEAD'):
+        return _catalogo(request)
+    if request.method == 'POST':
+        if not permisos.puede(request.user, 'producto.crear'):
+            return _acceso_denegado('producto.crear')
+        return _guardar_producto(request)
+    return _metodo_no_permitido('GET', 'HEAD', 'POST')
+
+
+@api_permiso_requerido('catalogo.ver')
+def producto_detalle(request, pk):
+    """GET: un producto. PATCH/PUT: actualizarlo (stock con ajuste_stock, o stock + stock_anterior)."""
+    producto = get_object_or_404(Producto, pk=pk)
+    if request.method == 'GET':
+        return JsonResponse(Producto.objects.values(*CAMPOS_PRODUCTO).get(pk=pk))
+    if request.method in ('PATCH', 'PUT'):
+        if not permisos.puede(request.user, 'producto.editar'):
+            return _acceso_denegado('producto.editar')
+        return _guardar_producto(request, producto)
+    return _metodo_no_permitido('GET', 'PATCH', 'PUT')
+
+
+# ===============================================================
+# CLIENTES
+# ===============================================================
+@api_permiso_requerido('cliente.ver')
+def clientes(request):
+    """GET: clientes paginados (?pagina=N). POST: registrar cliente; su usuario se crea en segundo plano."""
+    if request.method == 'GET':
+        pagina = Paginator(Cliente.objects.values(*CAMPOS_CLIENTE), TAMANO_PAGINA).get_page(request.GET.get('pagina'))
+        return JsonResponse({
+            'clientes': list(pagina),
+            'pagina': pagina.number,
+            'paginas': pagina.paginator.num_pages,
+        })
+
+    if request.method == 'POST':
+        if not permisos.puede(request.user, 'cliente.crear'):
+            return _acceso_denegado('cliente.crear')
+        datos = _leer_json(request)
+        if datos is None:
+            return _json_invalido()
+        form = ClienteForm(datos)
+        if not form.is_valid():
+            return _errores(form)
+        cliente = form.save(commit=False)
+        if not registrar_cliente(cliente):
+            return JsonResponse({'error': f"Ya existe un usuario con el nombre '{cliente.nombre.lower()}'."}, status=409)
+        return JsonResponse(Cliente.objects.values(*CAMPOS_CLIENTE).get(pk=cliente.pk), status=201)
+
+    return _metodo_no_permitido('GET', 'POST')
+
+
+@api_permiso_requerido('cliente.ver')
+def cliente_detalle(request, pk):
+    if request.method != 'GET':
+        return _metodo_no_permitido('GET')
+    get_object_or_404(Cliente, pk=pk)
+    return JsonResponse(Cliente.objects.values(*CAMPOS_CLIENTE).get(pk=pk))
+
+
+@api_permiso_requerido('cliente.ver')
+def cliente_compras(request, pk):
+    """Resumen de compras de un cliente: gasto por mes, favoritos y últimos tickets."""
+    if request.method != 'GET':
+        return _metodo_no_permitido('GET')
+    get_object_or_404(Cliente, pk=pk)
+    return JsonResponse(compras_cliente.resumen(pk))
+
+
+@api_permiso_requerido('venta.ver_propias')
+def mis_compras(request):
+    """El mismo resumen para el cliente autenticado (por Cliente.user)."""
+    if request.method != 'GET':
+        return _metodo_no_permitido('GET')
+    cliente_id = Cliente.objects.filter(user=request.user).values_list('id', flat=True).first()
+    if cliente_id is None:
+        return JsonResponse({'error': 'Tu usuario no tiene un cliente asociado.'}, status=404)
+    return JsonResponse(compras_cliente.resumen(cliente_id))
+
+
+# ===============================================================
+# VENTAS
+# ===============================================================
+@api_permiso_requerido('venta.ver')
+def ventas(request):
+    """GET: ventas del día (?fecha=AAAA-MM-DD) de la sucursal del usuario. POST: registrar una venta."""
+    if request.method == 'GET':
+        try:
+            fecha = parse_date(request.GET.get('fecha') or '') or timezone.localdate()
+        except ValueError:
+            return JsonResponse({'error': 'Fecha inválida (use AAAA-MM-DD).'}, status=400)
+        sucursal_id = sucursales.sucursal_de(request.user)
+        # Los días cerrados salen de su snapshot JSON, como el reporte HTML
+        if fecha < timezone.localdate():
+            contenido = leer_snapshot(fecha, 'json', sucursal_id)
+            if contenido is not None:
+                return HttpResponse(contenido, content_type='application/json')
+        return JsonResponse(datos_reporte(fecha, sucursal_id))
+
+    if request.method == 'POST':
+        if not permisos.puede(request.user, 'venta.crear'):
+            return _acceso_denegado('venta.crear')
+        datos = _leer_json(request)
+        if datos is None:
+            return _json_invalido()
+        form = VentaForm(datos, sucursal_id=sucursales.sucursal_de(request.user))
+        if not form.is_valid():
+            return _errores(form)
+        venta = form.save(commit=False)
+        venta.vendedor = request.user
+        venta.save()
+        return JsonResponse(Venta.objects.values(*CAMPOS_VENTA).get(pk=venta.pk), status=201)
+
+    return _metodo_no_permitido('GET', 'POST')
+
+
+@api_permiso_requerido('venta.crear')
+def ventas_lote(request):
+    """
+    POST {"ventas": [{"clave", "cliente", "producto", "cantidad", "fecha_venta"}, ...]}
+    Registra ventas capturadas sin conexión; reenviar el mismo lote es seguro.
+    """
+    if request.method != 'POST':
+        return _metodo_no_permitido('POST')
+    datos = _leer_json(request)
+    if datos is None or not isinstance(datos.get('ventas'), list):
+        return JsonResponse({'error': 'Se esperaba {"ventas": [...]}.'}, status=400)
+    if len(datos['ventas']) > MAXIMO_VENTAS_POR_LOTE:
+        return JsonResponse({'error': f'Máximo {MAXIMO_VENTAS_POR_LOTE} ventas por lote.'}, status=400)
+
+    resultados = registrar_lote(datos['ventas'], request.user, sucursales.para_registrar(request.user))
+    return JsonResponse({'resultados': resultados})
+
+
+# ===============================================================
+# SINCRONIZACIÓN INCREMENTAL DEL CATÁLOGO
+# El terminal guarda el `cursor` de la respuesta y lo envía en la
+# siguiente: solo recibe las filas cambiadas y las lápidas de las
+# eliminadas desde entonces. Mientras `completo` sea false hay más.
+# ===============================================================
+def _leer_cursor(texto):
+    if not texto:
+        return {}
+    datos = json.loads(base64.urlsafe_b64decode(texto.encode()))
+    if not isinstance(datos, dict) or not isinstance(datos.get('eliminados', 0), int):
+        raise ValueError('Cursor inválido')
+    for nombre in MODELOS_SINCRONIZADOS:
+        posicion = datos.get(nombre)
+        if posicion is None:
+            continue
+        if not (isinstance(posicion, list) and len(posicion) == 2 and isinstance(posicion[1], int)
+                and parse_datetime(str(posicion[0]))):
+            raise ValueError('Cursor inválido')
+    return datos
+
+
+def _escribir_cursor(posiciones):
+    return base64.urlsafe_b64encode(json.dumps(posiciones).encode()).decode()
+
+
+def _cambios(modelo, campos, posicion, hasta):
+    """Filas con (fecha_actualizacion, id) posterior a la posición, en orden."""
+    filas = modelo.objects.filter(fecha_actualizacion__lt=hasta).order_by('fecha_actualizacion', 'id')
+    if posicion:
+        fecha, ultimo_id = parse_datetime(posicion[0]), posicion[1]
+        filas = filas.filter(Q(fecha_actualizacion__gt=fecha) | Q(fecha_actualizacion=fecha, id__gt=ultimo_id))
+    filas = list(filas.values(*campos)[:LIMITE_SINCRONIZACION + 1])
+
+    completo = len(filas) <= LIMITE_SINCRONIZACION
+    filas = filas[:LIMITE_SINCRONIZACION]
+    if filas:
+        posicion = [filas[-1]['fecha_actualizacion'].isoformat(), filas[-1]['id']]
+    return filas, posicion, completo
+
+
+@api_permiso_requerido('catalogo.ver')
+def sincronizar(request):
+    """GET: cambios del catálogo desde ?cursor= (sin cursor: carga inicial completa)."""
+    if request.method != 'GET':
+        return _metodo_no_permitido('GET')
+    try:
+        posiciones = _leer_cursor(request.GET.get('cursor'))
+    except ValueError:
+        return JsonResponse({'error': 'Cursor inválido.'}, status=400)
+
+    # Las filas más recientes que el margen se entregan en la siguiente llamada: su
+    # transacción puede no haber confirmado y otra fila con fecha anterior aparecer después
+    hasta = timezone.now() - timedelta(seconds=settings.SINCRONIZACION_MARGEN_SEGUNDOS)
+    respuesta = {'completo': True}
+    for nombre, (modelo, campos) in MODELOS_SINCRONIZADOS.items():
+        filas, posiciones[nombre], completo = _cambios(modelo, campos, posiciones.get(nombre), hasta)
+        respuesta[nombre] = filas
+        respuesta['completo'] = respuesta['completo'] and completo
+
+    eliminados = list(
+        RegistroEliminado.objects.filter(id__gt=posiciones.get('eliminados', 0), fecha__lt=hasta)
+        .order_by('id').values('id', 'modelo', 'objeto_id')[:LIMITE_SINCRONIZACION + 1]
+    )
+    if len(eliminados) > LIMITE_SINCRONIZACION:
+        eliminados = eliminados[:LIMITE_SINCRONIZACION]
+        respuesta['completo'] = False
+    if eliminados:
+        posiciones['eliminados'] = eliminados[-1]['id']
+    respuesta['eliminados'] = [{'modelo': e['modelo'], 'id': e['objeto_id']} for e in eliminados]
+
+    respuesta['cursor'] = _escribir_cursor(posiciones)
+    return JsonResponse(respuesta)
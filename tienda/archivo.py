@@ -0,0 +1,78 @@
+# tienda/archivo.py
+# ===============================================================
+# ARCHIVO DE VENTAS ANTIGUAS
+# Las ventas más viejas que settings.VENTAS_DIAS_ARCHIVO se mueven por
+# lotes a tienda_ventaarchivo, así tienda_venta solo guarda el periodo
+# reciente. Los reportes históricos consultan ambas tablas con UNION.
+# ===============================================================
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Sum, Value
+from django.db.models.functions import Concat
+from django.utils import timezone
+
+from .models import Venta, VentaArchivo
+
+# Columnas comunes a Venta y VentaArchivo
+CAMPOS = (
+    'id', 'cliente_id', 'vendedor_id', 'producto_id', 'sucursal_id', 'producto_nombre', 'producto_sku',
+    'cantidad', 'precio_unitario', 'total', 'fecha_venta',
+)
+
+
+def fecha_limite(dias=None):
+    """Las ventas anteriores a esta fecha se archivan."""
+    dias = settings.VENTAS_DIAS_ARCHIVO if dias is None else dias
+    return timezone.now() - timedelta(days=dias)
+
+
+def archivar_ventas(dias=None, tamano_lote=1000):
+    """
+    Copia las ventas antiguas a VentaArchivo y las borra de Venta, un lote
+    por transacción. Devuelve cuántas ventas se archivaron.
+    """
+    limite = fecha_limite(dias)
+    archivadas = 0
+    while True:
+        with transaction.atomic():
+            lote = list(
+                Venta.objects.filter(fecha_venta__lt=limite).order_by('id').values(*CAMPOS)[:tamano_lote]
+            )
+            if not lote:
+                return archivadas
+            VentaArchivo.objects.bulk_create([VentaArchivo(**datos) for datos in lote])
+            Venta.objects.filter(id__in=[datos['id'] for datos in lote]).delete()
+            archivadas += len(lote)
+
+
+def columnas_reporte(queryset):
+    """Columnas de CAMPOS más el nombre del cliente, del vendedor y de la sucursal, en la misma consulta."""
+    return queryset.annotate(
+        cliente_nombre=Concat('cliente__nombre', Value(' '), 'cliente__apellido'),
+        vendedor_username=F('vendedor__username'),
+        sucursal_nombre=F('sucursal__nombre'),
+    ).values(*CAMPOS, 'cliente_nombre', 'vendedor_username', 'sucursal_nombre')
+
+
+def ventas_historicas(**filtros):
+    """
+    Ventas de tienda_venta y tienda_ventaarchivo como una sola consulta
+    (UNION ALL) de diccionarios, de la más reciente a la más antigua.
+    Acepta los mismos filtros que Venta.objects.filter().
+    """
+    recientes = columnas_reporte(Venta.objects.filter(**filtros).order_by())
+    archivadas = columnas_reporte(VentaArchivo.objects.filter(**filtros).order_by())
+    return recientes.union(archivadas, all=True).order_by('-fecha_venta')
+
+
+def resumen_historico(**filtros):
+    """Total vendido y número de ventas sumando ambas tablas."""
+    resumen = {'total': 0, 'cantidad': 0}
+    for modelo in (Venta, VentaArchivo):
+        parcial = modelo.objects.filter(**filtros).aggregate(total=Sum('total'), cantidad=Count('id'))
+        resumen['total'] += parcial['total'] or 0
+        resumen['cantidad'] += parcial['cantidad']
+    return resumen
@@ -0,0 +1,27 @@
+# tienda/cache.py
+# ===============================================================
+# BACKENDS DE CACHÉ CON MÉTRICAS DE ACIERTOS
+# Mismos backends de Django, pero cada get() cuenta un acierto o un
+# fallo en metricas.CACHE_CONSULTAS. Se eligen en settings.CACHES.
+# ===============================================================
+
+from django.core.cache.backends import locmem, redis
+
+from . import metricas
+
+_AUSENTE = object()
+
+
+class MetricasCacheMixin:
+    def get(self, key, default=None, version=None):
+        valor = super().get(key, _AUSENTE, version)
+        metricas.CACHE_CONSULTAS.inc(resultado='fallo' if valor is _AUSENTE else 'acierto')
+        return default if valor is _AUSENTE else valor
+
+
+class LocMemCache(MetricasCacheMixin, locmem.LocMemCache):
+    pass
+
+
+class RedisCache(MetricasCacheMixin, redis.RedisCache):
+    pass
@@ -0,0 +1,108 @@
+# tienda/compras_cliente.py
+# ===============================================================
+# RESUMEN DE COMPRAS DE UN CLIENTE (home del cliente y /api/mis-compras/)
+# Gasto por mes, productos favoritos y últimos tickets, agregados en la
+# base de datos por el índice (cliente_id, fecha_venta) de Venta y de
+# VentaArchivo. El resultado se guarda en la caché por cliente; el
+# consumidor de eventos 'resumen_clientes' lo invalida cuando el cliente
+# compra, y las vistas que borran ventas lo invalidan directamente.
+# ===============================================================
+
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from .archivo import resumen_historico, ventas_historicas
+from .models import Venta, VentaArchivo
+
+MESES = 12
+FAVORITOS = 5
+RECIENTES = 10
+
+
+def clave(cliente_id):
+    return f"compras_cliente:{cliente_id}"
+
+
+def inicios_de_mes(cantidad=MESES):
+    """Inicio (hora local) de los últimos `cantidad` meses, del más antiguo al actual."""
+    mes = timezone.localdate().replace(day=1)
+    fechas = []
+    for _ in range(cantidad):
+        fechas.append(mes)
+        mes = (mes - timedelta(days=1)).replace(day=1)
+    return [timezone.make_aware(datetime.combine(fecha, time.min)) for fecha in reversed(fechas)]
+
+
+def gasto_por_mes(cliente_id):
+    """
+    Un SUM condicional por mes en una sola consulta por tabla: sin
+    TruncMonth, que en MySQL necesita las tablas de zonas horarias.
+    """
+    inicios = inicios_de_mes()
+    limites = list(zip(inicios, inicios[1:] + [None]))
+    agregados = {}
+    for posicion, (inicio, fin) in enumerate(limites):
+        rango = Q(fecha_venta__gte=inicio) & (Q(fecha_venta__lt=fin) if fin else Q())
+        agregados[f"total_{posicion}"] = Sum('total', filter=rango)
+        agregados[f"compras_{posicion}"] = Count('id', filter=rango)
+
+    meses = [{'mes': inicio.date(), 'total': 0, 'compras': 0} for inicio in inicios]
+    for modelo in (Venta, VentaArchivo):
+        parcial = modelo.objects.filter(cliente_id=cliente_id, fecha_venta__gte=inicios[0]).aggregate(**agregados)
+        for posicion, mes in enumerate(meses):
+            mes['total'] += parcial[f"total_{posicion}"] or 0
+            mes['compras'] += parcial[f"compras_{posicion}"]
+    return meses
+
+
+def favoritos(cliente_id, cantidad=FAVORITOS):
+    """Productos con más unidades compradas, agrupados en cada tabla y unidos aquí."""
+    por_producto = defaultdict(lambda: {'unidades': 0, 'gastado': 0, 'compras': 0})
+    for modelo in (Venta, VentaArchivo):
+        filas = modelo.objects.filter(cliente_id=cliente_id).values('producto_id', 'producto_nombre').annotate(
+            unidades=Sum('cantidad'), gastado=Sum('total'), compras=Count('id'),
+        ).order_by()
+        for fila in filas:
+            producto = por_producto[(fila['producto_id'], fila['producto_nombre'])]
+            for campo in ('unidades', 'gastado', 'compras'):
+                producto[campo] += fila[campo]
+    ordenados = sorted(por_producto.items(), key=lambda par: (-par[1]['unidades'], -par[1]['compras']))
+    return [
+        {'producto_id': producto_id, 'producto_nombre': nombre, **totales}
+        for (producto_id, nombre), totales in ordenados[:cantidad]
+    ]
+
+
+def calcular(cliente_id):
+    recientes = ventas_historicas(cliente_id=cliente_id)[:RECIENTES]
+    return {
+        'cliente_id': cliente_id,
+        'totales': resumen_historico(cliente_id=cliente_id),
+        'meses': gasto_por_mes(cliente_id),
+        'favoritos': favoritos(cliente_id),
+        'recientes': [
+            {campo: venta[campo] for campo in (
+                'id', 'fecha_venta', 'producto_nombre', 'cantidad', 'precio_unitario', 'total', 'vendedor_username',
+            )}
+            for venta in recientes
+        ],
+        'calculado': timezone.now(),
+    }
+
+
+def resumen(cliente_id):
+    """Resumen desde la caché; se calcula solo si no está o se invalidó."""
+    datos = cache.get(clave(cliente_id))
+    if datos is None:
+        datos = calcular(cliente_id)
+        cache.set(clave(cliente_id), datos, settings.COMPRAS_CLIENTE_SEGUNDOS)
+    return datos
+
+
+def invalidar(*clientes_ids):
+    cache.delete_many([clave(cliente_id) for cliente_id in set(clientes_ids)])
@@ -0,0 +1,122 @@
+# tienda/consultas_lentas.py
+# ===============================================================
+# REGISTRO DE CONSULTAS LENTAS
+# ConsultasLentasMiddleware envuelve cada petición con
+# connection.execute_wrapper. Las consultas que pasan de
+# settings.CONSULTAS_LENTAS_MS se escriben como una línea JSON con la
+# vista, el punto del código de `tienda` que la lanzó y su EXPLAIN,
+# en un archivo que rota por tamaño. `python manage.py consultas_lentas`
+# resume las peores.
+# ===============================================================
+
+import json
+import logging
+import os
+import threading
+import time
+import traceback
+from logging.handlers import RotatingFileHandler
+
+from django.conf import settings
+from django.utils import timezone
+
+DIRECTORIO_APP = os.path.dirname(os.path.abspath(__file__))
+# Marcos que no cuentan como origen: este módulo y el middleware que lo instala
+ARCHIVOS_PROPIOS = {os.path.join(DIRECTORIO_APP, 'consultas_lentas.py'), os.path.join(DIRECTORIO_APP, 'middleware.py')}
+
+_logger = None
+_candado = threading.Lock()
+
+
+def _registro():
+    """Logger con el archivo rotativo; se crea la primera vez que hace falta."""
+    global _logger
+    with _candado:
+        if _logger is None:
+            ruta = settings.CONSULTAS_LENTAS_ARCHIVO
+            os.makedirs(os.path.dirname(ruta), exist_ok=True)
+            manejador = RotatingFileHandler(
+                ruta, maxBytes=settings.CONSULTAS_LENTAS_TAMANO,
+                backupCount=settings.CONSULTAS_LENTAS_RESPALDOS, encoding='utf-8',
+            )
+            manejador.setFormatter(logging.Formatter('%(message)s'))
+            logger = logging.getLogger('tienda.consultas_lentas')
+            logger.addHandler(manejador)
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            _logger = logger
+    return _logger
+
+
+def origen_en_tienda():
+    """'archivo:línea función' del marco más interno dentro de la app."""
+    for marco in reversed(traceback.extract_stack()):
+        if marco.filename.startswith(DIRECTORIO_APP) and marco.filename not in ARCHIVOS_PROPIOS:
+            return f"{os.path.relpath(marco.filename, os.path.dirname(DIRECTORIO_APP))}:{marco.lineno} {marco.name}"
+    return None
+
+
+class RegistroConsultasLentas:
+    """execute_wrapper que mide cada consulta y anota las que pasan del umbral."""
+
+    def __init__(self, request=None):
+        self.request = request
+        self.umbral = settings.CONSULTAS_LENTAS_MS / 1000
+        self._explicando = False
+
+    def __call__(self, execute, sql, params, many, context):
+        if self._explicando:
+            return execute(sql, params, many, context)
+        inicio = time.perf_counter()
+        resultado = execute(sql, params, many, context)
+        duracion = time.perf_counter() - inicio
+        if duracion >= self.umbral:
+            self.registrar(sql, params, many, context['connection'], duracion)
+        return resultado
+
+    def vista(self):
+        coincidencia = getattr(self.request, 'resolver_match', None)
+        if coincidencia is not None:
+            return coincidencia.view_name
+        return getattr(self.request, 'path', None)
+
+    def explain(self, sql, params, connection):
+        """Plan de la consulta, solo para SELECT; None si no se pudo obtener."""
+        if not sql.lstrip().upper().startswith('SELECT'):
+            return None
+        self._explicando = True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(f"{connection.ops.explain_query_prefix()} {sql}", params)
+                return [list(fila) for fila in cursor.fetchall()]
+        except Exception:
+            # Por ejemplo dentro de una transacción ya rota; la consulta se anota sin plan
+            return None
+        finally:
+            self._explicando = False
+
+    def registrar(self, sql, params, many, connection, duracion):
+        _registro().info(json.dumps({
+            'fecha': timezone.now().isoformat(),
+            'ms': round(duracion * 1000, 1),
+            'vista': self.vista(),
+            'metodo': getattr(self.request, 'method', None),
+            'origen': origen_en_tienda(),
+            'sql': sql,
+            'explain': None if many else self.explain(sql, params, connection),
+        }, default=str))
+
+
+def leer_registros(ruta=None):
+    """Genera los registros del archivo actual y de sus respaldos rotados."""
+    ruta = str(ruta or settings.CONSULTAS_LENTAS_ARCHIVO)
+    for numero in range(settings.CONSULTAS_LENTAS_RESPALDOS, -1, -1):
+        archivo = f"{ruta}.{numero}" if numero else ruta
+        if not os.path.exists(archivo):
+            continue
+        with open(archivo, encoding='utf-8') as lineas:
+            for linea in lineas:
+                try:
+                    yield json.loads(linea)
+                except ValueError:
+                    continue  # Línea cortada por una escritura interrumpida
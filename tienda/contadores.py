@@ -0,0 +1,112 @@
+# tienda/contadores.py
+# ===============================================================
+# CONTADORES DESNORMALIZADOS DE CATEGORÍA Y PROVEEDOR
+# productos_activos, valor_stock (stock × precio de los productos
+# activos) y productos_stock_bajo se mantienen con deltas: las
+# señales de Producto cubren save()/delete() y los UPDATE masivos
+# (ventas, ajuste de precios) aplican su propio delta.
+# `reparar_contadores` los recalcula.
+# ===============================================================
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db.models import Count, DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import Categoria, Producto, Proveedor
+
+CERO = Decimal('0.00')
+# Igual que la alerta de la lista de productos: stock bajo es menos de 10 unidades
+STOCK_BAJO = 10
+
+
+def es_stock_bajo(stock):
+    return 1 if stock < STOCK_BAJO else 0
+
+
+def estado(producto):
+    """Lo que un producto aporta a los contadores: (categoria, proveedor, activo, stock, precio)."""
+    return (producto.categoria_id, producto.proveedor_id, producto.activo, producto.stock, producto.precio_venta)
+
+
+def nuevos_deltas():
+    """{(modelo, pk): [productos, valor, stock_bajo]} para acumular antes de aplicar."""
+    return defaultdict(lambda: [0, CERO, 0])
+
+
+def sumar(deltas, categoria_id, proveedor_id, productos=0, valor=CERO, stock_bajo=0):
+    for modelo, pk in ((Categoria, categoria_id), (Proveedor, proveedor_id)):
+        if pk is not None:
+            deltas[(modelo, pk)][0] += productos
+            deltas[(modelo, pk)][1] += valor
+            deltas[(modelo, pk)][2] += stock_bajo
+
+
+def sumar_estado(deltas, datos, signo):
+    categoria_id, proveedor_id, activo, stock, precio = datos
+    if activo:
+        sumar(deltas, categoria_id, proveedor_id, signo, signo * stock * precio, signo * es_stock_bajo(stock))
+
+
+def sumar_cambio_stock(deltas, categoria_id, proveedor_id, precio, stock_anterior, stock_nuevo):
+    """Delta de un producto activo cuyo stock cambió con un UPDATE directo."""
+    sumar(deltas, categoria_id, proveedor_id, valor=(stock_nuevo - stock_anterior) * precio,
+          stock_bajo=es_stock_bajo(stock_nuevo) - es_stock_bajo(stock_anterior))
+
+
+def aplicar(deltas):
+    """Un UPDATE con F() por categoría/proveedor con delta distinto de cero."""
+    for (modelo, pk), (productos, valor, stock_bajo) in deltas.items():
+        if productos or valor or stock_bajo:
+            modelo.objects.filter(pk=pk).update(
+                productos_activos=F('productos_activos') + productos,
+                valor_stock=F('valor_stock') + valor,
+                productos_stock_bajo=F('productos_stock_bajo') + stock_bajo,
+            )
+
+
+def aplicar_cambio(anterior, nuevo):
+    """Aplica la diferencia entre dos estados de un producto (None = no existe)."""
+    deltas = nuevos_deltas()
+    if anterior is not None:
+        sumar_estado(deltas, anterior, -1)
+    if nuevo is not None:
+        sumar_estado(deltas, nuevo, 1)
+    aplicar(deltas)
+
+
+def _valores_reales(campo):
+    """Subconsultas con el conteo y el valor real por categoría o proveedor."""
+    activos = Producto.objects.filter(**{campo: OuterRef('pk')}, activo=True).order_by().values(campo)
+    conteo = activos.annotate(n=Count('id')).values('n')
+    bajos = activos.filter(stock__lt=STOCK_BAJO).annotate(n=Count('id')).values('n')
+    valor = activos.annotate(
+        v=Sum(F('stock') * F('precio_venta'), output_field=DecimalField(max_digits=14, decimal_places=2)),
+    ).values('v')
+    return {
+        'productos_reales': Coalesce(Subquery(conteo), 0),
+        'stock_bajo_real': Coalesce(Subquery(bajos), 0),
+        'valor_real': Coalesce(Subquery(valor), Value(CERO), output_field=DecimalField(max_digits=14, decimal_places=2)),
+    }
+
+
+def descuadres():
+    """Genera las categorías y proveedores cuyos contadores no coinciden con los productos."""
+    for modelo, campo in ((Categoria, 'categoria'), (Proveedor, 'proveedor')):
+        for objeto in modelo.objects.annotate(**_valores_reales(campo)).order_by('pk'):
+            guardado = (objeto.productos_activos, objeto.valor_stock, objeto.productos_stock_bajo)
+            if guardado != (objeto.productos_reales, objeto.valor_real, objeto.stock_bajo_real):
+                yield objeto
+
+
+def recalcular():
+    """Recalcula todos los contadores con un UPDATE por tabla. Devuelve las filas actualizadas."""
+    filas = 0
+    for modelo, campo in ((Categoria, 'categoria'), (Proveedor, 'proveedor')):
+        reales = _valores_reales(campo)
+        filas += modelo.objects.update(
+            productos_activos=reales['productos_reales'], valor_stock=reales['valor_real'],
+            productos_stock_bajo=reales['stock_bajo_real'],
+        )
+    return filas
@@ -0,0 +1,360 @@
+# tienda/datos_sinteticos.py
+# ===============================================================
+# GENERADOR DE DATOS SINTÉTICOS PARA PLANEACIÓN DE CAPACIDAD
+# Cada tabla se produce con un generador perezoso y se escribe con
+# bulk_create por lotes, así la memoria no crece con el volumen. Las
+# tablas grandes (productos, clientes, ventas) se reparten en rangos
+# de filas entre varios procesos, cada uno con su propia conexión y
+# una semilla derivada del rango: el resultado es reproducible.
+# ===============================================================
+
+import itertools
+import math
+import random
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from multiprocessing import get_context
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db.models import Exists, F, Max, OuterRef
+from django.utils import timezone
+
+from . import contadores
+from .models import (
+    Categoria, Cliente, CorteInventario, MovimientoInventario, PerfilUsuario, Producto, Proveedor,
+    ResumenVentasDia, Sucursal, Venta,
+)
+from .sucursales import completar_existencias, mover_existencias, principal_id
+
+CATEGORIAS = (
+    'Abarrotes', 'Bebidas', 'Lácteos', 'Panadería', 'Carnes', 'Frutas y verduras', 'Botanas',
+    'Limpieza', 'Cuidado personal', 'Mascotas', 'Papelería', 'Ferretería', 'Farmacia', 'Congelados',
+)
+NOMBRES = (
+    'María', 'José', 'Guadalupe', 'Juan', 'Ana', 'Luis', 'Carmen', 'Carlos', 'Rosa', 'Jorge',
+    'Sofía', 'Miguel', 'Lucía', 'Pedro', 'Elena', 'Ricardo', 'Patricia', 'Fernando', 'Laura', 'Diego',
+)
+APELLIDOS = (
+    'Hernández', 'García', 'Martínez', 'López', 'González', 'Pérez', 'Rodríguez', 'Sánchez',
+    'Ramírez', 'Cruz', 'Flores', 'Gómez', 'Morales', 'Vázquez', 'Reyes', 'Jiménez', 'Torres', 'Ruiz',
+)
+ARTICULOS = (
+    'Arroz', 'Frijol', 'Aceite', 'Azúcar', 'Café', 'Refresco', 'Agua', 'Leche', 'Queso', 'Pan',
+    'Tortillas', 'Jabón', 'Detergente', 'Galletas', 'Atún', 'Cereal', 'Huevo', 'Papel', 'Salsa', 'Harina',
+)
+PRESENTACIONES = ('250 g', '500 g', '1 kg', '1 L', '2 L', '600 ml', 'paquete', 'caja', 'pieza')
+
+# Empleados por cada 10: 7 vendedores, 2 gerentes, 1 administrador
+ROLES_EMPLEADOS = ('vendedor',) * 7 + ('gerente',) * 2 + ('administrador',)
+# Más ventas en fin de semana (lunes = 0) y en las horas de comida y salida del trabajo
+PESO_DIA_SEMANA = (0.9, 0.85, 0.9, 1.0, 1.2, 1.5, 1.3)
+PESO_HORA = {8: 2, 9: 3, 10: 4, 11: 5, 12: 7, 13: 8, 14: 7, 15: 5, 16: 5, 17: 6, 18: 8, 19: 8, 20: 6, 21: 3}
+CANTIDADES = (1, 2, 3, 4, 5, 6)
+PESO_CANTIDAD = (55, 22, 10, 6, 4, 3)
+
+TAMANO_LOTE = 5000
+
+
+def en_lotes(filas, tamano):
+    """Corta un iterable en listas de `tamano` sin materializarlo completo."""
+    filas = iter(filas)
+    while True:
+        lote = list(itertools.islice(filas, tamano))
+        if not lote:
+            return
+        yield lote
+
+
+def escribir(modelo, filas, tamano_lote=TAMANO_LOTE):
+    """bulk_create por lotes; cada lote es su propia transacción. Devuelve las filas escritas."""
+    total = 0
+    for lote in en_lotes(filas, tamano_lote):
+        modelo.objects.bulk_create(lote)
+        total += len(lote)
+    return total
+
+
+def pesos_zipf(cantidad, exponente=1.1):
+    """Pesos acumulados para random.choices: pocos elementos concentran la mayoría."""
+    return list(itertools.accumulate(1 / (rango ** exponente) for rango in range(1, cantidad + 1)))
+
+
+# ===============================================================
+# GENERADORES POR TABLA (filas [inicio, fin) de cada una)
+# ===============================================================
+def filas_categorias(inicio, fin, rng, opciones, contexto):
+    for numero in range(inicio, fin):
+        base = CATEGORIAS[numero % len(CATEGORIAS)]
+        yield Categoria(nombre=f"{base} {opciones['prefijo']}-{numero + 1}", descripcion=f"Productos de {base.lower()}")
+
+
+def filas_proveedores(inicio, fin, rng, opciones, contexto):
+    for numero in range(inicio, fin):
+        yield Proveedor(
+            nombre=f"Distribuidora {rng.choice(APELLIDOS)} {opciones['prefijo']}-{numero + 1}",
+            contacto=f"{rng.choice(NOMBRES)} {rng.choice(APELLIDOS)}",
+            telefono=f"662{rng.randrange(10 ** 7):07d}",
+        )
+
+
+def filas_productos(inicio, fin, rng, opciones, contexto):
+    categorias, proveedores = contexto['categorias'], contexto['proveedores']
+    for numero in range(inicio, fin):
+        articulo = rng.choice(ARTICULOS)
+        # Precios con distribución log-normal: muchos baratos, pocos caros
+        precio = Decimal(min(rng.lognormvariate(3.5, 0.8), 9999)).quantize(Decimal('0.01'))
+        yield Producto(
+            nombre=f"{articulo} {rng.choice(PRESENTACIONES)} #{numero + 1}",
+            sku=f"GEN{opciones['prefijo']}-{numero + 1:08d}",
+            descripcion=f"{articulo} generado para pruebas de capacidad",
+            precio_venta=max(precio, Decimal('1.00')),
+            stock=rng.randrange(0, 500),
+            categoria_id=rng.choice(categorias),
+            proveedor_id=rng.choice(proveedores) if proveedores and rng.random() < 0.9 else None,
+            activo=rng.random() < 0.95,
+        )
+
+
+def filas_clientes(inicio, fin, rng, opciones, contexto):
+    for numero in range(inicio, fin):
+        nombre = rng.choice(NOMBRES)
+        apellido = f"{rng.choice(APELLIDOS)} {rng.choice(APELLIDOS)}"
+        yield Cliente(
+            nombre=nombre,
+            apellido=apellido,
+            email=f"cliente{numero + 1}.{opciones['prefijo']}@example.com".lower(),
+            telefono=f"662{rng.randrange(10 ** 7):07d}",
+            direccion=f"Calle {rng.randrange(1, 300)} #{rng.randrange(1, 2000)}, Hermosillo",
+        )
+
+
+def filas_ventas(inicio, fin, rng, opciones, contexto):
+    productos, clientes, vendedores = contexto['productos'], contexto['clientes'], contexto['vendedores']
+    dias, resumen = contexto['dias'], contexto['resumen']
+    for _ in range(inicio, fin):
+        posicion_dia = rng.choices(range(len(dias)), cum_weights=contexto['pesos_dias'])[0]
+        dia, medianoche = dias[posicion_dia]
+        hora = rng.choices(contexto['horas'], cum_weights=contexto['pesos_horas'])[0]
+        producto_id, precio, nombre, sku = rng.choices(productos, cum_weights=contexto['pesos_productos'])[0]
+        cantidad = rng.choices(CANTIDADES, weights=PESO_CANTIDAD)[0]
+        total = precio * cantidad
+        resumen[dia][0] += 1
+        resumen[dia][1] += total
+        yield Venta(
+            cliente_id=rng.choices(clientes, cum_weights=contexto['pesos_clientes'])[0],
+            vendedor_id=rng.choice(vendedores) if vendedores else None,
+            sucursal_id=rng.choice(contexto['sucursales']),
+            producto_id=producto_id,
+            producto_nombre=nombre,
+            producto_sku=sku or '',
+            cantidad=cantidad,
+            precio_unitario=precio,
+            total=total,
+            fecha_venta=medianoche + timedelta(hours=hora, seconds=rng.randrange(3600)),
+        )
+
+
+# ===============================================================
+# CONTEXTO QUE CADA PROCESO CARGA UNA VEZ
+# ===============================================================
+def _contexto_productos(opciones):
+    return {
+        'categorias': list(Categoria.objects.values_list('id', flat=True)),
+        'proveedores': list(Proveedor.objects.values_list('id', flat=True)),
+    }
+
+
+def _contexto_ventas(opciones):
+    productos = list(Producto.objects.filter(activo=True).values_list('id', 'precio_venta', 'nombre', 'sku'))
+    # Orden aleatorio fijo para que los más vendidos no sean siempre los de menor id
+    random.Random(opciones['semilla']).shuffle(productos)
+    clientes = list(Cliente.objects.values_list('id', flat=True))
+    vendedores = list(PerfilUsuario.objects.filter(rol__in=('vendedor', 'gerente')).values_list('user_id', flat=True))
+
+    hoy = timezone.localdate()
+    dias = []
+    for atras in range(opciones['dias'], 0, -1):
+        dia = hoy - timedelta(days=atras)
+        dias.append((dia, timezone.make_aware(datetime.combine(dia, time.min))))
+    # Tendencia de crecimiento: el último día vende ~50 % más que el primero
+    pesos_dias = itertools.accumulate(
+        PESO_DIA_SEMANA[dia.weekday()] * (1 + 0.5 * posicion / len(dias)) for posicion, (dia, _) in enumerate(dias)
+    )
+    return {
+        'productos': productos,
+        'pesos_productos': pesos_zipf(len(productos)),
+        'clientes': clientes,
+        'pesos_clientes': pesos_zipf(len(clientes), exponente=0.6),
+        'vendedores': vendedores,
+        'sucursales': list(Sucursal.objects.filter(activa=True).values_list('id', flat=True)) or [principal_id()],
+        'dias': dias,
+        'pesos_dias': list(pesos_dias),
+        'horas': list(PESO_HORA),
+        'pesos_horas': list(itertools.accumulate(PESO_HORA.values())),
+    }
+
+
+TABLAS = {
+    # nombre: (modelo, generador, contexto)
+    'categorias': (Categoria, filas_categorias, None),
+    'proveedores': (Proveedor, filas_proveedores, None),
+    'productos': (Producto, filas_productos, _contexto_productos),
+    'clientes': (Cliente, filas_clientes, None),
+    'ventas': (Venta, filas_ventas, _contexto_ventas),
+}
+
+_contextos = {}
+
+
+def generar_rango(tabla, inicio, fin, opciones):
+    """
+    Escribe las filas [inicio, fin) de la tabla. Devuelve (filas, resumen
+    por día); el resumen solo lo llenan las ventas.
+    """
+    modelo, generador, cargar_contexto = TABLAS[tabla]
+    if tabla not in _contextos:
+        _contextos[tabla] = cargar_contexto(opciones) if cargar_contexto else {}
+    contexto = dict(_contextos[tabla], resumen=defaultdict(lambda: [0, Decimal('0')]))
+    rng = random.Random(f"{opciones['semilla']}-{tabla}-{inicio}")
+    filas = escribir(modelo, generador(inicio, fin, rng, opciones, contexto), opciones['lote'])
+    return filas, dict(contexto['resumen'])
+
+
+def _trabajo(argumentos):
+    return generar_rango(*argumentos)
+
+
+def generar_tabla(tabla, cantidad, opciones, procesos=1):
+    """Genera `cantidad` filas, en un proceso o repartidas en rangos entre varios."""
+    resumen = defaultdict(lambda: [0, Decimal('0')])
+    if cantidad <= 0:
+        return 0, resumen
+    if procesos <= 1:
+        rangos = [(0, cantidad)]
+    else:
+        # Más rangos que procesos para que ninguno se quede sin trabajo al final
+        tamano = max(math.ceil(cantidad / (procesos * 4)), opciones['lote'])
+        rangos = [(inicio, min(inicio + tamano, cantidad)) for inicio in range(0, cantidad, tamano)]
+
+    if procesos <= 1:
+        # El contexto de una corrida anterior en este proceso (otra llamada al comando) ya no sirve
+        _contextos.pop(tabla, None)
+        resultados = [generar_rango(tabla, inicio, fin, opciones) for inicio, fin in rangos]
+    else:
+        # 'spawn' arranca procesos limpios que no heredan la conexión del padre. El
+        # inicializador es django.setup para que las tareas, que importan este
+        # módulo y sus modelos, se desempaqueten con las apps ya cargadas.
+        with get_context('spawn').Pool(procesos, initializer=django.setup) as pool:
+            resultados = pool.map(_trabajo, [(tabla, inicio, fin, opciones) for inicio, fin in rangos])
+
+    filas = 0
+    for escritas, parcial in resultados:
+        filas += escritas
+        for dia, (ventas, ingresos) in parcial.items():
+            resumen[dia][0] += ventas
+            resumen[dia][1] += ingresos
+    return filas, resumen
+
+
+def generar_empleados(cantidad, opciones):
+    """Usuarios con PerfilUsuario; el hash de la contraseña se calcula una sola vez."""
+    password = make_password(opciones['password'])
+    prefijo = opciones['prefijo'].lower()
+    roles = {}
+    usuarios = []
+    for numero in range(cantidad):
+        rol = ROLES_EMPLEADOS[numero % len(ROLES_EMPLEADOS)]
+        username = f"{rol}_{prefijo}_{numero + 1}"
+        roles[username] = rol
+        usuarios.append(User(username=username, email=f"{username}@tienda.test", password=password,
+                             is_staff=rol == 'administrador'))
+    User.objects.bulk_create(usuarios, batch_size=opciones['lote'])
+    # MySQL no devuelve los ids de bulk_create; se leen por username
+    ids = User.objects.filter(username__in=roles).values_list('username', 'id')
+    PerfilUsuario.objects.bulk_create(
+        [PerfilUsuario(user_id=pk, rol=roles[username], departamento='Ventas') for username, pk in ids],
+        batch_size=opciones['lote'],
+    )
+    return len(usuarios)
+
+
+def guardar_resumen(resumen):
+    """Suma las ventas generadas a ResumenVentasDia (no pasan por la bandeja de eventos)."""
+    for dia, (ventas, ingresos) in resumen.items():
+        ResumenVentasDia.objects.get_or_create(fecha=dia)
+        ResumenVentasDia.objects.filter(fecha=dia).update(ventas=F('ventas') + ventas, ingresos=F('ingresos') + ingresos)
+
+
+def _anotar_ventas(desde_venta_id, tamano_lote):
+    """
+    Un movimiento VENTA por cada venta generada (id > desde_venta_id), como
+    los del consumidor de stock. Devuelve las unidades por producto, por
+    (sucursal, producto) y la fecha de la primera venta.
+    """
+    por_producto = defaultdict(int)
+    por_sucursal = defaultdict(int)
+    primera = None
+    ventas = Venta.objects.filter(producto__isnull=False).order_by('id').values_list(
+        'id', 'producto_id', 'sucursal_id', 'cantidad', 'fecha_venta',
+    )
+    ultimo = desde_venta_id
+    while True:
+        lote = list(ventas.filter(id__gt=ultimo)[:tamano_lote])
+        if not lote:
+            return por_producto, por_sucursal, primera
+        MovimientoInventario.objects.bulk_create([
+            MovimientoInventario(producto_id=producto_id, tipo=MovimientoInventario.VENTA, cantidad=-cantidad,
+                                 nota=f"Venta #{pk}", fecha=fecha)
+            for pk, producto_id, _, cantidad, fecha in lote
+        ])
+        for _, producto_id, sucursal_id, cantidad, fecha in lote:
+            por_producto[producto_id] += cantidad
+            por_sucursal[(sucursal_id, producto_id)] += cantidad
+            primera = fecha if primera is None else min(primera, fecha)
+        ultimo = lote[-1][0]
+
+
+def terminar(desde_venta_id=None, tamano_lote=TAMANO_LOTE):
+    """
+    Completa lo que los bulk_create se saltan (señales y bandeja de eventos).
+    Las ventas generadas (id > desde_venta_id) se anotan en el libro de
+    inventario. Un producto sin libro recibe un ajuste inicial con su stock
+    más lo que vendió: su stock generado es el de hoy. Los que ya tenían
+    libro descuentan lo vendido, como con el consumidor de stock. Al final
+    el stock de los productos nuevos se asigna a la sucursal principal y
+    se recalculan los contadores.
+    """
+    tope = MovimientoInventario.objects.aggregate(maximo=Max('id'))['maximo'] or 0
+    vendidas, por_sucursal, primera = (
+        _anotar_ventas(desde_venta_id, tamano_lote) if desde_venta_id is not None else ({}, {}, None)
+    )
+
+    sin_libro = Producto.objects.filter(
+        ~Exists(MovimientoInventario.objects.filter(producto=OuterRef('pk'), id__lte=tope)),
+        ~Exists(CorteInventario.objects.filter(producto=OuterRef('pk'))),
+    ).order_by('id').values_list('id', 'stock')
+    inicio = primera or timezone.now()
+    ultimo = 0
+    while True:
+        lote = list(sin_libro.filter(id__gt=ultimo)[:tamano_lote])
+        if not lote:
+            break
+        MovimientoInventario.objects.bulk_create([
+            MovimientoInventario(producto_id=pk, tipo=MovimientoInventario.AJUSTE, cantidad=stock + vendidas.pop(pk, 0),
+                                 nota='Stock inicial (datos sintéticos)', fecha=inicio)
+            for pk, stock in lote
+        ])
+        ultimo = lote[-1][0]
+
+    # Lo que queda en `vendidas` son productos con libro propio
+    for producto_id, cantidad in vendidas.items():
+        Producto.objects.filter(pk=producto_id).update(stock=F('stock') - cantidad)
+    mover_existencias({
+        (sucursal_id, producto_id): -cantidad
+        for (sucursal_id, producto_id), cantidad in por_sucursal.items() if producto_id in vendidas
+    })
+    completar_existencias()
+    return contadores.recalcular()
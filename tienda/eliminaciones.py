@@ -0,0 +1,133 @@
+# tienda/eliminaciones.py
+# ===============================================================
+# ELIMINACIÓN POR LOTES DE CATEGORÍAS Y PROVEEDORES
+# La vista solo muestra el impacto (con COUNT) y programa el borrado.
+# La tarea 'procesar_eliminaciones' (o el comando del mismo nombre)
+# quita los dependientes en lotes de N filas, cada lote en su propia
+# transacción, sin cargar la cascada completa en memoria.
+# ===============================================================
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import tareas
+from .models import (
+    Categoria, CorteInventario, EliminacionProgramada, EventoVenta, MovimientoInventario,
+    PrecioHistorico, Producto, Proveedor, Venta, VentaArchivo, payload_venta,
+)
+
+
+# ===============================================================
+# VISTA PREVIA DEL IMPACTO
+# ===============================================================
+def impacto_categoria(categoria):
+    """Filas afectadas al eliminar la categoría, contadas en la base de datos."""
+    return {
+        'productos': Producto.objects.filter(categoria=categoria).count(),
+        'ventas': Venta.objects.filter(producto__categoria=categoria).count(),
+        'movimientos': MovimientoInventario.objects.filter(producto__categoria=categoria).count(),
+    }
+
+
+def impacto_proveedor(proveedor):
+    """Productos que quedarán sin proveedor."""
+    return {
+        'productos': Producto.objects.filter(proveedor=proveedor).count(),
+    }
+
+
+def programar(objeto, usuario=None):
+    """Crea (una sola vez) la eliminación programada del objeto."""
+    modelo = EliminacionProgramada.CATEGORIA if isinstance(objeto, Categoria) else EliminacionProgramada.PROVEEDOR
+    eliminacion, creada = EliminacionProgramada.objects.get_or_create(
+        modelo=modelo,
+        objeto_id=objeto.pk,
+        estado__in=[EliminacionProgramada.PENDIENTE, EliminacionProgramada.EN_PROCESO],
+        defaults={
+            'descripcion': str(objeto)[:200],
+            'estado': EliminacionProgramada.PENDIENTE,
+            'solicitado_por': usuario,
+        },
+    )
+    if creada:
+        tareas.encolar('procesar_eliminaciones')
+    return eliminacion
+
+
+# ===============================================================
+# BORRADO POR LOTES
+# ===============================================================
+def _en_lotes(queryset, tamano_lote, operacion):
+    """
+    Aplica `operacion` a lotes de llaves primarias hasta agotar el queryset.
+    Cada lote es una transacción corta. Devuelve las filas afectadas.
+    """
+    total = 0
+    while True:
+        with transaction.atomic():
+            ids = list(queryset.order_by('pk').values_list('pk', flat=True)[:tamano_lote])
+            if not ids:
+                return total
+            total += operacion(queryset.model.objects.filter(pk__in=ids))
+
+
+def _borrar(queryset):
+    return queryset.delete()[0]
+
+
+def _borrar_ventas(queryset):
+    """Como _borrar, con un evento VENTA_ELIMINADA por venta para que los resúmenes la resten."""
+    EventoVenta.objects.bulk_create([
+        EventoVenta(tipo=EventoVenta.VENTA_ELIMINADA, payload=payload_venta(venta))
+        for venta in queryset.only('id', 'producto_id', 'cliente_id', 'sucursal_id', 'cantidad', 'total', 'fecha_venta')
+    ])
+    return _borrar(queryset)
+
+
+def eliminar_categoria(categoria_id, tamano_lote=500):
+    productos = Producto.objects.filter(categoria_id=categoria_id)
+    # Las ventas se conservan (tienen copia del nombre/SKU); solo se desligan del producto
+    filas = 0
+    for modelo in (Venta, VentaArchivo):
+        filas += _en_lotes(modelo.objects.filter(producto__categoria_id=categoria_id), tamano_lote,
+                           lambda lote: lote.update(producto=None))
+    for modelo in (MovimientoInventario, CorteInventario, PrecioHistorico):
+        filas += _en_lotes(modelo.objects.filter(producto__categoria_id=categoria_id), tamano_lote, _borrar)
+    filas += _en_lotes(productos, tamano_lote, _borrar)
+    filas += Categoria.objects.filter(pk=categoria_id).delete()[0]
+    return filas
+
+
+def eliminar_proveedor(proveedor_id, tamano_lote=500):
+    filas = _en_lotes(Producto.objects.filter(proveedor_id=proveedor_id), tamano_lote,
+                      lambda lote: lote.update(proveedor=None, fecha_actualizacion=timezone.now()))
+    filas += Proveedor.objects.filter(pk=proveedor_id).delete()[0]
+    return filas
+
+
+ELIMINADORES = {
+    EliminacionProgramada.CATEGORIA: eliminar_categoria,
+    EliminacionProgramada.PROVEEDOR: eliminar_proveedor,
+}
+
+
+def procesar_pendientes(tamano_lote=500):
+    """Ejecuta las eliminaciones pendientes en orden. Devuelve cuántas terminó."""
+    terminadas = 0
+    for eliminacion in EliminacionProgramada.objects.filter(estado=EliminacionProgramada.PENDIENTE):
+        tomadas = EliminacionProgramada.objects.filter(
+            pk=eliminacion.pk, estado=EliminacionProgramada.PENDIENTE,
+        ).update(estado=EliminacionProgramada.EN_PROCESO)
+        if not tomadas:
+            continue  # Otro proceso ya la tomó
+
+        try:
+            eliminacion.filas_afectadas = ELIMINADORES[eliminacion.modelo](eliminacion.objeto_id, tamano_lote)
+            eliminacion.estado = EliminacionProgramada.COMPLETADA
+            terminadas += 1
+        except Exception as exc:
+            eliminacion.estado = EliminacionProgramada.ERROR
+            eliminacion.error = str(exc)
+        eliminacion.fecha_fin = timezone.now()
+        eliminacion.save(update_fields=['estado', 'filas_afectadas', 'error', 'fecha_fin'])
+    return terminadas
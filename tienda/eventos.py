@@ -0,0 +1,213 @@
+# tienda/eventos.py
+# ===============================================================
+# CONSUMIDORES DE EVENTOS DE VENTA (OUTBOX)
+# Venta.save() escribe un EventoVenta en la misma transacción que la
+# venta; Venta.delete() y el borrado por lotes de eliminar_cliente, uno
+# VENTA_ELIMINADA que los resúmenes restan. El comando
+# `procesar_eventos` entrega esos eventos por lotes a cada consumidor
+# registrado aquí y guarda su avance en PuntoControl.
+# ===============================================================
+
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import compras_cliente, contadores, reportes, sucursales
+from .models import EventoVenta, MovimientoInventario, PuntoControl, Producto, ResumenVentasDia
+
+logger = logging.getLogger(__name__)
+
+CONSUMIDORES = {}
+
+# Cómo cuenta cada tipo de evento en los resúmenes de ventas
+SIGNOS = {
+    EventoVenta.VENTA_CREADA: 1,
+    EventoVenta.VENTA_ELIMINADA: -1,
+}
+
+
+def consumidor(nombre):
+    """
+    Registra una función que recibe una lista de EventoVenta ya ordenada.
+    """
+    def decorator(func):
+        CONSUMIDORES[nombre] = func
+        return func
+    return decorator
+
+
+def _huecos_nuevos(desde_id, eventos, vistos):
+    """Ids entre el punto de control y los eventos leídos que no aparecieron."""
+    huecos = {}
+    esperado = desde_id + 1
+    for evento in eventos:
+        if evento.id - esperado > settings.EVENTOS_MAXIMO_HUECOS:
+            logger.warning("Hueco de %s ids antes del evento #%s: no se vigila", evento.id - esperado, evento.id)
+        else:
+            huecos.update((str(faltante), vistos) for faltante in range(esperado, evento.id))
+        esperado = evento.id + 1
+    return huecos
+
+
+def procesar_lote(nombre, tamano_lote=500):
+    """
+    Entrega al consumidor los siguientes eventos pendientes y avanza su
+    punto de control en la misma transacción. Devuelve cuántos procesó.
+
+    El id autoincremental se asigna al INSERT pero la fila se ve con el
+    COMMIT: si el evento 11 aparece antes que el 10, el 10 queda anotado
+    en `huecos` y se vuelve a buscar en cada lote hasta que aparece o
+    pasan EVENTOS_ESPERA_HUECO segundos (transacción revertida).
+    """
+    manejador = CONSUMIDORES[nombre]
+    with transaction.atomic():
+        punto, _ = PuntoControl.objects.select_for_update().get_or_create(consumidor=nombre)
+
+        tardios = []
+        if punto.huecos:
+            tardios = list(EventoVenta.objects.filter(id__in=[int(pk) for pk in punto.huecos]).order_by('id'))
+        eventos = list(
+            EventoVenta.objects.filter(id__gt=punto.ultimo_evento_id).order_by('id')[:tamano_lote]
+        )
+        if not eventos and not tardios and not punto.huecos:
+            return 0
+
+        ahora = timezone.now()
+        huecos = dict(punto.huecos)
+        huecos.update(_huecos_nuevos(punto.ultimo_evento_id, eventos, ahora.isoformat()))
+        for evento in tardios:
+            del huecos[str(evento.id)]
+        vencido = ahora - timedelta(seconds=settings.EVENTOS_ESPERA_HUECO)
+        punto.huecos = {pk: visto for pk, visto in huecos.items() if parse_datetime(visto) > vencido}
+
+        if tardios or eventos:
+            manejador(tardios + eventos)
+        if eventos:
+            punto.ultimo_evento_id = eventos[-1].id
+        punto.save(update_fields=['ultimo_evento_id', 'huecos', 'fecha_actualizacion'])
+    return len(tardios) + len(eventos)
+
+
+def procesar_pendientes(nombre, tamano_lote=500):
+    """Procesa lotes hasta vaciar la cola del consumidor."""
+    total = 0
+    while True:
+        procesados = procesar_lote(nombre, tamano_lote)
+        total += procesados
+        if procesados < tamano_lote:
+            return total
+
+
+# ===============================================================
+# CONSUMIDOR: STOCK
+# ===============================================================
+@consumidor('stock')
+def descontar_stock(eventos):
+    """
+    Un solo UPDATE por producto (y por producto y sucursal en Existencia)
+    con la cantidad acumulada del lote y un movimiento de inventario por
+    venta, insertados con bulk_create.
+    """
+    cantidades = defaultdict(int)
+    por_sucursal = defaultdict(int)
+    principal = None
+    movimientos = []
+    for evento in eventos:
+        if evento.tipo != EventoVenta.VENTA_CREADA:
+            continue
+        datos = evento.payload
+        cantidades[datos['producto_id']] += datos['cantidad']
+        sucursal_id = datos.get('sucursal_id')
+        if sucursal_id is None:
+            # Eventos anteriores a las sucursales: sus ventas quedaron en la principal
+            principal = principal or sucursales.principal_id()
+            sucursal_id = principal
+        por_sucursal[(sucursal_id, datos['producto_id'])] -= datos['cantidad']
+        movimientos.append(MovimientoInventario(
+            producto_id=datos['producto_id'],
+            tipo=MovimientoInventario.VENTA,
+            cantidad=-datos['cantidad'],
+            nota=f"Venta #{datos['venta_id']}",
+            fecha=parse_datetime(datos['fecha_venta']),
+        ))
+
+    ahora = timezone.now()
+    # Bloqueo de las filas: el stock leído aquí es el punto de partida del delta de los contadores
+    existentes = {
+        fila[0]: fila[1:]
+        for fila in Producto.objects.select_for_update().filter(pk__in=cantidades).values_list(
+            'pk', 'categoria_id', 'proveedor_id', 'activo', 'precio_venta', 'stock',
+        )
+    }
+    deltas = contadores.nuevos_deltas()
+    for producto_id, cantidad in cantidades.items():
+        if producto_id in existentes:
+            Producto.objects.filter(pk=producto_id).update(stock=F('stock') - cantidad, fecha_actualizacion=ahora)
+            categoria_id, proveedor_id, activo, precio, stock = existentes[producto_id]
+            if activo:
+                contadores.sumar_cambio_stock(deltas, categoria_id, proveedor_id, precio, stock, stock - cantidad)
+    contadores.aplicar(deltas)
+    sucursales.mover_existencias({
+        (sucursal_id, producto_id): cantidad
+        for (sucursal_id, producto_id), cantidad in por_sucursal.items() if producto_id in existentes
+    })
+    MovimientoInventario.objects.bulk_create([m for m in movimientos if m.producto_id in existentes])
+
+
+# ===============================================================
+# CONSUMIDOR: RESUMEN DIARIO
+# ===============================================================
+@consumidor('resumen_diario')
+def acumular_resumen_diario(eventos):
+    """
+    Suma ventas e ingresos del lote por día local (y resta las ventas
+    eliminadas): un UPDATE por día.
+    """
+    por_dia = defaultdict(lambda: [0, Decimal('0')])
+    for evento in eventos:
+        signo = SIGNOS.get(evento.tipo)
+        if signo is None:
+            continue
+        datos = evento.payload
+        dia = timezone.localdate(parse_datetime(datos['fecha_venta']))
+        por_dia[dia][0] += signo
+        por_dia[dia][1] += signo * Decimal(datos['total'])
+
+    for dia, (ventas, ingresos) in por_dia.items():
+        if not ventas and not ingresos:
+            continue  # Venta creada y eliminada en el mismo lote
+        ResumenVentasDia.objects.get_or_create(fecha=dia)
+        ResumenVentasDia.objects.filter(fecha=dia).update(
+            ventas=F('ventas') + ventas, ingresos=F('ingresos') + ingresos,
+        )
+
+
+# ===============================================================
+# CONSUMIDOR: RESUMEN DE COMPRAS POR CLIENTE
+# ===============================================================
+@consumidor('resumen_clientes')
+def invalidar_resumen_clientes(eventos):
+    """Los clientes que compraron (o perdieron una venta) recalculan su resumen en la siguiente lectura."""
+    compras_cliente.invalidar(*(evento.payload['cliente_id'] for evento in eventos if evento.tipo in SIGNOS))
+
+
+# ===============================================================
+# CONSUMIDOR: SNAPSHOTS DE DÍAS CERRADOS
+# ===============================================================
+@consumidor('snapshots')
+def rehacer_snapshots(eventos):
+    """Un día que ya tiene snapshot y recibe o pierde ventas vuelve a generarlo (una vez por lote)."""
+    dias = {
+        timezone.localdate(parse_datetime(evento.payload['fecha_venta']))
+        for evento in eventos if evento.tipo in SIGNOS
+    }
+    for dia in sorted(dias):
+        if reportes.dia_cerrado(dia):
+            reportes.cerrar_dia(dia)
@@ -0,0 +1,87 @@
+# tienda/fabricas.py
+# ===============================================================
+# FÁBRICAS DE DATOS PARA PRUEBAS Y DESARROLLO
+# Una función por modelo que crea un objeto válido con valores únicos;
+# cualquier campo se puede sobrescribir con argumentos. Las relaciones
+# que falten se crean con su propia fábrica.
+#   from tienda import fabricas
+#   venta = fabricas.crear_venta(cantidad=3)
+# ===============================================================
+
+import itertools
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+
+from .models import Categoria, Cliente, PerfilUsuario, Producto, Proveedor, Venta
+
+_secuencia = itertools.count(1)
+
+PASSWORD_PRUEBAS = 'clave-pruebas-123'
+
+
+def _siguiente():
+    return next(_secuencia)
+
+
+def crear_usuario(rol='vendedor', password=None, **campos):
+    """Usuario con su PerfilUsuario. Sin password queda inutilizable (no se calcula ningún hash)."""
+    numero = _siguiente()
+    campos.setdefault('username', f"{rol}{numero}")
+    campos.setdefault('email', f"{campos['username']}@tienda.test")
+    user = User(**campos)
+    if password is None:
+        user.set_unusable_password()
+    else:
+        user.set_password(password)
+    user.save()
+    PerfilUsuario.objects.create(user=user, rol=rol)
+    return user
+
+
+def crear_categoria(**campos):
+    campos.setdefault('nombre', f"Categoría {_siguiente()}")
+    return Categoria.objects.create(**campos)
+
+
+def crear_proveedor(**campos):
+    numero = _siguiente()
+    campos.setdefault('nombre', f"Proveedor {numero}")
+    campos.setdefault('contacto', f"Contacto {numero}")
+    campos.setdefault('telefono', f"662{numero:07d}")
+    return Proveedor.objects.create(**campos)
+
+
+def crear_producto(**campos):
+    numero = _siguiente()
+    campos.setdefault('nombre', f"Producto {numero}")
+    campos.setdefault('sku', f"SKU-{numero:06d}")
+    campos.setdefault('descripcion', f"Descripción del producto {numero}")
+    campos.setdefault('precio_venta', Decimal('10.00'))
+    campos.setdefault('stock', 100)
+    if 'categoria' not in campos and 'categoria_id' not in campos:
+        campos['categoria'] = crear_categoria()
+    return Producto.objects.create(**campos)
+
+
+def crear_cliente(**campos):
+    numero = _siguiente()
+    campos.setdefault('nombre', f"Cliente{numero}")
+    campos.setdefault('apellido', 'Prueba')
+    campos.setdefault('email', f"cliente{numero}@example.com")
+    campos.setdefault('telefono', f"662{numero:07d}")
+    campos.setdefault('direccion', f"Calle {numero}, Hermosillo")
+    return Cliente.objects.create(**campos)
+
+
+def crear_venta(**campos):
+    """Venta con save() normal: precio, total, copia del producto y su evento."""
+    if 'cliente' not in campos and 'cliente_id' not in campos:
+        campos['cliente'] = crear_cliente()
+    if 'producto' not in campos and 'producto_id' not in campos:
+        campos['producto'] = crear_producto()
+    if 'vendedor' not in campos and 'vendedor_id' not in campos:
+        campos['vendedor'] = crear_usuario('vendedor')
+    venta = Venta(**campos)
+    venta.save()
+    return venta
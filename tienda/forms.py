@@ -6,24 +6,64 @@
 # ===============================================================
 
 from django import forms
-from .models import Producto, Categoria, Proveedor, Cliente, Venta
+from .models import Producto, Categoria, Proveedor, Cliente, Venta, Sucursal
 from django.contrib.auth.models import User
 
+# ===============================================================
+# STOCK VISTO AL ABRIR EL FORMULARIO
+# ===============================================================
+def stock_visto(form):
+    """
+    Stock que el usuario vio al abrir el formulario: el campo `stock`
+    lleva show_hidden_initial y el navegador lo devuelve en un input
+    oculto. None si el POST no lo trae o no es un número.
+    """
+    campo = form['stock']
+    try:
+        return campo.field.to_python(form.data.get(campo.html_initial_name))
+    except forms.ValidationError:
+        return None
+
+
+class StockVistoForm(forms.ModelForm):
+    """
+    Base de los formularios que editan Producto.stock (sitio y admin). Al
+    editar, el stock de la carga viaja oculto con el formulario y el ajuste
+    se calcula contra ese valor (inventario.guardar_con_ajuste), así no se
+    pisan las ventas procesadas entre la carga y el envío.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if 'stock' in self.fields and self.instance.pk is not None:
+            self.fields['stock'].show_hidden_initial = True
+
+    def clean(self):
+        datos = super().clean()
+        if 'stock' in self.fields and self.fields['stock'].show_hidden_initial and stock_visto(self) is None:
+            raise forms.ValidationError('Falta el stock con que se abrió el formulario; vuelva a cargarlo.')
+        return datos
+
+
 # ===============================================================
 # FORMULARIO 1: PRODUCTO  → Tabla: tienda_producto
 # ===============================================================
-class ProductoForm(forms.ModelForm):
+class ProductoForm(StockVistoForm):
     """Formulario para crear y editar productos"""
     
     class Meta:
         model = Producto
-        fields = ['nombre', 'descripcion', 'precio_venta', 'stock', 'categoria', 'proveedor', 'activo']
+        fields = ['nombre', 'sku', 'descripcion', 'precio_venta', 'stock', 'categoria', 'proveedor', 'activo']
         
         widgets = {
             'nombre': forms.TextInput(attrs={
                 'class': 'form-control',
                 'placeholder': 'Ingrese el nombre del producto'
             }),
+            'sku': forms.TextInput(attrs={
+                'class': 'form-control',
+                'placeholder': 'Código del producto (opcional)'
+            }),
             'descripcion': forms.Textarea(attrs={
                 'class': 'form-control',
                 'rows': 3,
@@ -53,6 +93,7 @@ class ProductoForm(forms.ModelForm):
 
         labels = {
             'nombre': 'Nombre del Producto',
+            'sku': 'SKU',
             'descripcion': 'Descripción',
             'precio_venta': 'Precio de Venta ($)',
             'stock': 'Cantidad en Stock',
@@ -173,9 +214,12 @@ class VentaForm(forms.ModelForm):
     
     class Meta:
         model = Venta
-        fields = ['cliente', 'producto', 'cantidad']
+        fields = ['sucursal', 'cliente', 'producto', 'cantidad']
         
         widgets = {
+            'sucursal': forms.Select(attrs={
+                'class': 'form-control'
+            }),
             'cliente': forms.Select(attrs={
                 'class': 'form-control'
             }),
@@ -191,11 +235,43 @@ class VentaForm(forms.ModelForm):
         }
 
         labels = {
+            'sucursal': 'Sucursal',
             'cliente': 'Cliente',
             'producto': 'Producto',
             'cantidad': 'Cantidad',
         }
 
+    def __init__(self, *args, sucursal_id=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Los productos desactivados ya no se pueden vender
+        self.fields['producto'].queryset = Producto.objects.filter(activo=True)
+        if sucursal_id is not None:
+            # El empleado de una sucursal vende en la suya, sin elegir
+            del self.fields['sucursal']
+            self.instance.sucursal_id = sucursal_id
+        else:
+            # Oficina central: sin elegir, la venta va a la sucursal principal (Venta.save)
+            self.fields['sucursal'].queryset = Sucursal.objects.filter(activa=True)
+            self.fields['sucursal'].required = False
+
+
+# ===============================================================
+# FORMULARIO 6: AJUSTE MASIVO DE PRECIOS → Tabla: tienda_producto
+# ===============================================================
+class AjustePreciosForm(forms.Form):
+    """Formulario de la acción del admin para ajustar precios en bloque"""
+    TIPOS = (
+        ('porcentaje', 'Porcentaje (%)'),
+        ('monto', 'Monto fijo ($)'),
+    )
+
+    tipo = forms.ChoiceField(label='Tipo de ajuste', choices=TIPOS)
+    valor = forms.DecimalField(
+        label='Valor', max_digits=10, decimal_places=2,
+        help_text='Use valores negativos para bajar precios (ej. -5).',
+    )
+    motivo = forms.CharField(label='Motivo', max_length=200, required=False)
+
 
 class PerfilUsuarioForm(forms.ModelForm):
     class Meta:
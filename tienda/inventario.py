@@ -0,0 +1,139 @@
+# tienda/inventario.py
+# ===============================================================
+# LIBRO DE MOVIMIENTOS DE INVENTARIO
+# Todo cambio de Producto.stock se anota en MovimientoInventario y se
+# aplica a la Existencia de la sucursal (tienda/sucursales.py).
+# El stock en cualquier momento = último CorteInventario + movimientos
+# posteriores al corte, así nunca se suma el libro completo.
+# ===============================================================
+
+from django.db import models, transaction
+from django.db.models import Exists, F, Max, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import contadores, sucursales
+from .models import CorteInventario, MovimientoInventario, Producto
+
+
+def registrar_movimiento(producto, tipo, cantidad, usuario=None, nota='', sucursal_id=None):
+    """
+    Aplica la cantidad al stock y a la existencia de la sucursal (por
+    defecto, la del usuario) y la anota en el libro en una sola transacción.
+    """
+    with transaction.atomic():
+        stock = Producto.objects.select_for_update().values_list('stock', flat=True).get(pk=producto.pk)
+        Producto.objects.filter(pk=producto.pk).update(stock=F('stock') + cantidad, fecha_actualizacion=timezone.now())
+        sucursales.mover_existencias({(sucursal_id or sucursales.para_registrar(usuario), producto.pk): cantidad})
+        if producto.activo:
+            deltas = contadores.nuevos_deltas()
+            contadores.sumar_cambio_stock(deltas, producto.categoria_id, producto.proveedor_id,
+                                          producto.precio_venta, stock, stock + cantidad)
+            contadores.aplicar(deltas)
+        return MovimientoInventario.objects.create(
+            producto=producto, tipo=tipo, cantidad=cantidad, usuario=usuario, nota=nota,
+        )
+
+
+def registrar_ajuste(producto, stock_anterior, usuario=None, nota='Ajuste manual', sucursal_id=None):
+    """
+    Anota el stock con el que se acaba de crear un producto y lo aplica a
+    la existencia de la sucursal (por defecto, la del usuario). Para
+    editar un producto existente usar guardar_con_ajuste().
+    """
+    diferencia = producto.stock - stock_anterior
+    if not diferencia:
+        return None
+    sucursales.mover_existencias({(sucursal_id or sucursales.para_registrar(usuario), producto.pk): diferencia})
+    return MovimientoInventario.objects.create(
+        producto=producto, tipo=MovimientoInventario.AJUSTE, cantidad=diferencia, usuario=usuario, nota=nota,
+    )
+
+
+def guardar_con_ajuste(producto, stock_anterior, guardar, usuario=None, nota='Ajuste manual', sucursal_id=None):
+    """
+    Guarda un producto editado (formulario, API o admin) sin escribir su
+    stock absoluto: con la fila bloqueada se guarda el stock actual y la
+    diferencia con el que vio el usuario (`stock_anterior`) se aplica con
+    registrar_movimiento(). Las ventas descontadas mientras el usuario
+    editaba no se pierden. `guardar` es la función que hace el save().
+    """
+    diferencia = producto.stock - stock_anterior
+    with transaction.atomic():
+        producto.stock = Producto.objects.select_for_update().values_list('stock', flat=True).get(pk=producto.pk)
+        resultado = guardar()
+        if diferencia:
+            registrar_movimiento(producto, MovimientoInventario.AJUSTE, diferencia, usuario, nota, sucursal_id)
+            producto.stock += diferencia
+    return resultado
+
+
+def stock_en(producto, momento=None):
+    """Stock del producto en un momento dado: corte previo + delta desde el corte."""
+    momento = momento or timezone.now()
+    corte = producto.cortes.filter(fecha__lte=momento).order_by('-fecha', '-id').first()
+    base, desde = (corte.stock, corte.ultimo_movimiento_id) if corte else (0, 0)
+    delta = producto.movimientos.filter(id__gt=desde, fecha__lte=momento).aggregate(total=Sum('cantidad'))['total']
+    return base + (delta or 0)
+
+
+def anotar_stock_libro(productos, tope=None):
+    """
+    Anota `stock_libro` (stock según el libro) en un queryset de Producto
+    con dos subconsultas por fila: el último corte y la suma posterior.
+    `tope` limita los movimientos considerados a id <= tope.
+    """
+    cortes = CorteInventario.objects.filter(producto=OuterRef('pk')).order_by('-ultimo_movimiento_id', '-id')
+    productos = productos.annotate(
+        corte_stock=Coalesce(Subquery(cortes.values('stock')[:1]), 0),
+        corte_mov=Coalesce(Subquery(cortes.values('ultimo_movimiento_id')[:1]), 0),
+    )
+
+    movimientos = MovimientoInventario.objects.filter(producto=OuterRef('pk'), id__gt=OuterRef('corte_mov'))
+    if tope is not None:
+        movimientos = movimientos.filter(id__lte=tope)
+    delta = movimientos.order_by().values('producto').annotate(total=Sum('cantidad')).values('total')
+
+    return productos.annotate(
+        stock_libro=models.ExpressionWrapper(
+            F('corte_stock') + Coalesce(Subquery(delta), 0), output_field=models.IntegerField(),
+        ),
+        movimientos_pendientes=Exists(movimientos),
+    )
+
+
+def _por_lotes(queryset, tamano_lote):
+    """Recorre el queryset por llave primaria, un lote por consulta."""
+    ultimo_pk = 0
+    while True:
+        lote = list(queryset.filter(pk__gt=ultimo_pk).order_by('pk')[:tamano_lote])
+        if not lote:
+            return
+        yield lote
+        ultimo_pk = lote[-1].pk
+
+
+def tomar_cortes(tamano_lote=1000):
+    """
+    Crea un corte para cada producto con movimientos desde su último corte.
+    Devuelve cuántos cortes se crearon.
+    """
+    tope = MovimientoInventario.objects.aggregate(maximo=Max('id'))['maximo'] or 0
+    ahora = timezone.now()
+    creados = 0
+    for lote in _por_lotes(anotar_stock_libro(Producto.objects.all(), tope), tamano_lote):
+        cortes = [
+            CorteInventario(producto=p, stock=p.stock_libro, ultimo_movimiento_id=tope, fecha=ahora)
+            for p in lote if p.movimientos_pendientes
+        ]
+        CorteInventario.objects.bulk_create(cortes)
+        creados += len(cortes)
+    return creados
+
+
+def conciliar(tamano_lote=1000):
+    """Genera los productos cuyo Producto.stock no coincide con el libro."""
+    for lote in _por_lotes(anotar_stock_libro(Producto.objects.all()), tamano_lote):
+        for producto in lote:
+            if producto.stock != producto.stock_libro:
+                yield producto
@@ -0,0 +1,92 @@
+# tienda/limites.py
+# ===============================================================
+# LÍMITE DE INTENTOS DE LOGIN (CONTADORES ATÓMICOS EN LA CACHÉ)
+# Cada IP y cada nombre de usuario tienen su cupo: cada intento
+# reserva un lugar con cache.incr() antes de verificar la contraseña,
+# así las peticiones concurrentes no pueden leer el mismo saldo y
+# pasar todas. El cupo se cuenta por ventana de capacidad × segundos
+# por intento, sumando la ventana anterior con el peso de lo que
+# falta (ventana deslizante): se recupera un intento cada
+# LOGIN_SEGUNDOS_POR_INTENTO. Con el cupo agotado el intento se
+# rechaza sin llegar a PBKDF2.
+# ===============================================================
+
+import hashlib
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+def _cupos(request, username):
+    """(clave en la caché, capacidad) del cupo de la IP y el del usuario."""
+    ip = request.META.get('REMOTE_ADDR', '')
+    # El username se resume para que la clave sea válida en cualquier backend de caché
+    usuario = hashlib.sha256(username.strip().lower().encode()).hexdigest()
+    return (
+        (f"login:ip:{ip}", settings.LOGIN_INTENTOS_POR_IP),
+        (f"login:usuario:{usuario}", settings.LOGIN_INTENTOS_POR_USUARIO),
+    )
+
+
+def _ventana(clave, capacidad, ahora):
+    """(duración, clave de la ventana actual, clave de la anterior, fracción transcurrida)."""
+    duracion = capacidad * settings.LOGIN_SEGUNDOS_POR_INTENTO
+    numero = int(ahora // duracion)
+    return duracion, f"{clave}:{numero}", f"{clave}:{numero - 1}", (ahora % duracion) / duracion
+
+
+def _devolver(clave):
+    try:
+        cache.decr(clave)
+    except ValueError:
+        pass  # La ventana ya expiró
+
+
+def _espera(exceso, actual, previo, duracion, transcurrido):
+    """Segundos hasta que la estimación baje `exceso` intentos."""
+    restante = duracion * (1 - transcurrido)
+    # En lo que queda de la ventana se descuenta la anterior; después, la actual
+    recuperable = previo * (1 - transcurrido)
+    if previo and exceso <= recuperable:
+        return exceso * duracion / previo
+    return restante + (exceso - recuperable) * duracion / max(actual, 1)
+
+
+def reservar_intento(request, username):
+    """
+    Reserva un intento en el cupo de la IP y en el del usuario. Devuelve 0
+    si se permite, o los segundos que faltan (y no reserva nada).
+    """
+    ahora = time.time()
+    reservadas = []
+    for clave, capacidad in _cupos(request, username):
+        duracion, actual_clave, previa_clave, transcurrido = _ventana(clave, capacidad, ahora)
+        # La anterior se sigue leyendo durante toda la ventana actual
+        cache.add(actual_clave, 0, timeout=math.ceil(2 * duracion))
+        try:
+            actual = cache.incr(actual_clave)
+        except ValueError:  # Desalojada entre add() e incr()
+            cache.set(actual_clave, 1, timeout=math.ceil(2 * duracion))
+            actual = 1
+        reservadas.append(actual_clave)
+        previo = cache.get(previa_clave, 0)
+        exceso = actual + previo * (1 - transcurrido) - capacidad
+        if exceso > 0:
+            for reservada in reservadas:
+                _devolver(reservada)
+            return math.ceil(_espera(exceso, actual - 1, previo, duracion, transcurrido))
+    return 0
+
+
+def registrar_exito(request, username):
+    """
+    Un login correcto no gasta el cupo de la IP y vacía el historial de
+    fallos del usuario. Un fallo deja reservado su intento.
+    """
+    ahora = time.time()
+    (ip_clave, ip_capacidad), (usuario_clave, usuario_capacidad) = _cupos(request, username)
+    _devolver(_ventana(ip_clave, ip_capacidad, ahora)[1])
+    _, actual_clave, previa_clave, _ = _ventana(usuario_clave, usuario_capacidad, ahora)
+    cache.delete_many([actual_clave, previa_clave])
@@ -0,0 +1,162 @@
+# tienda/lote_ventas.py
+# ===============================================================
+# CARGA POR LOTES DE VENTAS CAPTURADAS SIN CONEXIÓN
+# Cada venta trae una clave de idempotencia generada por el terminal
+# (índice único en tienda_venta), así reenviar un lote es seguro.
+# Todo el lote se valida con unas cuantas consultas por conjunto y se
+# inserta con bulk_create en una sola transacción, junto con sus
+# eventos de la bandeja de salida.
+# ===============================================================
+
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Cliente, EventoVenta, Producto, Venta
+
+MAXIMO_VENTAS_POR_LOTE = 500
+
+CREADA = 'creada'
+DUPLICADA = 'duplicada'
+ERROR = 'error'
+
+
+def _validar_item(item):
+    """Validación de forma de un elemento. Devuelve (datos, errores)."""
+    if not isinstance(item, dict):
+        return None, {'venta': 'Debe ser un objeto.'}
+
+    errores = {}
+    clave = item.get('clave')
+    if not isinstance(clave, str) or not 0 < len(clave) <= 64:
+        errores['clave'] = 'Requerida, de 1 a 64 caracteres.'
+    for campo in ('cliente', 'producto'):
+        if not isinstance(item.get(campo), int) or isinstance(item.get(campo), bool):
+            errores[campo] = 'Debe ser un id entero.'
+    cantidad = item.get('cantidad', 1)
+    if not isinstance(cantidad, int) or isinstance(cantidad, bool) or cantidad < 1:
+        errores['cantidad'] = 'Debe ser un entero mayor que 0.'
+
+    fecha = timezone.now()
+    if item.get('fecha_venta') is not None:
+        try:
+            fecha = parse_datetime(str(item['fecha_venta']))
+        except ValueError:
+            fecha = None
+        if fecha is None:
+            errores['fecha_venta'] = 'Fecha y hora inválida (ISO 8601).'
+        else:
+            if timezone.is_naive(fecha):
+                fecha = timezone.make_aware(fecha)
+            if fecha > timezone.now() + timedelta(minutes=5):
+                errores['fecha_venta'] = 'No puede estar en el futuro.'
+
+    if errores:
+        return None, errores
+    return {'clave': clave, 'cliente': item['cliente'], 'producto': item['producto'],
+            'cantidad': cantidad, 'fecha_venta': fecha}, None
+
+
+def _insertar(pendientes, vendedor, sucursal_id, productos):
+    """Inserta ventas y eventos; devuelve {clave: venta_id}."""
+    ventas = []
+    for datos in pendientes:
+        producto = productos[datos['producto']]
+        ventas.append(Venta(
+            cliente_id=datos['cliente'],
+            vendedor=vendedor,
+            sucursal_id=sucursal_id,
+            producto=producto,
+            producto_nombre=producto.nombre,
+            producto_sku=producto.sku or '',
+            cantidad=datos['cantidad'],
+            precio_unitario=producto.precio_venta,
+            total=datos['cantidad'] * producto.precio_venta,
+            fecha_venta=datos['fecha_venta'],
+            clave_idempotencia=datos['clave'],
+        ))
+
+    with transaction.atomic():
+        Venta.objects.bulk_create(ventas, batch_size=MAXIMO_VENTAS_POR_LOTE)
+        # MySQL no devuelve los ids de bulk_create; se leen por la clave (índice único)
+        ids = dict(Venta.objects.filter(
+            clave_idempotencia__in=[v.clave_idempotencia for v in ventas],
+        ).values_list('clave_idempotencia', 'id'))
+        for venta in ventas:
+            venta.id = ids[venta.clave_idempotencia]
+        EventoVenta.objects.bulk_create(
+            [EventoVenta(tipo=EventoVenta.VENTA_CREADA, payload=venta.payload_evento()) for venta in ventas],
+            batch_size=MAXIMO_VENTAS_POR_LOTE,
+        )
+    return ids
+
+
+def registrar_lote(items, vendedor, sucursal_id):
+    """
+    Registra las ventas del lote en la sucursal y devuelve un resultado por
+    elemento, en el mismo orden: {'clave', 'estado', 'venta_id' | 'errores'}.
+    """
+    resultados = [None] * len(items)
+    validos = {}  # posición -> datos
+    for posicion, item in enumerate(items):
+        datos, errores = _validar_item(item)
+        if errores:
+            clave = item.get('clave') if isinstance(item, dict) else None
+            resultados[posicion] = {'clave': clave, 'estado': ERROR, 'errores': errores}
+        else:
+            validos[posicion] = datos
+
+    # Consultas por conjunto: clientes, productos activos y claves ya registradas
+    clientes = set(Cliente.objects.filter(
+        pk__in={d['cliente'] for d in validos.values()},
+    ).values_list('pk', flat=True))
+    productos = Producto.objects.filter(
+        pk__in={d['producto'] for d in validos.values()}, activo=True,
+    ).in_bulk()
+
+    for intento in range(2):
+        existentes = dict(Venta.objects.filter(
+            clave_idempotencia__in={d['clave'] for d in validos.values()},
+        ).values_list('clave_idempotencia', 'id'))
+
+        pendientes, vistas, repetidas = [], set(), []
+        for posicion, datos in validos.items():
+            clave = datos['clave']
+            if clave in existentes:
+                resultados[posicion] = {'clave': clave, 'estado': DUPLICADA, 'venta_id': existentes[clave]}
+                continue
+            if clave in vistas:
+                # Repetida dentro del mismo lote: se informa con el id de la primera
+                repetidas.append(posicion)
+                continue
+            errores = {}
+            if datos['cliente'] not in clientes:
+                errores['cliente'] = 'No existe.'
+            if datos['producto'] not in productos:
+                errores['producto'] = 'No existe o está desactivado.'
+            if errores:
+                resultados[posicion] = {'clave': clave, 'estado': ERROR, 'errores': errores}
+                continue
+            vistas.add(clave)
+            pendientes.append((posicion, datos))
+
+        if not pendientes:
+            break
+        try:
+            ids = _insertar([datos for _, datos in pendientes], vendedor, sucursal_id, productos)
+        except IntegrityError:
+            # Otra petición registró alguna de las claves entre la consulta y el INSERT;
+            # se repite una vez y esas claves saldrán como duplicadas
+            if intento:
+                raise
+            continue
+        for posicion, datos in pendientes:
+            resultados[posicion] = {'clave': datos['clave'], 'estado': CREADA, 'venta_id': ids[datos['clave']]}
+        for posicion in repetidas:
+            clave = validos[posicion]['clave']
+            resultados[posicion] = {'clave': clave, 'estado': DUPLICADA, 'venta_id': ids.get(clave)}
+        break
+
+    return resultados
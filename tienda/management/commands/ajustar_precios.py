@@ -0,0 +1,41 @@
+# tienda/management/commands/ajustar_precios.py
+# Ejecutar con: python manage.py ajustar_precios --porcentaje 5 --categoria 3
+#           o:  python manage.py ajustar_precios --monto -10 --proveedor 2
+
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tienda.models import Categoria, Proveedor
+from tienda.precios import MONTO, PORCENTAJE, ajustar_precios, filtrar_productos
+
+
+class Command(BaseCommand):
+    help = 'Ajusta en bloque los precios de venta por categoría y/o proveedor.'
+
+    def add_arguments(self, parser):
+        ajuste = parser.add_mutually_exclusive_group(required=True)
+        ajuste.add_argument('--porcentaje', help='Cambio porcentual (ej. 5 o -10).')
+        ajuste.add_argument('--monto', help='Cambio en pesos (ej. 20 o -15.50).')
+        parser.add_argument('--categoria', type=int, help='ID de la categoría.')
+        parser.add_argument('--proveedor', type=int, help='ID del proveedor.')
+        parser.add_argument('--motivo', default='', help='Motivo que se guarda en el historial.')
+
+    def handle(self, *args, **options):
+        try:
+            categoria = Categoria.objects.get(pk=options['categoria']) if options['categoria'] else None
+            proveedor = Proveedor.objects.get(pk=options['proveedor']) if options['proveedor'] else None
+        except (Categoria.DoesNotExist, Proveedor.DoesNotExist) as exc:
+            raise CommandError(str(exc))
+
+        tipo, texto = (PORCENTAJE, options['porcentaje']) if options['porcentaje'] is not None else (MONTO, options['monto'])
+        try:
+            valor = Decimal(texto)
+        except InvalidOperation:
+            valor = None
+        if valor is None or not valor.is_finite():
+            raise CommandError(f"Valor inválido para --{tipo}: '{texto}' (use un número, ej. 5 o -10.50)")
+
+        productos = filtrar_productos(categoria=categoria, proveedor=proveedor)
+        cambiados = ajustar_precios(productos, tipo, valor, motivo=options['motivo'])
+        self.stdout.write(self.style.SUCCESS(f"✅ Precios actualizados: {cambiados} productos"))
@@ -0,0 +1,18 @@
+# tienda/management/commands/archivar_ventas.py
+# Ejecutar (p. ej. cada noche) con: python manage.py archivar_ventas [--dias 365] [--lote 1000]
+
+from django.core.management.base import BaseCommand
+
+from tienda.archivo import archivar_ventas
+
+
+class Command(BaseCommand):
+    help = 'Mueve por lotes las ventas antiguas de tienda_venta a tienda_ventaarchivo.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, help='Antigüedad mínima (por defecto settings.VENTAS_DIAS_ARCHIVO).')
+        parser.add_argument('--lote', type=int, default=1000, help='Ventas por transacción.')
+
+    def handle(self, *args, **options):
+        archivadas = archivar_ventas(options['dias'], options['lote'])
+        self.stdout.write(self.style.SUCCESS(f"✅ {archivadas} ventas archivadas"))
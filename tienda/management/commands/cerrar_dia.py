@@ -0,0 +1,34 @@
+# tienda/management/commands/cerrar_dia.py
+# Ejecutar al cierre con: python manage.py cerrar_dia [--fecha AAAA-MM-DD]
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from tienda import tareas
+from tienda.reportes import cerrar_dia, ruta_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Guarda el reporte de ventas del día como HTML y JSON comprimidos y encola sus recibos y el pronóstico de pedidos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fecha', help='Día a cerrar (por defecto, hoy).')
+
+    def handle(self, *args, **options):
+        fecha = timezone.localdate()
+        if options['fecha']:
+            try:
+                fecha = parse_date(options['fecha'])
+            except ValueError:
+                fecha = None
+            if fecha is None:
+                raise CommandError(f"Fecha inválida: '{options['fecha']}' (use AAAA-MM-DD)")
+
+        datos = cerrar_dia(fecha)
+        # Los recibos y el pronóstico de pedidos se generan en el worker, fuera del cierre
+        tareas.encolar('generar_recibos', fecha=fecha.isoformat())
+        tareas.encolar('pronosticar_pedidos', fecha=fecha.isoformat())
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Día {fecha:%d/%m/%Y} cerrado: {datos['cantidad_ventas']} ventas → {ruta_snapshot(fecha, 'html')} (recibos y pedidos en la cola de tareas)"
+        ))
@@ -0,0 +1,25 @@
+# tienda/management/commands/conciliar_inventario.py
+# Ejecutar con: python manage.py conciliar_inventario [--lote 1000]
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tienda.inventario import conciliar
+
+
+class Command(BaseCommand):
+    help = 'Verifica por lotes que Producto.stock coincida con el libro de inventario.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=1000, help='Productos por consulta.')
+
+    def handle(self, *args, **options):
+        diferencias = 0
+        for producto in conciliar(options['lote']):
+            diferencias += 1
+            self.stdout.write(
+                f"⚠️ #{producto.pk} {producto.nombre}: stock={producto.stock} libro={producto.stock_libro}"
+            )
+
+        if diferencias:
+            raise CommandError(f"{diferencias} productos no coinciden con el libro de inventario.")
+        self.stdout.write(self.style.SUCCESS('✅ El stock coincide con el libro de inventario'))
@@ -0,0 +1,52 @@
+# tienda/management/commands/consultas_lentas.py
+# Ejecutar con: python manage.py consultas_lentas [--top 10] [--vista venta_lista] [--explain]
+
+import re
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+
+from tienda.consultas_lentas import leer_registros
+
+
+def normalizar(sql):
+    """Agrupa consultas que solo difieren en la cantidad de valores de un IN (...)."""
+    return re.sub(r'IN \((?:%s, )*%s\)', 'IN (...)', ' '.join(sql.split()))
+
+
+class Command(BaseCommand):
+    help = 'Resume el registro de consultas lentas: las que más tiempo acumulan por vista.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=10, help='Cuántas consultas mostrar.')
+        parser.add_argument('--vista', help='Solo las consultas de esta vista (nombre de URL).')
+        parser.add_argument('--explain', action='store_true', help='Muestra el EXPLAIN de la ejecución más lenta.')
+
+    def handle(self, *args, **options):
+        grupos = defaultdict(lambda: {'veces': 0, 'total': 0.0, 'peor': None})
+        for registro in leer_registros():
+            if options['vista'] and registro.get('vista') != options['vista']:
+                continue
+            grupo = grupos[(registro.get('vista'), normalizar(registro['sql']))]
+            grupo['veces'] += 1
+            grupo['total'] += registro['ms']
+            if grupo['peor'] is None or registro['ms'] > grupo['peor']['ms']:
+                grupo['peor'] = registro
+
+        if not grupos:
+            self.stdout.write(self.style.SUCCESS('✅ No hay consultas lentas registradas'))
+            return
+
+        peores = sorted(grupos.items(), key=lambda item: item[1]['total'], reverse=True)[:options['top']]
+        for posicion, ((vista, sql), grupo) in enumerate(peores, start=1):
+            peor = grupo['peor']
+            self.stdout.write(self.style.WARNING(
+                f"#{posicion} {vista or 'sin vista'} — {grupo['veces']} veces, "
+                f"total {grupo['total']:.0f} ms, promedio {grupo['total'] / grupo['veces']:.0f} ms, "
+                f"máximo {peor['ms']:.0f} ms"
+            ))
+            self.stdout.write(f"   Origen: {peor.get('origen') or 'fuera de tienda'}")
+            self.stdout.write(f"   SQL: {sql}")
+            if options['explain'] and peor.get('explain'):
+                for fila in peor['explain']:
+                    self.stdout.write(f"   EXPLAIN: {' | '.join(str(valor) for valor in fila)}")
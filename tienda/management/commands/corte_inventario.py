@@ -0,0 +1,17 @@
+# tienda/management/commands/corte_inventario.py
+# Ejecutar (p. ej. cada noche) con: python manage.py corte_inventario [--lote 1000]
+
+from django.core.management.base import BaseCommand
+
+from tienda.inventario import tomar_cortes
+
+
+class Command(BaseCommand):
+    help = 'Guarda un corte de inventario por producto para acotar la reconstrucción del stock.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=1000, help='Productos por consulta.')
+
+    def handle(self, *args, **options):
+        creados = tomar_cortes(options['lote'])
+        self.stdout.write(self.style.SUCCESS(f"✅ {creados} cortes de inventario creados"))
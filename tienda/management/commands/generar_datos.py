@@ -0,0 +1,84 @@
+# tienda/management/commands/generar_datos.py
+# Ejecutar con: python manage.py generar_datos [--ventas 1000000] [--procesos 4] [--semilla 2024]
+#
+# Datos sintéticos para pruebas de capacidad. No usar en producción: las
+# ventas se insertan con bulk_create, sin registrar eventos; al final se
+# anotan en el libro de inventario y se descuentan del stock.
+
+import secrets
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Max
+
+from tienda import datos_sinteticos
+from tienda.models import Cliente, Producto, Venta
+
+
+class Command(BaseCommand):
+    help = 'Genera categorías, proveedores, productos, clientes, empleados y ventas sintéticas por lotes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--categorias', type=int, default=20)
+        parser.add_argument('--proveedores', type=int, default=50)
+        parser.add_argument('--productos', type=int, default=5000)
+        parser.add_argument('--clientes', type=int, default=50000)
+        parser.add_argument('--empleados', type=int, default=30)
+        parser.add_argument('--ventas', type=int, default=1000000)
+        parser.add_argument('--dias', type=int, default=730, help='Días hacia atrás en que se reparten las ventas.')
+        parser.add_argument('--lote', type=int, default=datos_sinteticos.TAMANO_LOTE,
+                            help='Filas por bulk_create.')
+        parser.add_argument('--procesos', type=int, default=1,
+                            help='Procesos para productos, clientes y ventas (ignorado en SQLite).')
+        parser.add_argument('--semilla', type=int, default=2024, help='Misma semilla, mismos datos.')
+        parser.add_argument('--prefijo', default=None,
+                            help='Marca de nombres, SKU y correos para no chocar con otra corrida (por defecto, aleatoria).')
+        parser.add_argument('--password', default='demo12345', help='Contraseña de los empleados generados.')
+
+    def handle(self, *args, **options):
+        if options['dias'] < 1 or options['lote'] < 1:
+            raise CommandError('--dias y --lote deben ser mayores que cero.')
+
+        procesos = max(options['procesos'], 1)
+        if procesos > 1 and connection.vendor == 'sqlite':
+            # SQLite bloquea la base completa en cada escritura: varios procesos solo se estorban
+            self.stdout.write(self.style.WARNING('⚠️ SQLite no admite escrituras en paralelo; se usa un solo proceso'))
+            procesos = 1
+
+        opciones = {
+            'prefijo': options['prefijo'] or secrets.token_hex(3),
+            'semilla': options['semilla'],
+            'dias': options['dias'],
+            'lote': options['lote'],
+            'password': options['password'],
+        }
+        self.stdout.write(f"Prefijo de esta corrida: {opciones['prefijo']}")
+
+        resumen = {}
+        desde_venta_id = None
+        for tabla in ('categorias', 'proveedores', 'empleados', 'productos', 'clientes', 'ventas'):
+            cantidad = options[tabla]
+            if not cantidad:
+                continue
+            if tabla == 'ventas':
+                if not (Producto.objects.filter(activo=True).exists() and Cliente.objects.exists()):
+                    raise CommandError('Para generar ventas se necesitan productos activos y clientes.')
+                desde_venta_id = Venta.objects.aggregate(maximo=Max('id'))['maximo'] or 0
+            inicio = time.monotonic()
+            if tabla == 'empleados':
+                filas = datos_sinteticos.generar_empleados(cantidad, opciones)
+            else:
+                en_paralelo = procesos if tabla in ('productos', 'clientes', 'ventas') else 1
+                filas, parcial = datos_sinteticos.generar_tabla(tabla, cantidad, opciones, en_paralelo)
+                if tabla == 'ventas':
+                    resumen = parcial
+            segundos = time.monotonic() - inicio
+            self.stdout.write(f"  {tabla}: {filas} filas en {segundos:.1f} s ({filas / max(segundos, 0.001):,.0f} filas/s)")
+
+        datos_sinteticos.guardar_resumen(resumen)
+        datos_sinteticos.terminar(desde_venta_id, options['lote'])
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Datos generados; resumen diario actualizado en {len(resumen)} días, "
+            f"libro de inventario completo y contadores recalculados"
+        ))
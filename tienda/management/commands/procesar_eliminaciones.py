@@ -0,0 +1,17 @@
+# tienda/management/commands/procesar_eliminaciones.py
+# Ejecutar con: python manage.py procesar_eliminaciones [--lote 500]
+
+from django.core.management.base import BaseCommand
+
+from tienda.eliminaciones import procesar_pendientes
+
+
+class Command(BaseCommand):
+    help = 'Ejecuta por lotes las eliminaciones de categorías y proveedores programadas desde la web.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=500, help='Filas por transacción.')
+
+    def handle(self, *args, **options):
+        terminadas = procesar_pendientes(options['lote'])
+        self.stdout.write(self.style.SUCCESS(f"✅ {terminadas} eliminaciones completadas"))
@@ -0,0 +1,33 @@
+# tienda/management/commands/procesar_eventos.py
+# Ejecutar con: python manage.py procesar_eventos [--lote 500] [--consumidor stock] [--continuo]
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tienda.eventos import CONSUMIDORES, procesar_pendientes
+
+
+class Command(BaseCommand):
+    help = 'Procesa por lotes los eventos de venta pendientes de cada consumidor.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=500, help='Eventos por transacción.')
+        parser.add_argument('--consumidor', action='append', help='Procesar solo este consumidor (repetible).')
+        parser.add_argument('--continuo', action='store_true', help='No terminar; revisar la cola periódicamente.')
+        parser.add_argument('--intervalo', type=float, default=2.0, help='Segundos de espera en modo continuo.')
+
+    def handle(self, *args, **options):
+        nombres = options['consumidor'] or sorted(CONSUMIDORES)
+        for nombre in nombres:
+            if nombre not in CONSUMIDORES:
+                raise CommandError(f"Consumidor desconocido: '{nombre}'")
+
+        while True:
+            for nombre in nombres:
+                procesados = procesar_pendientes(nombre, options['lote'])
+                if procesados:
+                    self.stdout.write(f"✅ {nombre}: {procesados} eventos procesados")
+            if not options['continuo']:
+                break
+            time.sleep(options['intervalo'])
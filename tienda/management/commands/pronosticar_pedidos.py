@@ -0,0 +1,32 @@
+# tienda/management/commands/pronosticar_pedidos.py
+# Ejecutar (cerrar_dia ya lo encola cada noche) con: python manage.py pronosticar_pedidos [--fecha AAAA-MM-DD] [--dias 28]
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from tienda import pronostico
+
+
+class Command(BaseCommand):
+    help = 'Calcula las cantidades sugeridas de pedido por producto según su velocidad de venta.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fecha', help='Último día de ventas a considerar (por defecto, hoy).')
+        parser.add_argument('--dias', type=int, help='Días de historia (por defecto settings.PEDIDOS_DIAS_HISTORIA).')
+
+    def handle(self, *args, **options):
+        fecha = timezone.localdate()
+        if options['fecha']:
+            try:
+                fecha = parse_date(options['fecha'])
+            except ValueError:
+                fecha = None
+            if fecha is None:
+                raise CommandError(f"Fecha inválida: '{options['fecha']}' (use AAAA-MM-DD)")
+
+        sugerencias = pronostico.generar(fecha, options['dias'])
+        motor = 'NumPy' if pronostico.np is not None else 'Python'
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {sugerencias} productos por reabastecer al {fecha:%d/%m/%Y} (cálculo con {motor})"
+        ))
@@ -0,0 +1,34 @@
+# tienda/management/commands/reparar_contadores.py
+# Ejecutar con: python manage.py reparar_contadores [--solo-revisar]
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tienda.contadores import descuadres, recalcular
+
+
+class Command(BaseCommand):
+    help = 'Recalcula los contadores de productos activos, valor en stock y stock bajo de categorías y proveedores.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--solo-revisar', action='store_true',
+                            help='Solo reporta los contadores que no coinciden, sin corregirlos.')
+
+    def handle(self, *args, **options):
+        diferencias = 0
+        for objeto in descuadres():
+            diferencias += 1
+            self.stdout.write(
+                f"⚠️ {objeto._meta.verbose_name} #{objeto.pk} {objeto.nombre}: "
+                f"productos={objeto.productos_activos}/{objeto.productos_reales} "
+                f"valor={objeto.valor_stock}/{objeto.valor_real} "
+                f"stock_bajo={objeto.productos_stock_bajo}/{objeto.stock_bajo_real}"
+            )
+
+        if options['solo_revisar']:
+            if diferencias:
+                raise CommandError(f"{diferencias} contadores no coinciden con los productos.")
+            self.stdout.write(self.style.SUCCESS('✅ Los contadores coinciden con los productos'))
+            return
+
+        filas = recalcular()
+        self.stdout.write(self.style.SUCCESS(f"✅ {filas} contadores recalculados ({diferencias} estaban descuadrados)"))
@@ -0,0 +1,34 @@
+# tienda/management/commands/worker.py
+# Ejecutar con: python manage.py worker [--hilos 4] [--espera 2] [--una-vez]
+
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from tienda import tareas
+
+
+class Command(BaseCommand):
+    help = 'Ejecuta las tareas en segundo plano de tienda_tarea con un pool de hilos y reintentos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hilos', type=int, default=4, help='Tareas que se ejecutan a la vez.')
+        parser.add_argument('--espera', type=float, default=2.0,
+                            help='Segundos entre revisiones de la cola cuando está vacía.')
+        parser.add_argument('--una-vez', action='store_true',
+                            help='Termina cuando la cola queda vacía (para cron o pruebas).')
+
+    def handle(self, *args, **options):
+        detener = threading.Event()
+
+        def al_recibir_senal(numero, marco):
+            self.stdout.write('Deteniendo: se terminan las tareas en curso...')
+            detener.set()
+
+        signal.signal(signal.SIGINT, al_recibir_senal)
+        signal.signal(signal.SIGTERM, al_recibir_senal)
+
+        self.stdout.write(f"Worker {tareas.nombre_trabajador()} con {options['hilos']} hilos")
+        ejecutadas = tareas.trabajar(max(options['hilos'], 1), options['espera'], options['una_vez'], detener)
+        self.stdout.write(self.style.SUCCESS(f"✅ {ejecutadas} tareas ejecutadas"))
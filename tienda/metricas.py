@@ -0,0 +1,194 @@
+# tienda/metricas.py
+# ===============================================================
+# MÉTRICAS EN FORMATO DE TEXTO DE PROMETHEUS (/metrics)
+# Contadores e histogramas en memoria del proceso, protegidos con un
+# candado, para latencia de peticiones, consultas SQL y aciertos de la
+# caché. Las métricas de negocio se leen de tablas ya resumidas
+# (ResumenVentasDia y los contadores de Categoria), nunca con un
+# COUNT(*) sobre Venta o Producto en cada lectura.
+# Con varios procesos cada uno expone sus propios contadores; Prometheus
+# los distingue por la etiqueta `instance` de cada worker.
+# ===============================================================
+
+import functools
+import math
+import threading
+from collections import defaultdict
+
+from django.db.models import Max, Sum
+from django.utils import timezone
+
+from .models import Categoria, EventoVenta, PuntoControl, ResumenVentasDia
+
+# Segundos; cubren desde una respuesta de caché hasta un reporte pesado
+LIMITES_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+REGISTRO = []
+_lectura = threading.local()
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _formatear(nombre, etiquetas, valor):
+    if etiquetas:
+        pares = ','.join(f'{clave}="{_escapar(dato)}"' for clave, dato in etiquetas)
+        nombre = f"{nombre}{{{pares}}}"
+    return f"{nombre} {valor}"
+
+
+class Contador:
+    tipo = 'counter'
+
+    def __init__(self, nombre, ayuda):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self._valores = defaultdict(float)
+        self._candado = threading.Lock()
+        REGISTRO.append(self)
+
+    def inc(self, cantidad=1, **etiquetas):
+        clave = tuple(sorted(etiquetas.items()))
+        with self._candado:
+            self._valores[clave] += cantidad
+
+    def valor(self, **etiquetas):
+        with self._candado:
+            return self._valores.get(tuple(sorted(etiquetas.items())), 0)
+
+    def lineas(self):
+        with self._candado:
+            valores = list(self._valores.items())
+        for etiquetas, valor in valores:
+            yield _formatear(self.nombre, etiquetas, valor)
+
+
+class Histograma:
+    tipo = 'histogram'
+
+    def __init__(self, nombre, ayuda, limites=LIMITES_LATENCIA):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.limites = tuple(limites) + (math.inf,)
+        # etiquetas -> [conteo por cubeta..., suma, total]
+        self._series = {}
+        self._candado = threading.Lock()
+        REGISTRO.append(self)
+
+    def observar(self, valor, **etiquetas):
+        clave = tuple(sorted(etiquetas.items()))
+        with self._candado:
+            serie = self._series.setdefault(clave, [0] * len(self.limites) + [0.0, 0])
+            for posicion, limite in enumerate(self.limites):
+                if valor <= limite:
+                    serie[posicion] += 1
+                    break
+            serie[-2] += valor
+            serie[-1] += 1
+
+    def lineas(self):
+        with self._candado:
+            series = [(etiquetas, list(serie)) for etiquetas, serie in self._series.items()]
+        for etiquetas, serie in series:
+            acumulado = 0
+            for limite, conteo in zip(self.limites, serie):
+                acumulado += conteo
+                le = '+Inf' if math.isinf(limite) else limite
+                yield _formatear(f"{self.nombre}_bucket", etiquetas + (('le', le),), acumulado)
+            yield _formatear(f"{self.nombre}_sum", etiquetas, serie[-2])
+            yield _formatear(f"{self.nombre}_count", etiquetas, serie[-1])
+
+
+class Medidor:
+    """Valor calculado al leer las métricas: `funcion` devuelve [(etiquetas, valor)]."""
+    tipo = 'gauge'
+
+    def __init__(self, nombre, ayuda, funcion):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.funcion = funcion
+        REGISTRO.append(self)
+
+    def lineas(self):
+        for etiquetas, valor in self.funcion():
+            yield _formatear(self.nombre, tuple(sorted(etiquetas.items())), valor)
+
+
+def por_lectura(funcion):
+    """Calcula el valor una sola vez por lectura de /metrics aunque lo usen varios medidores."""
+    @functools.wraps(funcion)
+    def envoltura():
+        valores = getattr(_lectura, 'valores', None)
+        if valores is None:
+            return funcion()
+        if funcion not in valores:
+            valores[funcion] = funcion()
+        return valores[funcion]
+    return envoltura
+
+
+def exponer():
+    """Todas las métricas registradas en el formato de texto de Prometheus."""
+    lineas = []
+    _lectura.valores = {}
+    try:
+        for metrica in REGISTRO:
+            lineas.append(f"# HELP {metrica.nombre} {metrica.ayuda}")
+            lineas.append(f"# TYPE {metrica.nombre} {metrica.tipo}")
+            lineas.extend(metrica.lineas())
+    finally:
+        del _lectura.valores
+    return '\n'.join(lineas) + '\n'
+
+
+# ===============================================================
+# MÉTRICAS DE EJECUCIÓN (las alimentan MetricasMiddleware y la caché)
+# ===============================================================
+PETICIONES = Contador('tienda_peticiones_total', 'Peticiones atendidas por vista, método y código de estado.')
+DURACION = Histograma('tienda_peticion_duracion_segundos', 'Latencia de las peticiones por vista.')
+CONSULTAS_DB = Contador('tienda_consultas_db_total', 'Consultas SQL ejecutadas por vista.')
+CACHE_CONSULTAS = Contador('tienda_cache_consultas_total', 'Lecturas de la caché por resultado (acierto o fallo).')
+
+
+def _proporcion_aciertos():
+    aciertos = CACHE_CONSULTAS.valor(resultado='acierto')
+    total = aciertos + CACHE_CONSULTAS.valor(resultado='fallo')
+    return [({}, aciertos / total if total else 0)]
+
+
+Medidor('tienda_cache_aciertos_ratio', 'Proporción de lecturas de la caché que encontraron el valor.', _proporcion_aciertos)
+Medidor('tienda_proceso_hilos', 'Hilos vivos en el proceso.', lambda: [({}, threading.active_count())])
+
+
+# ===============================================================
+# MÉTRICAS DE NEGOCIO (lecturas de tablas pequeñas ya resumidas)
+# ===============================================================
+@por_lectura
+def _resumen_hoy():
+    resumen = ResumenVentasDia.objects.filter(fecha=timezone.localdate()).values('ventas', 'ingresos').first()
+    return resumen or {'ventas': 0, 'ingresos': 0}
+
+
+@por_lectura
+def _inventario():
+    return Categoria.objects.aggregate(
+        activos=Sum('productos_activos'), stock_bajo=Sum('productos_stock_bajo'), valor=Sum('valor_stock'),
+    )
+
+
+def _eventos_pendientes():
+    ultimo = EventoVenta.objects.aggregate(maximo=Max('id'))['maximo'] or 0
+    return [
+        ({'consumidor': consumidor}, ultimo - avance)
+        for consumidor, avance in PuntoControl.objects.values_list('consumidor', 'ultimo_evento_id')
+    ]
+
+
+Medidor('tienda_ventas_hoy', 'Ventas registradas hoy (hora local).', lambda: [({}, _resumen_hoy()['ventas'])])
+Medidor('tienda_ingresos_hoy', 'Importe vendido hoy (hora local).', lambda: [({}, _resumen_hoy()['ingresos'])])
+Medidor('tienda_productos_activos', 'Productos activos.', lambda: [({}, _inventario()['activos'] or 0)])
+Medidor('tienda_productos_stock_bajo', 'Productos activos con menos de 10 unidades.',
+        lambda: [({}, _inventario()['stock_bajo'] or 0)])
+Medidor('tienda_valor_inventario', 'Valor del stock de los productos activos.', lambda: [({}, _inventario()['valor'] or 0)])
+Medidor('tienda_eventos_pendientes', 'Eventos de venta que cada consumidor aún no procesa.', _eventos_pendientes)
@@ -0,0 +1,85 @@
+# tienda/middleware.py
+# ===============================================================
+# MIDDLEWARE DE LA APP TIENDA (se activan en settings.MIDDLEWARE)
+# ===============================================================
+
+import random
+import re
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+from . import metricas, perfilador
+from .consultas_lentas import RegistroConsultasLentas
+
+
+class MetricasMiddleware:
+    """Latencia, peticiones y consultas SQL por vista para /metrics (ver tienda/metricas.py)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        consultas = [0]
+
+        def contar(execute, sql, params, many, context):
+            consultas[0] += 1
+            return execute(sql, params, many, context)
+
+        inicio = time.perf_counter()
+        with connection.execute_wrapper(contar):
+            response = self.get_response(request)
+        duracion = time.perf_counter() - inicio
+
+        # Sin ruta (404) se agrupa en una sola etiqueta para no crear una serie por URL
+        coincidencia = getattr(request, 'resolver_match', None)
+        vista = coincidencia.view_name if coincidencia else 'sin_ruta'
+        metricas.PETICIONES.inc(vista=vista, metodo=request.method, estado=response.status_code)
+        metricas.DURACION.observar(duracion, vista=vista)
+        metricas.CONSULTAS_DB.inc(consultas[0], vista=vista)
+        return response
+
+
+class ConsultasLentasMiddleware:
+    """Anota las consultas lentas de cada petición (ver tienda/consultas_lentas.py)."""
+
+    def __init__(self, get_response):
+        if settings.CONSULTAS_LENTAS_MS is None:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with connection.execute_wrapper(RegistroConsultasLentas(request)):
+            return self.get_response(request)
+
+
+class PerfiladorMiddleware:
+    """
+    Perfila por muestreo las peticiones elegidas: las de personal (is_staff)
+    con la cabecera `X-Perfilar: 1` o el parámetro `?perfilar=1`, y una
+    fracción aleatoria settings.PERFILADOR_MUESTREO del resto.
+    Va después de AuthenticationMiddleware para poder revisar request.user.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def solicitado_por_personal(self, request):
+        # request.user solo se evalúa si la petición pidió el perfil
+        pedido = request.headers.get('X-Perfilar') == '1' or request.GET.get('perfilar') == '1'
+        return pedido and request.user.is_staff
+
+    def __call__(self, request):
+        por_personal = self.solicitado_por_personal(request)
+        if not por_personal and random.random() >= settings.PERFILADOR_MUESTREO:
+            return self.get_response(request)
+
+        response, pilas = perfilador.perfilar(self.get_response, request)
+        coincidencia = getattr(request, 'resolver_match', None)
+        etiqueta = re.sub(r'[^\w-]', '_', coincidencia.view_name if coincidencia else request.path)
+        nombre = perfilador.guardar(pilas, etiqueta)
+        if por_personal:
+            response['X-Perfil'] = nombre
+        return response
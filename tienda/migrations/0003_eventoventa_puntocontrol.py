@@ -0,0 +1,41 @@
+# Generated by Django 5.2.8 on 2026-10-19 11:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tienda', '0002_cliente_user'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventoVenta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('venta_creada', 'Venta creada')], max_length=30)),
+                ('payload', models.JSONField()),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Evento de Venta',
+                'verbose_name_plural': 'Eventos de Venta',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PuntoControl',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('consumidor', models.CharField(max_length=50, unique=True)),
+                ('ultimo_evento_id', models.BigIntegerField(default=0)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Punto de Control',
+                'verbose_name_plural': 'Puntos de Control',
+                'ordering': ['consumidor'],
+            },
+        ),
+    ]
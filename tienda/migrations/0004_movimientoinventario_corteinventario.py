@@ -0,0 +1,62 @@
+# Generated by Django 5.2.8 on 2026-10-19 11:54
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def crear_cortes_iniciales(apps, schema_editor):
+    # El stock actual de cada producto es el punto de partida del libro
+    Producto = apps.get_model('tienda', 'Producto')
+    CorteInventario = apps.get_model('tienda', 'CorteInventario')
+    CorteInventario.objects.bulk_create(
+        (CorteInventario(producto_id=pk, stock=stock) for pk, stock in Producto.objects.values_list('pk', 'stock').iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tienda', '0003_eventoventa_puntocontrol'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CorteInventario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stock', models.IntegerField()),
+                ('ultimo_movimiento_id', models.BigIntegerField(default=0)),
+                ('fecha', models.DateTimeField(default=django.utils.timezone.now)),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cortes', to='tienda.producto')),
+            ],
+            options={
+                'verbose_name': 'Corte de Inventario',
+                'verbose_name_plural': 'Cortes de Inventario',
+                'ordering': ['-fecha'],
+                'indexes': [models.Index(fields=['producto', 'fecha'], name='corteinv_producto_fecha_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='MovimientoInventario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('venta', 'Venta'), ('reabastecimiento', 'Reabastecimiento'), ('ajuste', 'Ajuste')], max_length=20)),
+                ('cantidad', models.IntegerField()),
+                ('nota', models.CharField(blank=True, max_length=200)),
+                ('fecha', models.DateTimeField(default=django.utils.timezone.now)),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movimientos', to='tienda.producto')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='movimientos_inventario', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Movimiento de Inventario',
+                'verbose_name_plural': 'Movimientos de Inventario',
+                'ordering': ['-id'],
+                'indexes': [models.Index(fields=['producto', 'fecha'], name='movinv_producto_fecha_idx')],
+            },
+        ),
+        migrations.RunPython(crear_cortes_iniciales, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-19 11:55
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tienda', '0004_movimientoinventario_corteinventario'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PrecioHistorico',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('precio_anterior', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('precio_nuevo', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('motivo', models.CharField(blank=True, max_length=200)),
+                ('fecha', models.DateTimeField(default=django.utils.timezone.now)),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='precios_historicos', to='tienda.producto')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='cambios_precio', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Precio Histórico',
+                'verbose_name_plural': 'Precios Históricos',
+                'ordering': ['-fecha'],
+                'indexes': [models.Index(fields=['producto', 'fecha'], name='preciohist_producto_fecha_idx')],
+            },
+        ),
+    ]
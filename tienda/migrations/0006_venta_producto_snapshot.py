@@ -0,0 +1,48 @@
+# Generated by Django 5.2.8 on 2026-10-19 11:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def copiar_datos_producto(apps, schema_editor):
+    # Un UPDATE con subconsultas llena la copia del nombre/SKU en las ventas existentes
+    Producto = apps.get_model('tienda', 'Producto')
+    Venta = apps.get_model('tienda', 'Venta')
+    producto = Producto.objects.filter(pk=OuterRef('producto_id'))
+    Venta.objects.filter(producto__isnull=False).update(
+        producto_nombre=Subquery(producto.values('nombre')[:1]),
+        producto_sku=Coalesce(Subquery(producto.values('sku')[:1]), models.Value('')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tienda', '0005_preciohistorico'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='producto',
+            name='sku',
+            field=models.CharField(blank=True, max_length=50, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='venta',
+            name='producto_nombre',
+            field=models.CharField(blank=True, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='venta',
+            name='producto_sku',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='venta',
+            name='producto',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ventas', to='tienda.producto'),
+        ),
+        migrations.RunPython(copiar_datos_producto, migrations.RunPython.noop),
+    ]
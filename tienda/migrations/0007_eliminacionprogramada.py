@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-19 11:57
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tienda', '0006_venta_producto_snapshot'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EliminacionProgramada',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modelo', models.CharField(choices=[('categoria', 'Categoría'), ('proveedor', 'Proveedor')], max_length=20)),
+                ('objeto_id', models.BigIntegerField()),
+                ('descripcion', models.CharField(max_length=200)),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('en_proceso', 'En proceso'), ('completada', 'Completada'), ('error', 'Error')], default='pendiente', max_length=20)),
+                ('filas_afectadas', models.IntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('fecha_solicitud', models.DateTimeField(auto_now_add=True)),
+                ('fecha_fin', models.DateTimeField(blank=True, null=True)),
+                ('solicitado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='eliminaciones_programadas', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Eliminación Programada',
+                'verbose_name_plural': 'Eliminaciones Programadas',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['estado', 'id'], name='eliminacion_estado_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.8 on 2026-10-19 11:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tienda', '0007_eliminacionprogramada'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VentaArchivo',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('producto_nombre', models.CharField(blank=True, max_length=200)),
+                ('producto_sku', models.CharField(blank=True, max_length=50)),
+                ('cantidad', models.IntegerField()),
+                ('precio_unitario', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('total', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('fecha_venta', models.DateTimeField()),
+                ('fecha_archivo', models.DateTimeField(auto_now_add=True)),
+                ('cliente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ventas_archivadas', to='tienda.cliente')),
+                ('producto', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ventas_archivadas', to='tienda.producto')),
+                ('vendedor', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ventas_archivadas', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Venta Archivada',
+                'verbose_name_plural': 'Ventas Archivadas',
+                'ordering': ['-fecha_venta'],
+                'indexes': [models.Index(fields=['fecha_venta'], name='ventaarch_fecha_idx'), models.Index(fields=['cliente', 'fecha_venta'], name='ventaarch_cliente_fecha_idx')],
+            },
+        ),
+    ]
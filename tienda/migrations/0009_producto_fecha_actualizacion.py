@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-19 11:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tienda', '0008_ventaarchivo'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='producto',
+            name='fecha_actualizacion',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['fecha_actualizacion'], name='producto_actualizacion_idx'),
+        ),
+    ]
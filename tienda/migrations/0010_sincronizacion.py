@@ -0,0 +1,48 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:01
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tienda', '0009_producto_fecha_actualizacion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegistroEliminado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modelo', models.CharField(max_length=20)),
+                ('objeto_id', models.BigIntegerField()),
+                ('fecha', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Registro Eliminado',
+                'verbose_name_plural': 'Registros Eliminados',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.AddField(
+            model_name='categoria',
+            name='fecha_actualizacion',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='fecha_actualizacion',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='categoria',
+            index=models.Index(fields=['fecha_actualizacion'], name='categoria_actualizacion_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['fecha_actualizacion'], name='cliente_actualizacion_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:02
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tienda', '0010_sincronizacion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='venta',
+            name='clave_idempotencia',
+            field=models.CharField(blank=True, max_length=64, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='venta',
+            name='fecha_venta',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:04
+
+from django.db import migrations, models
+from django.db.models import Count, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def calcular_contadores(apps, schema_editor):
+    # Valores iniciales: a partir de aquí se mantienen con deltas
+    Producto = apps.get_model('tienda', 'Producto')
+    valor = models.DecimalField(max_digits=14, decimal_places=2)
+    for nombre, campo in (('Categoria', 'categoria'), ('Proveedor', 'proveedor')):
+        activos = Producto.objects.filter(**{campo: OuterRef('pk')}, activo=True).order_by().values(campo)
+        apps.get_model('tienda', nombre).objects.update(
+            productos_activos=Coalesce(Subquery(activos.annotate(n=Count('id')).values('n')), 0),
+            valor_stock=Coalesce(
+                Subquery(activos.annotate(v=Sum(F('stock') * F('precio_venta'), output_field=valor)).values('v')),
+                Value(0), output_field=valor,
+            ),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tienda', '0011_venta_clave_idempotencia'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='categoria',
+            name='productos_activos',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='categoria',
+            name='valor_stock',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='proveedor',
+            name='productos_activos',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='proveedor',
+            name='valor_stock',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=14),
+        ),
+        migrations.RunPython(calcular_contadores, migrations.RunPython.noop),
+    ]
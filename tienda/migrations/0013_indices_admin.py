@@ -0,0 +1,36 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:06
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tienda', '0012_contadores_categoria_proveedor'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='perfilusuario',
+            name='departamento',
+            field=models.CharField(blank=True, db_index=True, max_length=100, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['apellido', 'nombre'], name='cliente_apellido_nombre_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['fecha_registro'], name='cliente_registro_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['fecha_creacion'], name='producto_creacion_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='venta',
+            index=models.Index(fields=['fecha_venta'], name='venta_fecha_idx'),
+        ),
+    ]
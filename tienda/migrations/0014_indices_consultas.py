@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:07
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tienda', '0013_indices_admin'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='categoria',
+            index=models.Index(fields=['nombre'], name='categoria_nombre_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='perfilusuario',
+            index=models.Index(fields=['rol', 'activo'], name='perfil_rol_activo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['activo', 'nombre'], name='producto_activo_nombre_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='proveedor',
+            index=models.Index(fields=['nombre'], name='proveedor_nombre_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='venta',
+            index=models.Index(fields=['cliente', 'fecha_venta', 'total'], name='venta_cliente_fecha_idx'),
+        ),
+    ]
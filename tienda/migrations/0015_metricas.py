@@ -0,0 +1,76 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:11
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+
+def calcular_stock_bajo(apps, schema_editor):
+    # Menos de 10 unidades, igual que contadores.STOCK_BAJO
+    Producto = apps.get_model('tienda', 'Producto')
+    for nombre, campo in (('Categoria', 'categoria'), ('Proveedor', 'proveedor')):
+        bajos = Producto.objects.filter(**{campo: OuterRef('pk')}, activo=True, stock__lt=10).order_by().values(campo)
+        apps.get_model('tienda', nombre).objects.update(
+            productos_stock_bajo=Coalesce(Subquery(bajos.annotate(n=Count('id')).values('n')), 0),
+        )
+
+
+def resumir_ventas_existentes(apps, schema_editor):
+    # Las ventas ya registradas se resumen aquí; el consumidor 'resumen_diario'
+    # arranca después del último evento para no contarlas dos veces
+    por_dia = defaultdict(lambda: [0, Decimal('0')])
+    for modelo in ('Venta', 'VentaArchivo'):
+        for fecha, total in apps.get_model('tienda', modelo).objects.values_list('fecha_venta', 'total').iterator(chunk_size=2000):
+            dia = timezone.localdate(fecha)
+            por_dia[dia][0] += 1
+            por_dia[dia][1] += total
+
+    ResumenVentasDia = apps.get_model('tienda', 'ResumenVentasDia')
+    ResumenVentasDia.objects.bulk_create(
+        [ResumenVentasDia(fecha=dia, ventas=ventas, ingresos=ingresos) for dia, (ventas, ingresos) in por_dia.items()],
+        batch_size=1000,
+    )
+    ultimo = apps.get_model('tienda', 'EventoVenta').objects.aggregate(maximo=Max('id'))['maximo'] or 0
+    apps.get_model('tienda', 'PuntoControl').objects.update_or_create(
+        consumidor='resumen_diario', defaults={'ultimo_evento_id': ultimo},
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tienda', '0014_indices_consultas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenVentasDia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(unique=True)),
+                ('ventas', models.IntegerField(default=0)),
+                ('ingresos', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'verbose_name': 'Resumen de Ventas por Día',
+                'verbose_name_plural': 'Resúmenes de Ventas por Día',
+                'ordering': ['-fecha'],
+            },
+        ),
+        migrations.AddField(
+            model_name='categoria',
+            name='productos_stock_bajo',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='proveedor',
+            name='productos_stock_bajo',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(calcular_stock_bajo, migrations.RunPython.noop),
+        migrations.RunPython(resumir_ventas_existentes, migrations.RunPython.noop),
+    ]
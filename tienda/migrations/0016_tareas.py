@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:23
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tienda', '0015_metricas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tarea',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=100)),
+                ('argumentos', models.JSONField(blank=True, default=dict)),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('en_proceso', 'En proceso'), ('completada', 'Completada'), ('error', 'Error')], default='pendiente', max_length=20)),
+                ('intentos', models.IntegerField(default=0)),
+                ('max_intentos', models.IntegerField(default=5)),
+                ('disponible_en', models.DateTimeField(default=django.utils.timezone.now)),
+                ('trabajador', models.CharField(blank=True, max_length=100)),
+                ('error', models.TextField(blank=True)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_inicio', models.DateTimeField(blank=True, null=True)),
+                ('fecha_fin', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Tarea',
+                'verbose_name_plural': 'Tareas',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['estado', 'disponible_en', 'id'], name='tarea_estado_disponible_idx')],
+            },
+        ),
+    ]
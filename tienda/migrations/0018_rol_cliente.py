@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tienda', '0017_punto_control_resumen_clientes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='perfilusuario',
+            name='rol',
+            field=models.CharField(choices=[('vendedor', 'Vendedor'), ('gerente', 'Gerente'), ('administrador', 'Administrador'), ('cliente', 'Cliente')], default='vendedor', max_length=20),
+        ),
+    ]
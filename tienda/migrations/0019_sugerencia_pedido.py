@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tienda', '0018_rol_cliente'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SugerenciaPedido',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('stock', models.IntegerField()),
+                ('promedio_diario', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('demanda_diaria', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('dias_restantes', models.DecimalField(blank=True, decimal_places=1, max_digits=8, null=True)),
+                ('cantidad_sugerida', models.IntegerField()),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sugerencias_pedido', to='tienda.producto')),
+                ('proveedor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sugerencias_pedido', to='tienda.proveedor')),
+            ],
+            options={
+                'verbose_name': 'Sugerencia de Pedido',
+                'verbose_name_plural': 'Sugerencias de Pedido',
+                'ordering': ['fecha', 'dias_restantes'],
+                'indexes': [models.Index(fields=['fecha', 'proveedor'], name='sugerencia_fecha_proveedor_idx')],
+                'constraints': [models.UniqueConstraint(fields=('fecha', 'producto'), name='sugerencia_fecha_producto_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,105 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Max
+
+LOTE = 10000
+
+
+def crear_sucursal_principal(apps, schema_editor):
+    # Hasta ahora había una sola tienda: pasa a ser la sucursal principal
+    # (settings.SUCURSAL_PRINCIPAL), con sus ventas y todo el stock
+    Sucursal = apps.get_model('tienda', 'Sucursal')
+    codigo = getattr(settings, 'SUCURSAL_PRINCIPAL', 'MATRIZ')
+    principal, _ = Sucursal.objects.get_or_create(codigo=codigo, defaults={'nombre': 'Matriz'})
+
+    # UPDATE por rangos de id en lugar de uno solo que recorra toda tienda_venta
+    for nombre in ('Venta', 'VentaArchivo'):
+        modelo = apps.get_model('tienda', nombre)
+        maximo = modelo.objects.aggregate(maximo=Max('id'))['maximo'] or 0
+        for desde in range(0, maximo, LOTE):
+            modelo.objects.filter(id__gt=desde, id__lte=desde + LOTE, sucursal__isnull=True).update(sucursal=principal)
+
+    Existencia = apps.get_model('tienda', 'Existencia')
+    productos = apps.get_model('tienda', 'Producto').objects.values_list('id', 'stock').order_by('id')
+    ultimo = 0
+    while True:
+        lote = list(productos.filter(id__gt=ultimo)[:LOTE])
+        if not lote:
+            break
+        Existencia.objects.bulk_create(
+            [Existencia(sucursal=principal, producto_id=pk, cantidad=stock) for pk, stock in lote],
+            ignore_conflicts=True,
+        )
+        ultimo = lote[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tienda', '0019_sugerencia_pedido'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Sucursal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('codigo', models.CharField(max_length=20, unique=True)),
+                ('nombre', models.CharField(max_length=150)),
+                ('direccion', models.CharField(blank=True, max_length=255)),
+                ('activa', models.BooleanField(default=True)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Sucursal',
+                'verbose_name_plural': 'Sucursales',
+                'ordering': ['nombre'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Existencia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cantidad', models.IntegerField(default=0)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='existencias', to='tienda.producto')),
+                ('sucursal', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='existencias', to='tienda.sucursal')),
+            ],
+            options={
+                'verbose_name': 'Existencia',
+                'verbose_name_plural': 'Existencias',
+            },
+        ),
+        migrations.AddField(
+            model_name='perfilusuario',
+            name='sucursal',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='empleados', to='tienda.sucursal'),
+        ),
+        migrations.AddField(
+            model_name='venta',
+            name='sucursal',
+            field=models.ForeignKey(null=True, db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='ventas', to='tienda.sucursal'),
+        ),
+        migrations.AddField(
+            model_name='ventaarchivo',
+            name='sucursal',
+            field=models.ForeignKey(null=True, db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='ventas_archivadas', to='tienda.sucursal'),
+        ),
+        migrations.AddIndex(
+            model_name='venta',
+            index=models.Index(fields=['sucursal', 'fecha_venta', 'total'], name='venta_sucursal_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ventaarchivo',
+            index=models.Index(fields=['sucursal', 'fecha_venta'], name='ventaarch_sucursal_fecha_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='existencia',
+            constraint=models.UniqueConstraint(fields=('sucursal', 'producto'), name='existencia_sucursal_producto_uniq'),
+        ),
+        migrations.RunPython(crear_sucursal_principal, migrations.RunPython.noop),
+    ]
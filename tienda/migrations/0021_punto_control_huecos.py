@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tienda', '0020_sucursales'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='puntocontrol',
+            name='huecos',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,22 @@
+from django.db import migrations
+from django.db.models import Max
+
+
+def iniciar_punto_control(apps, schema_editor):
+    # Los snapshots existentes ya reflejan las ventas de los eventos anteriores:
+    # el consumidor 'snapshots' arranca después del último
+    ultimo = apps.get_model('tienda', 'EventoVenta').objects.aggregate(maximo=Max('id'))['maximo'] or 0
+    apps.get_model('tienda', 'PuntoControl').objects.update_or_create(
+        consumidor='snapshots', defaults={'ultimo_evento_id': ultimo},
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tienda', '0021_punto_control_huecos'),
+    ]
+
+    operations = [
+        migrations.RunPython(iniciar_punto_control, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tienda', '0022_punto_control_snapshots'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='eventoventa',
+            name='tipo',
+            field=models.CharField(choices=[('venta_creada', 'Venta creada'), ('venta_eliminada', 'Venta eliminada')], max_length=30),
+        ),
+    ]
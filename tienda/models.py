@@ -1,6 +1,7 @@
 # tienda/models.py
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 
 # ==================================================================
@@ -11,14 +12,18 @@ class PerfilUsuario(models.Model):
         ('vendedor', 'Vendedor'),
         ('gerente', 'Gerente'),
         ('administrador', 'Administrador'),
+        ('cliente', 'Cliente'),
     )
 
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='perfil')
     rol = models.CharField(max_length=20, choices=ROLES, default='vendedor')
     telefono = models.CharField(max_length=15, blank=True, null=True)
-    departamento = models.CharField(max_length=100, blank=True, null=True)
+    departamento = models.CharField(max_length=100, blank=True, null=True, db_index=True)
     fecha_contratacion = models.DateField(auto_now_add=True)
     activo = models.BooleanField(default=True)
+    # Sucursal donde trabaja; sin sucursal ve todas (oficina central)
+    sucursal = models.ForeignKey('Sucursal', on_delete=models.SET_NULL, null=True, blank=True,
+                                 related_name='empleados')
 
     def __str__(self):
         return f"{self.user.username} - {self.get_rol_display()}"
@@ -26,6 +31,9 @@ class PerfilUsuario(models.Model):
     class Meta:
         verbose_name = "Perfil de Usuario"
         verbose_name_plural = "Perfiles de Usuario"
+        indexes = [
+            models.Index(fields=['rol', 'activo'], name='perfil_rol_activo_idx'),
+        ]
 
     # Métodos de permisos
     def es_vendedor(self):
@@ -37,14 +45,13 @@ class PerfilUsuario(models.Model):
     def es_administrador(self):
         return self.rol == 'administrador'
 
-    def tiene_permiso_lectura(self):
-        return True
+    def es_cliente(self):
+        return self.rol == 'cliente'
 
-    def tiene_permiso_escritura(self):
-        return self.rol in ['gerente', 'administrador']
-
-    def tiene_permiso_eliminacion(self):
-        return self.rol == 'administrador'
+    def puede(self, permiso):
+        """Consulta la matriz de tienda/permisos.py, p. ej. perfil.puede('venta.eliminar')."""
+        from .permisos import TABLA
+        return permiso in TABLA.get(self.rol, ())
 
 
 # ==================================================================
@@ -54,6 +61,11 @@ class Categoria(models.Model):
     nombre = models.CharField(max_length=100)
     descripcion = models.TextField(blank=True, null=True)
     fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+    # Contadores desnormalizados de productos activos (ver tienda/contadores.py)
+    productos_activos = models.IntegerField(default=0, editable=False)
+    valor_stock = models.DecimalField(max_digits=14, decimal_places=2, default=0, editable=False)
+    productos_stock_bajo = models.IntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.nombre
@@ -62,6 +74,10 @@ class Categoria(models.Model):
         verbose_name = "Categoría"
         verbose_name_plural = "Categorías"
         ordering = ['nombre']
+        indexes = [
+            models.Index(fields=['fecha_actualizacion'], name='categoria_actualizacion_idx'),
+            models.Index(fields=['nombre'], name='categoria_nombre_idx'),
+        ]
 
 
 # ==================================================================
@@ -71,6 +87,10 @@ class Proveedor(models.Model):
     nombre = models.CharField(max_length=150)
     contacto = models.CharField(max_length=100, blank=True)
     telefono = models.CharField(max_length=15, blank=True)
+    # Contadores desnormalizados de productos activos (ver tienda/contadores.py)
+    productos_activos = models.IntegerField(default=0, editable=False)
+    valor_stock = models.DecimalField(max_digits=14, decimal_places=2, default=0, editable=False)
+    productos_stock_bajo = models.IntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.nombre
@@ -79,13 +99,25 @@ class Proveedor(models.Model):
         verbose_name = "Proveedor"
         verbose_name_plural = "Proveedores"
         ordering = ['nombre']
+        indexes = [
+            models.Index(fields=['nombre'], name='proveedor_nombre_idx'),
+        ]
 
 
 # ==================================================================
 # MODELO 4: PRODUCTO
 # ==================================================================
+class ProductoQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        # auto_now no aplica en QuerySet.update(); el ETag del catálogo y la
+        # sincronización de terminales dependen de esta fecha, así que todo UPDATE la asigna
+        kwargs.setdefault('fecha_actualizacion', timezone.now())
+        return super().update(**kwargs)
+
+
 class Producto(models.Model):
     nombre = models.CharField(max_length=200)
+    sku = models.CharField(max_length=50, unique=True, null=True, blank=True)
     descripcion = models.TextField()
     precio_venta = models.DecimalField(max_digits=10, decimal_places=2)
     stock = models.IntegerField(default=0)
@@ -93,8 +125,12 @@ class Producto(models.Model):
     proveedor = models.ForeignKey(Proveedor, on_delete=models.SET_NULL, null=True, blank=True)
     creado_por = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='productos_creados')
     fecha_creacion = models.DateTimeField(auto_now_add=True)
+    # auto_now en save(); en QuerySet.update() la asigna ProductoQuerySet
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
     activo = models.BooleanField(default=True)
 
+    objects = ProductoQuerySet.as_manager()
+
     def __str__(self):
         return self.nombre
 
@@ -102,6 +138,14 @@ class Producto(models.Model):
         verbose_name = "Producto"
         verbose_name_plural = "Productos"
         ordering = ['nombre']
+        indexes = [
+            # MAX(fecha_actualizacion) para el ETag del catálogo se resuelve con el índice
+            models.Index(fields=['fecha_actualizacion'], name='producto_actualizacion_idx'),
+            # Orden y filtro por fecha del changelist del admin
+            models.Index(fields=['fecha_creacion'], name='producto_creacion_idx'),
+            # Catálogo activo ordenado por nombre (lista de productos, formulario de venta)
+            models.Index(fields=['activo', 'nombre'], name='producto_activo_nombre_idx'),
+        ]
 
 
 # ==================================================================
@@ -115,6 +159,7 @@ class Cliente(models.Model):
     telefono = models.CharField(max_length=15)
     direccion = models.TextField()
     fecha_registro = models.DateTimeField(auto_now_add=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.nombre} {self.apellido}"
@@ -127,6 +172,12 @@ class Cliente(models.Model):
         verbose_name = "Cliente"
         verbose_name_plural = "Clientes"
         ordering = ['apellido', 'nombre']
+        indexes = [
+            models.Index(fields=['fecha_actualizacion'], name='cliente_actualizacion_idx'),
+            # Orden por defecto y filtro por fecha del changelist del admin
+            models.Index(fields=['apellido', 'nombre'], name='cliente_apellido_nombre_idx'),
+            models.Index(fields=['fecha_registro'], name='cliente_registro_idx'),
+        ]
 
 
 # ==================================================================
@@ -135,24 +186,435 @@ class Cliente(models.Model):
 class Venta(models.Model):
     cliente = models.ForeignKey(Cliente, on_delete=models.CASCADE, related_name='ventas')
     vendedor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='ventas_realizadas')
-    producto = models.ForeignKey(Producto, on_delete=models.CASCADE, related_name='ventas')
+    # SET_NULL: la venta conserva su copia del nombre/SKU aunque el producto se borre
+    producto = models.ForeignKey(Producto, on_delete=models.SET_NULL, null=True, related_name='ventas')
+    # Nula solo en filas anteriores a las sucursales (la migración 0020 les asigna la principal).
+    # Sin índice propio: venta_sucursal_fecha_idx empieza por sucursal_id
+    sucursal = models.ForeignKey('Sucursal', on_delete=models.PROTECT, null=True, related_name='ventas',
+                                 db_index=False)
+    producto_nombre = models.CharField(max_length=200, blank=True)
+    producto_sku = models.CharField(max_length=50, blank=True)
     cantidad = models.IntegerField(default=1)
     precio_unitario = models.DecimalField(max_digits=10, decimal_places=2)
     total = models.DecimalField(max_digits=10, decimal_places=2)
-    fecha_venta = models.DateTimeField(auto_now_add=True)
+    # default en lugar de auto_now_add: las ventas capturadas sin red conservan su hora real
+    fecha_venta = models.DateTimeField(default=timezone.now)
+    # Clave generada por el terminal; evita registrar dos veces la misma venta
+    clave_idempotencia = models.CharField(max_length=64, unique=True, null=True, blank=True)
 
     def __str__(self):
-        return f"Venta #{self.id} - {self.producto.nombre} - ${self.total}"
+        return f"Venta #{self.id} - {self.producto_nombre} - ${self.total}"
 
     def save(self, *args, **kwargs):
         # Asignar automáticamente el precio de venta del producto
         if self.producto:
             self.precio_unitario = self.producto.precio_venta
+            # Copia del nombre/SKU para que los reportes no dependan de tienda_producto
+            if self._state.adding or not self.producto_nombre:
+                self.producto_nombre = self.producto.nombre
+                self.producto_sku = self.producto.sku or ''
         self.total = self.cantidad * self.precio_unitario
-        super().save(*args, **kwargs)
+        if self.sucursal_id is None:
+            from .sucursales import principal_id
+            self.sucursal_id = principal_id()
+        nueva = self._state.adding
+        # La venta y su evento se escriben en la misma transacción (outbox)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if nueva:
+                EventoVenta.objects.create(tipo=EventoVenta.VENTA_CREADA, payload=self.payload_evento())
+
+    def delete(self, *args, **kwargs):
+        # También la eliminación pasa por la bandeja: los resúmenes restan la venta
+        with transaction.atomic():
+            EventoVenta.objects.create(tipo=EventoVenta.VENTA_ELIMINADA, payload=self.payload_evento())
+            return super().delete(*args, **kwargs)
+
+    def payload_evento(self):
+        """Datos mínimos que necesitan los consumidores del evento"""
+        return payload_venta(self)
 
     class Meta:
         verbose_name = "Venta"
         verbose_name_plural = "Ventas"
         ordering = ['-fecha_venta']
+        indexes = [
+            # Orden por defecto, rangos por día y date_hierarchy del admin
+            models.Index(fields=['fecha_venta'], name='venta_fecha_idx'),
+            # Compras de un cliente por fecha; con total, SUM(total) se resuelve solo con el índice
+            models.Index(fields=['cliente', 'fecha_venta', 'total'], name='venta_cliente_fecha_idx'),
+            # Reportes de una sucursal: solo recorren su parte del índice
+            models.Index(fields=['sucursal', 'fecha_venta', 'total'], name='venta_sucursal_fecha_idx'),
+        ]
+
+
+def payload_venta(venta):
+    """Payload del evento de una Venta o de una VentaArchivo (mismas columnas)."""
+    return {
+        'venta_id': venta.id,
+        'producto_id': venta.producto_id,
+        'cliente_id': venta.cliente_id,
+        'sucursal_id': venta.sucursal_id,
+        'cantidad': venta.cantidad,
+        'total': str(venta.total),
+        'fecha_venta': venta.fecha_venta.isoformat(),
+    }
+
+
+# ==================================================================
+# MODELO 7: EVENTO DE VENTA (Bandeja de salida / outbox)
+# ==================================================================
+class EventoVenta(models.Model):
+    VENTA_CREADA = 'venta_creada'
+    VENTA_ELIMINADA = 'venta_eliminada'
+    TIPOS = (
+        (VENTA_CREADA, 'Venta creada'),
+        (VENTA_ELIMINADA, 'Venta eliminada'),
+    )
+
+    tipo = models.CharField(max_length=30, choices=TIPOS)
+    payload = models.JSONField()
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Evento #{self.id} - {self.tipo}"
+
+    class Meta:
+        verbose_name = "Evento de Venta"
+        verbose_name_plural = "Eventos de Venta"
+        ordering = ['id']
+
+
+# ==================================================================
+# MODELO 8: PUNTO DE CONTROL (avance de cada consumidor de eventos)
+# ==================================================================
+class PuntoControl(models.Model):
+    consumidor = models.CharField(max_length=50, unique=True)
+    ultimo_evento_id = models.BigIntegerField(default=0)
+    # Ids que faltaban al avanzar (transacción aún sin COMMIT o revertida): {id: fecha en que se vio el hueco}
+    huecos = models.JSONField(default=dict, blank=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.consumidor} → #{self.ultimo_evento_id}"
+
+    class Meta:
+        verbose_name = "Punto de Control"
+        verbose_name_plural = "Puntos de Control"
+        ordering = ['consumidor']
+
+
+# ==================================================================
+# MODELO 9: MOVIMIENTO DE INVENTARIO (libro de solo inserción)
+# ==================================================================
+class MovimientoInventario(models.Model):
+    VENTA = 'venta'
+    REABASTECIMIENTO = 'reabastecimiento'
+    AJUSTE = 'ajuste'
+    TIPOS = (
+        (VENTA, 'Venta'),
+        (REABASTECIMIENTO, 'Reabastecimiento'),
+        (AJUSTE, 'Ajuste'),
+    )
+
+    producto = models.ForeignKey(Producto, on_delete=models.CASCADE, related_name='movimientos')
+    tipo = models.CharField(max_length=20, choices=TIPOS)
+    cantidad = models.IntegerField()  # Positivo = entrada, negativo = salida
+    usuario = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='movimientos_inventario')
+    nota = models.CharField(max_length=200, blank=True)
+    fecha = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} {self.cantidad:+d} - {self.producto_id}"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError('Los movimientos de inventario no se pueden modificar.')
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError('Los movimientos de inventario no se pueden eliminar.')
+
+    class Meta:
+        verbose_name = "Movimiento de Inventario"
+        verbose_name_plural = "Movimientos de Inventario"
+        ordering = ['-id']
+        indexes = [
+            models.Index(fields=['producto', 'fecha'], name='movinv_producto_fecha_idx'),
+        ]
+
+
+# ==================================================================
+# MODELO 10: CORTE DE INVENTARIO (snapshot periódico por producto)
+# ==================================================================
+class CorteInventario(models.Model):
+    producto = models.ForeignKey(Producto, on_delete=models.CASCADE, related_name='cortes')
+    stock = models.IntegerField()
+    # Último movimiento incluido en el corte; el stock posterior es stock + movimientos con id mayor
+    ultimo_movimiento_id = models.BigIntegerField(default=0)
+    fecha = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Corte {self.producto_id} @ {self.fecha:%d/%m/%Y %H:%M} = {self.stock}"
+
+    class Meta:
+        verbose_name = "Corte de Inventario"
+        verbose_name_plural = "Cortes de Inventario"
+        ordering = ['-fecha']
+        indexes = [
+            models.Index(fields=['producto', 'fecha'], name='corteinv_producto_fecha_idx'),
+        ]
+
+
+# ==================================================================
+# MODELO 11: PRECIO HISTÓRICO
+# ==================================================================
+class PrecioHistorico(models.Model):
+    producto = models.ForeignKey(Producto, on_delete=models.CASCADE, related_name='precios_historicos')
+    precio_anterior = models.DecimalField(max_digits=10, decimal_places=2)
+    precio_nuevo = models.DecimalField(max_digits=10, decimal_places=2)
+    usuario = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='cambios_precio')
+    motivo = models.CharField(max_length=200, blank=True)
+    fecha = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.producto_id}: ${self.precio_anterior} → ${self.precio_nuevo}"
+
+    class Meta:
+        verbose_name = "Precio Histórico"
+        verbose_name_plural = "Precios Históricos"
+        ordering = ['-fecha']
+        indexes = [
+            models.Index(fields=['producto', 'fecha'], name='preciohist_producto_fecha_idx'),
+        ]
+
+
+# ==================================================================
+# MODELO 12: ELIMINACIÓN PROGRAMADA (borrado por lotes en segundo plano)
+# ==================================================================
+class EliminacionProgramada(models.Model):
+    CATEGORIA = 'categoria'
+    PROVEEDOR = 'proveedor'
+    MODELOS = (
+        (CATEGORIA, 'Categoría'),
+        (PROVEEDOR, 'Proveedor'),
+    )
+
+    PENDIENTE = 'pendiente'
+    EN_PROCESO = 'en_proceso'
+    COMPLETADA = 'completada'
+    ERROR = 'error'
+    ESTADOS = (
+        (PENDIENTE, 'Pendiente'),
+        (EN_PROCESO, 'En proceso'),
+        (COMPLETADA, 'Completada'),
+        (ERROR, 'Error'),
+    )
+
+    modelo = models.CharField(max_length=20, choices=MODELOS)
+    objeto_id = models.BigIntegerField()
+    descripcion = models.CharField(max_length=200)
+    estado = models.CharField(max_length=20, choices=ESTADOS, default=PENDIENTE)
+    solicitado_por = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='eliminaciones_programadas')
+    filas_afectadas = models.IntegerField(default=0)
+    error = models.TextField(blank=True)
+    fecha_solicitud = models.DateTimeField(auto_now_add=True)
+    fecha_fin = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Eliminar {self.get_modelo_display()} #{self.objeto_id} ({self.get_estado_display()})"
+
+    class Meta:
+        verbose_name = "Eliminación Programada"
+        verbose_name_plural = "Eliminaciones Programadas"
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['estado', 'id'], name='eliminacion_estado_idx'),
+        ]
 
+
+# ==================================================================
+# MODELO 13: VENTA ARCHIVADA (ventas antiguas fuera de tienda_venta)
+# ==================================================================
+class VentaArchivo(models.Model):
+    # Conserva el mismo id que tenía en tienda_venta
+    id = models.BigIntegerField(primary_key=True)
+    cliente = models.ForeignKey(Cliente, on_delete=models.CASCADE, related_name='ventas_archivadas')
+    vendedor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='ventas_archivadas')
+    producto = models.ForeignKey(Producto, on_delete=models.SET_NULL, null=True, related_name='ventas_archivadas')
+    sucursal = models.ForeignKey('Sucursal', on_delete=models.PROTECT, null=True, related_name='ventas_archivadas',
+                                 db_index=False)
+    producto_nombre = models.CharField(max_length=200, blank=True)
+    producto_sku = models.CharField(max_length=50, blank=True)
+    cantidad = models.IntegerField()
+    precio_unitario = models.DecimalField(max_digits=10, decimal_places=2)
+    total = models.DecimalField(max_digits=10, decimal_places=2)
+    fecha_venta = models.DateTimeField()
+    fecha_archivo = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Venta archivada #{self.id} - {self.producto_nombre} - ${self.total}"
+
+    class Meta:
+        verbose_name = "Venta Archivada"
+        verbose_name_plural = "Ventas Archivadas"
+        ordering = ['-fecha_venta']
+        indexes = [
+            models.Index(fields=['fecha_venta'], name='ventaarch_fecha_idx'),
+            models.Index(fields=['cliente', 'fecha_venta'], name='ventaarch_cliente_fecha_idx'),
+            models.Index(fields=['sucursal', 'fecha_venta'], name='ventaarch_sucursal_fecha_idx'),
+        ]
+
+
+# ==================================================================
+# MODELO 14: REGISTRO ELIMINADO (lápida para la sincronización de terminales)
+# ==================================================================
+class RegistroEliminado(models.Model):
+    modelo = models.CharField(max_length=20)
+    objeto_id = models.BigIntegerField()
+    fecha = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.modelo} #{self.objeto_id} eliminado"
+
+    class Meta:
+        verbose_name = "Registro Eliminado"
+        verbose_name_plural = "Registros Eliminados"
+        ordering = ['id']
+
+
+# ==================================================================
+# MODELO 15: RESUMEN DE VENTAS POR DÍA
+# Lo mantiene el consumidor 'resumen_diario' de tienda/eventos.py;
+# las métricas leen una fila en lugar de contar tienda_venta.
+# ==================================================================
+class ResumenVentasDia(models.Model):
+    fecha = models.DateField(unique=True)
+    ventas = models.IntegerField(default=0)
+    ingresos = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"{self.fecha:%d/%m/%Y}: {self.ventas} ventas - ${self.ingresos}"
+
+    class Meta:
+        verbose_name = "Resumen de Ventas por Día"
+        verbose_name_plural = "Resúmenes de Ventas por Día"
+        ordering = ['-fecha']
+
+
+# ==================================================================
+# MODELO 16: TAREA (cola de trabajos en segundo plano, tienda/tareas.py)
+# Las vistas encolan y responden de inmediato; `manage.py worker` las
+# ejecuta con reintentos y espera exponencial entre intentos.
+# ==================================================================
+class Tarea(models.Model):
+    PENDIENTE = 'pendiente'
+    EN_PROCESO = 'en_proceso'
+    COMPLETADA = 'completada'
+    ERROR = 'error'
+    ESTADOS = (
+        (PENDIENTE, 'Pendiente'),
+        (EN_PROCESO, 'En proceso'),
+        (COMPLETADA, 'Completada'),
+        (ERROR, 'Error'),
+    )
+
+    nombre = models.CharField(max_length=100)
+    argumentos = models.JSONField(default=dict, blank=True)
+    estado = models.CharField(max_length=20, choices=ESTADOS, default=PENDIENTE)
+    intentos = models.IntegerField(default=0)
+    max_intentos = models.IntegerField(default=5)
+    disponible_en = models.DateTimeField(default=timezone.now)  # No se toma antes de esta fecha
+    trabajador = models.CharField(max_length=100, blank=True)
+    error = models.TextField(blank=True)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_inicio = models.DateTimeField(null=True, blank=True)
+    fecha_fin = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.nombre} #{self.pk} ({self.get_estado_display()})"
+
+    class Meta:
+        verbose_name = "Tarea"
+        verbose_name_plural = "Tareas"
+        ordering = ['id']
+        indexes = [
+            # El worker busca pendientes ya disponibles, en orden de llegada
+            models.Index(fields=['estado', 'disponible_en', 'id'], name='tarea_estado_disponible_idx'),
+        ]
+
+
+# ==================================================================
+# MODELO 17: SUGERENCIA DE PEDIDO (pronóstico nocturno, tienda/pronostico.py)
+# Cantidad a pedir por producto según su velocidad de venta; compras
+# la consulta por proveedor sin tocar tienda_venta.
+# ==================================================================
+class SugerenciaPedido(models.Model):
+    fecha = models.DateField()  # Último día de ventas incluido en el cálculo
+    producto = models.ForeignKey(Producto, on_delete=models.CASCADE, related_name='sugerencias_pedido')
+    proveedor = models.ForeignKey(Proveedor, on_delete=models.SET_NULL, null=True, blank=True,
+                                  related_name='sugerencias_pedido')
+    stock = models.IntegerField()
+    promedio_diario = models.DecimalField(max_digits=10, decimal_places=2)  # Promedio móvil simple
+    demanda_diaria = models.DecimalField(max_digits=10, decimal_places=2)  # Ponderada hacia los días recientes
+    dias_restantes = models.DecimalField(max_digits=8, decimal_places=1, null=True, blank=True)
+    cantidad_sugerida = models.IntegerField()
+
+    def __str__(self):
+        return f"{self.fecha:%d/%m/%Y}: pedir {self.cantidad_sugerida} de {self.producto}"
+
+    class Meta:
+        verbose_name = "Sugerencia de Pedido"
+        verbose_name_plural = "Sugerencias de Pedido"
+        ordering = ['fecha', 'dias_restantes']
+        constraints = [
+            models.UniqueConstraint(fields=['fecha', 'producto'], name='sugerencia_fecha_producto_uniq'),
+        ]
+        indexes = [
+            # Lista de compras de un día agrupada por proveedor
+            models.Index(fields=['fecha', 'proveedor'], name='sugerencia_fecha_proveedor_idx'),
+        ]
+
+
+# ==================================================================
+# MODELO 18: SUCURSAL
+# Todas las sucursales comparten la base de datos; las vistas de un
+# empleado con sucursal solo consultan la parte de ella (tienda/sucursales.py).
+# ==================================================================
+class Sucursal(models.Model):
+    codigo = models.CharField(max_length=20, unique=True)
+    nombre = models.CharField(max_length=150)
+    direccion = models.CharField(max_length=255, blank=True)
+    activa = models.BooleanField(default=True)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.nombre
+
+    class Meta:
+        verbose_name = "Sucursal"
+        verbose_name_plural = "Sucursales"
+        ordering = ['nombre']
+
+
+# ==================================================================
+# MODELO 19: EXISTENCIA (stock de un producto en una sucursal)
+# Producto.stock sigue siendo el total de la cadena: cada cambio se
+# aplica a los dos, así la suma de existencias coincide con él.
+# ==================================================================
+class Existencia(models.Model):
+    sucursal = models.ForeignKey(Sucursal, on_delete=models.CASCADE, related_name='existencias', db_index=False)
+    producto = models.ForeignKey(Producto, on_delete=models.CASCADE, related_name='existencias')
+    cantidad = models.IntegerField(default=0)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.producto} @ {self.sucursal}: {self.cantidad}"
+
+    class Meta:
+        verbose_name = "Existencia"
+        verbose_name_plural = "Existencias"
+        constraints = [
+            # Empieza por sucursal_id: también es el índice del inventario de cada sucursal
+            models.UniqueConstraint(fields=['sucursal', 'producto'], name='existencia_sucursal_producto_uniq'),
+        ]
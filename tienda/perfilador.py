@@ -0,0 +1,80 @@
+# tienda/perfilador.py
+# ===============================================================
+# PERFILADOR POR MUESTREO DE PETICIONES INDIVIDUALES
+# Mientras dura la petición, un hilo aparte toma la pila del hilo que
+# la atiende cada settings.PERFILADOR_INTERVALO_MS y cuenta cuántas
+# veces aparece cada pila. El resultado se guarda en formato "collapsed"
+# (una línea `marco;marco;marco muestras`), el que leen flamegraph.pl,
+# speedscope o inferno. Las peticiones no perfiladas no pagan nada.
+# ===============================================================
+
+import os
+import sys
+import threading
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.utils import timezone
+
+DIRECTORIO_PROYECTO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def nombre_marco(marco):
+    """'función (archivo:línea de inicio)', con rutas relativas al proyecto cuando se puede."""
+    codigo = marco.f_code
+    archivo = codigo.co_filename
+    if archivo.startswith(DIRECTORIO_PROYECTO):
+        archivo = os.path.relpath(archivo, DIRECTORIO_PROYECTO)
+    return f"{codigo.co_name} ({archivo}:{codigo.co_firstlineno})"
+
+
+def pila_colapsada(marco):
+    nombres = []
+    while marco is not None:
+        nombres.append(nombre_marco(marco))
+        marco = marco.f_back
+    return ';'.join(reversed(nombres))
+
+
+class Muestreador(threading.Thread):
+    """Hilo que muestrea la pila de otro hilo hasta que se le pide detenerse."""
+
+    def __init__(self, hilo_id, intervalo):
+        super().__init__(name='perfilador', daemon=True)
+        self.hilo_id = hilo_id
+        self.intervalo = intervalo
+        self.pilas = Counter()
+        self._detener = threading.Event()
+
+    def run(self):
+        while not self._detener.wait(self.intervalo):
+            marco = sys._current_frames().get(self.hilo_id)
+            if marco is not None:
+                self.pilas[pila_colapsada(marco)] += 1
+
+    def detener(self):
+        self._detener.set()
+        self.join()
+        return self.pilas
+
+
+def perfilar(funcion, *args, **kwargs):
+    """Ejecuta la función muestreando su hilo. Devuelve (resultado, pilas)."""
+    muestreador = Muestreador(threading.get_ident(), settings.PERFILADOR_INTERVALO_MS / 1000)
+    muestreador.start()
+    try:
+        resultado = funcion(*args, **kwargs)
+    finally:
+        pilas = muestreador.detener()
+    return resultado, pilas
+
+
+def guardar(pilas, etiqueta):
+    """Escribe las pilas en PERFILADOR_DIR y devuelve el nombre del archivo."""
+    os.makedirs(settings.PERFILADOR_DIR, exist_ok=True)
+    nombre = f"{timezone.localtime():%Y%m%d-%H%M%S}_{etiqueta}_{uuid.uuid4().hex[:8]}.collapsed"
+    with open(os.path.join(settings.PERFILADOR_DIR, nombre), 'w', encoding='utf-8') as archivo:
+        for pila, muestras in pilas.most_common():
+            archivo.write(f"{pila} {muestras}\n")
+    return nombre
@@ -0,0 +1,104 @@
+# tienda/permisos.py
+# ===============================================================
+# MATRIZ DE PERMISOS (rol × modelo × acción)
+# Única fuente de verdad para vistas, API, plantillas y admin. Se
+# declara aquí como modelo → acción → roles y se compila al importar
+# en un conjunto congelado por rol, así cada consulta es un `in`:
+#   permisos.puede(request.user, 'producto.editar')
+#   {% if 'producto.ver' in permisos %}   (context processor)
+# Un permiso mal escrito falla al arrancar, no en la petición.
+# ===============================================================
+
+from types import MappingProxyType
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .models import PerfilUsuario
+
+ADMINISTRADOR = 'administrador'
+GERENTE = 'gerente'
+VENDEDOR = 'vendedor'
+CLIENTE = 'cliente'
+PERSONAL = (ADMINISTRADOR, GERENTE, VENDEDOR)
+
+# 'ver_propias': solo lo que pertenece al usuario (las compras de un cliente)
+ACCIONES = ('ver', 'ver_propias', 'crear', 'editar', 'eliminar')
+
+MATRIZ = {
+    'producto': {'ver': (ADMINISTRADOR, GERENTE), 'crear': (ADMINISTRADOR,), 'editar': (ADMINISTRADOR,),
+                 'eliminar': (ADMINISTRADOR,)},
+    # Catálogo y sincronización de la API: lo necesitan todos los terminales de venta
+    'catalogo': {'ver': PERSONAL},
+    'categoria': {'ver': (ADMINISTRADOR,), 'crear': (ADMINISTRADOR,), 'editar': (ADMINISTRADOR,),
+                  'eliminar': (ADMINISTRADOR,)},
+    'proveedor': {'ver': (ADMINISTRADOR,), 'crear': (ADMINISTRADOR,), 'editar': (ADMINISTRADOR,),
+                  'eliminar': (ADMINISTRADOR,)},
+    'cliente': {'ver': PERSONAL, 'crear': PERSONAL, 'editar': PERSONAL, 'eliminar': PERSONAL},
+    'venta': {'ver': PERSONAL, 'ver_propias': (CLIENTE,), 'crear': PERSONAL, 'eliminar': (ADMINISTRADOR,)},
+    'reporte': {'ver': PERSONAL},
+    # Modelos que solo se administran desde el admin
+    'perfilusuario': {'ver': (ADMINISTRADOR,), 'crear': (ADMINISTRADOR,), 'editar': (ADMINISTRADOR,),
+                      'eliminar': (ADMINISTRADOR,)},
+    'movimientoinventario': {'ver': (ADMINISTRADOR, GERENTE), 'crear': (ADMINISTRADOR,)},
+    'preciohistorico': {'ver': (ADMINISTRADOR, GERENTE), 'crear': (ADMINISTRADOR,)},
+    'tarea': {'ver': (ADMINISTRADOR,), 'editar': (ADMINISTRADOR,)},
+    # Pronóstico nocturno de compras (tienda/pronostico.py); solo lectura
+    'sugerenciapedido': {'ver': (ADMINISTRADOR, GERENTE)},
+    'sucursal': {'ver': (ADMINISTRADOR,), 'crear': (ADMINISTRADOR,), 'editar': (ADMINISTRADOR,),
+                 'eliminar': (ADMINISTRADOR,)},
+    # Stock por sucursal; solo cambia con ventas y ajustes (tienda/sucursales.py)
+    'existencia': {'ver': (ADMINISTRADOR, GERENTE)},
+}
+
+
+def _compilar(matriz):
+    roles_validos = {rol for rol, _ in PerfilUsuario.ROLES}
+    por_rol = {rol: set() for rol in roles_validos}
+    for modelo, acciones in matriz.items():
+        for accion, roles in acciones.items():
+            if accion not in ACCIONES:
+                raise ImproperlyConfigured(f"Acción desconocida en la matriz de permisos: {modelo}.{accion}")
+            for rol in roles:
+                if rol not in roles_validos:
+                    raise ImproperlyConfigured(f"Rol desconocido en la matriz de permisos: {rol} ({modelo}.{accion})")
+                por_rol[rol].add(f"{modelo}.{accion}")
+    return MappingProxyType({rol: frozenset(permisos) for rol, permisos in por_rol.items()})
+
+
+TABLA = _compilar(MATRIZ)
+TODOS = frozenset(f"{modelo}.{accion}" for modelo, acciones in MATRIZ.items() for accion in acciones)
+NINGUNO = frozenset()
+
+
+def validar(permiso):
+    """Para los decoradores: un permiso que no está en la matriz es un error de programación."""
+    if permiso not in TODOS:
+        raise ImproperlyConfigured(f"Permiso no declarado en tienda/permisos.py: {permiso}")
+    return permiso
+
+
+def permisos_de(user):
+    """Conjunto congelado de permisos del usuario ('modelo.accion')."""
+    if not user.is_authenticated:
+        return NINGUNO
+    if user.is_superuser:
+        return TODOS
+    perfil = getattr(user, 'perfil', None)
+    return TABLA.get(perfil.rol, NINGUNO) if perfil is not None else NINGUNO
+
+
+def puede(user, *permisos):
+    """True si el usuario tiene al menos uno de los permisos."""
+    propios = permisos_de(user)
+    return any(permiso in propios for permiso in permisos)
+
+
+def roles_con(permiso):
+    """Roles que tienen el permiso, para los mensajes de acceso denegado."""
+    return [rol for rol, _ in PerfilUsuario.ROLES if permiso in TABLA[rol]]
+
+
+def contexto(request):
+    """Context processor: `permisos` en todas las plantillas."""
+    user = getattr(request, 'user', None)
+    return {'permisos': permisos_de(user) if user is not None else NINGUNO}
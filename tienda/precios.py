@@ -0,0 +1,81 @@
+# tienda/precios.py
+# ===============================================================
+# AJUSTE MASIVO DE PRECIOS
+# Un solo UPDATE con expresiones F sobre todos los productos filtrados
+# y el historial de precios insertado con bulk_create.
+# ===============================================================
+
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, F, Value
+from django.db.models.functions import Greatest, Round
+from django.utils import timezone
+
+from . import contadores
+from .models import PrecioHistorico, Producto
+
+PORCENTAJE = 'porcentaje'
+MONTO = 'monto'
+
+
+def filtrar_productos(categoria=None, proveedor=None, productos=None):
+    """Productos a los que se aplicará el ajuste."""
+    productos = Producto.objects.all() if productos is None else productos
+    if categoria is not None:
+        productos = productos.filter(categoria=categoria)
+    if proveedor is not None:
+        productos = productos.filter(proveedor=proveedor)
+    return productos
+
+
+def expresion_precio(tipo, valor):
+    """Nuevo precio_venta como expresión SQL, redondeado y nunca negativo. `valor` es un Decimal."""
+    if tipo == PORCENTAJE:
+        nuevo = F('precio_venta') * Value(1 + valor / 100, output_field=DecimalField())
+    elif tipo == MONTO:
+        nuevo = F('precio_venta') + Value(valor, output_field=DecimalField())
+    else:
+        raise ValueError(f"Tipo de ajuste desconocido: '{tipo}'")
+    return Greatest(Round(nuevo, 2), Value(Decimal('0.00')), output_field=DecimalField(max_digits=10, decimal_places=2))
+
+
+def registrar_cambio_precio(producto, precio_anterior, usuario=None, motivo='Edición del producto'):
+    """Guarda el historial cuando el precio se cambió en un formulario."""
+    if producto.precio_venta == precio_anterior:
+        return None
+    return PrecioHistorico.objects.create(
+        producto=producto, precio_anterior=precio_anterior, precio_nuevo=producto.precio_venta,
+        usuario=usuario, motivo=motivo,
+    )
+
+
+def ajustar_precios(productos, tipo, valor, usuario=None, motivo=''):
+    """
+    Aplica el ajuste a todo el queryset con un UPDATE y registra el
+    precio anterior y el nuevo de cada producto. Devuelve cuántos cambiaron.
+    """
+    productos = productos.order_by()
+    with transaction.atomic():
+        anteriores = dict(productos.select_for_update().values_list('pk', 'precio_venta'))
+        if not anteriores:
+            return 0
+
+        ahora = timezone.now()
+        productos.update(precio_venta=expresion_precio(tipo, valor), fecha_actualizacion=ahora)
+        historial = []
+        deltas = contadores.nuevos_deltas()
+        for pk, precio, stock, activo, categoria_id, proveedor_id in productos.values_list(
+            'pk', 'precio_venta', 'stock', 'activo', 'categoria_id', 'proveedor_id',
+        ):
+            if pk not in anteriores or precio == anteriores[pk]:
+                continue
+            historial.append(PrecioHistorico(
+                producto_id=pk, precio_anterior=anteriores[pk], precio_nuevo=precio,
+                usuario=usuario, motivo=motivo, fecha=ahora,
+            ))
+            if activo:
+                contadores.sumar(deltas, categoria_id, proveedor_id, valor=stock * (precio - anteriores[pk]))
+        PrecioHistorico.objects.bulk_create(historial, batch_size=1000)
+        contadores.aplicar(deltas)
+    return len(historial)
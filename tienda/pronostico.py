@@ -0,0 +1,155 @@
+# tienda/pronostico.py
+# ===============================================================
+# PRONÓSTICO DE REABASTECIMIENTO POR VELOCIDAD DE VENTA
+# Lote nocturno (`cerrar_dia` encola la tarea 'pronosticar_pedidos'):
+# una consulta agregada por tabla trae las unidades vendidas por
+# producto y día de los últimos PEDIDOS_DIAS_HISTORIA días; la matriz
+# productos × días se procesa de una vez con NumPy (promedio móvil,
+# demanda ponderada, desviación y días de stock restantes) y se guarda
+# la cantidad sugerida por producto en SugerenciaPedido, agrupable por
+# proveedor. Compras consulta esa tabla y no las ventas de producción.
+# Sin NumPy se usa el mismo cálculo fila por fila en Python.
+# ===============================================================
+
+import math
+import statistics
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from .models import Producto, SugerenciaPedido, Venta, VentaArchivo
+
+try:
+    import numpy as np
+except ImportError:  # NumPy opcional
+    np = None
+
+# Factor de la desviación para el stock de seguridad (~95 % de nivel de servicio)
+Z_SERVICIO = 1.65
+
+
+def inicios_de_dia(fecha, dias):
+    """Inicio (hora local) de cada uno de los `dias` días que terminan en `fecha`, más el del día siguiente."""
+    return [
+        timezone.make_aware(datetime.combine(fecha - timedelta(days=atras), time.min))
+        for atras in range(dias - 1, -2, -1)
+    ]
+
+
+def ventas_diarias(fecha, dias):
+    """
+    {producto_id: [unidades por día, del más antiguo a `fecha`]}. Un SUM
+    condicional por día en una sola consulta por tabla, como en
+    compras_cliente.gasto_por_mes (sin TruncDate ni tablas de zonas horarias).
+    """
+    inicios = inicios_de_dia(fecha, dias)
+    agregados = {
+        f"dia_{posicion}": Sum('cantidad', filter=Q(fecha_venta__gte=inicio, fecha_venta__lt=fin))
+        for posicion, (inicio, fin) in enumerate(zip(inicios, inicios[1:]))
+    }
+    series = {}
+    # Siempre las dos tablas: `archivar_ventas --dias N` puede archivar ventas dentro de la ventana.
+    # Sin ventas archivadas en el rango, el índice ventaarch_fecha_idx responde sin leer filas
+    for modelo in (Venta, VentaArchivo):
+        filas = modelo.objects.filter(
+            fecha_venta__gte=inicios[0], fecha_venta__lt=inicios[-1], producto__isnull=False,
+        ).values('producto_id').annotate(**agregados).order_by()
+        for fila in filas:
+            serie = series.setdefault(fila['producto_id'], [0] * dias)
+            for posicion in range(dias):
+                serie[posicion] += fila[f"dia_{posicion}"] or 0
+    return series
+
+
+def pesos_exponenciales(dias, vida_media):
+    """Peso de cada día (del más antiguo al más reciente); se reduce a la mitad cada `vida_media` días."""
+    pesos = [0.5 ** ((dias - 1 - posicion) / vida_media) for posicion in range(dias)]
+    total = sum(pesos)
+    return [peso / total for peso in pesos]
+
+
+def _calcular_numpy(series, stocks, pesos, entrega, cobertura):
+    ventas = np.array(series, dtype=float)
+    stock = np.array(stocks, dtype=float)
+    promedio = ventas.mean(axis=1)
+    demanda = ventas @ np.array(pesos)
+    seguridad = Z_SERVICIO * ventas.std(axis=1) * math.sqrt(entrega)
+    objetivo = demanda * (entrega + cobertura) + seguridad
+    sugerida = np.ceil(np.maximum(objetivo - stock, 0))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dias_restantes = np.where(demanda > 0, np.maximum(stock, 0) / demanda, np.nan)
+    return [
+        (promedio[i], demanda[i], None if np.isnan(dias_restantes[i]) else dias_restantes[i], int(sugerida[i]))
+        for i in range(len(series))
+    ]
+
+
+def _calcular_python(series, stocks, pesos, entrega, cobertura):
+    resultados = []
+    for serie, stock in zip(series, stocks):
+        promedio = sum(serie) / len(serie)
+        demanda = sum(unidades * peso for unidades, peso in zip(serie, pesos))
+        seguridad = Z_SERVICIO * statistics.pstdev(serie) * math.sqrt(entrega)
+        objetivo = demanda * (entrega + cobertura) + seguridad
+        dias_restantes = max(stock, 0) / demanda if demanda > 0 else None
+        resultados.append((promedio, demanda, dias_restantes, math.ceil(max(objetivo - stock, 0))))
+    return resultados
+
+
+def calcular(series, stocks, entrega=None, cobertura=None):
+    """
+    Para cada producto (una serie diaria y su stock): (promedio diario,
+    demanda diaria ponderada, días de stock restantes o None, cantidad
+    sugerida para cubrir entrega + cobertura con stock de seguridad).
+    """
+    if not series:
+        return []
+    entrega = settings.PEDIDOS_DIAS_ENTREGA if entrega is None else entrega
+    cobertura = settings.PEDIDOS_DIAS_COBERTURA if cobertura is None else cobertura
+    pesos = pesos_exponenciales(len(series[0]), settings.PEDIDOS_VIDA_MEDIA)
+    calcular_lote = _calcular_numpy if np is not None else _calcular_python
+    return calcular_lote(series, stocks, pesos, entrega, cobertura)
+
+
+def _decimal(valor, decimales=2):
+    return Decimal(str(round(float(valor), decimales)))
+
+
+def generar(fecha=None, dias=None):
+    """
+    Recalcula las sugerencias de pedido con las ventas hasta `fecha`
+    (por defecto, hoy) y reemplaza las de ese día. Devuelve cuántas hay.
+    """
+    fecha = fecha or timezone.localdate()
+    dias = dias or settings.PEDIDOS_DIAS_HISTORIA
+    series = ventas_diarias(fecha, dias)
+    # Sin IN (...) con miles de ids: se recorre el catálogo activo y se toman los que vendieron
+    productos = [
+        fila for fila in Producto.objects.filter(activo=True).values_list('id', 'proveedor_id', 'stock')
+        if fila[0] in series
+    ]
+    resultados = calcular([series[pk] for pk, _, _ in productos], [stock for _, _, stock in productos])
+
+    sugerencias = [
+        SugerenciaPedido(
+            fecha=fecha, producto_id=producto_id, proveedor_id=proveedor_id, stock=stock,
+            promedio_diario=_decimal(promedio), demanda_diaria=_decimal(demanda),
+            dias_restantes=None if dias_restantes is None else _decimal(dias_restantes, 1),
+            cantidad_sugerida=sugerida,
+        )
+        for (producto_id, proveedor_id, stock), (promedio, demanda, dias_restantes, sugerida)
+        in zip(productos, resultados)
+        if sugerida > 0
+    ]
+    with transaction.atomic():
+        SugerenciaPedido.objects.filter(fecha=fecha).delete()
+        SugerenciaPedido.objects.bulk_create(sugerencias, batch_size=1000)
+    return len(sugerencias)
+
+
+def ultima_fecha():
+    return SugerenciaPedido.objects.order_by('-fecha').values_list('fecha', flat=True).first()
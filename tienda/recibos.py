@@ -0,0 +1,111 @@
+# tienda/recibos.py
+# ===============================================================
+# RECIBOS DE VENTA CON CACHÉ EN DISCO
+# Cada recibo se guarda bajo la huella (sha256) de sus datos y de la
+# versión de la plantilla: si la venta no cambia, la descarga se sirve
+# del archivo sin volver a renderizar. `cerrar_dia` encola la tarea
+# 'generar_recibos', que produce los del día en un pool de procesos.
+# Con weasyprint instalado los recibos son PDF; sin él, HTML compacto
+# listo para imprimir.
+# ===============================================================
+
+import hashlib
+import json
+import os
+import tempfile
+from multiprocessing import get_context
+
+import django
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.template.loader import render_to_string
+
+from .archivo import ventas_historicas
+from .reportes import rango_dia
+
+try:
+    from weasyprint import HTML
+except ImportError:  # PDF opcional
+    HTML = None
+
+PLANTILLA = 'tienda/recibo.html'
+# Subirla al cambiar la plantilla: las huellas cambian y los recibos se regeneran
+VERSION_PLANTILLA = 2
+FORMATO = 'pdf' if HTML is not None else 'html'
+TIPOS_CONTENIDO = {'pdf': 'application/pdf', 'html': 'text/html; charset=utf-8'}
+
+# Lo que aparece en el recibo (columnas de archivo.ventas_historicas)
+CAMPOS = (
+    'id', 'fecha_venta', 'cliente_id', 'cliente_nombre', 'vendedor_username', 'sucursal_nombre',
+    'producto_nombre', 'producto_sku', 'cantidad', 'precio_unitario', 'total',
+)
+
+
+def datos_venta(venta_id):
+    """Datos del recibo de una venta reciente o archivada, o None si no existe."""
+    return ventas_historicas(id=venta_id).first()
+
+
+def huella(datos, formato=FORMATO):
+    contenido = json.dumps(
+        [VERSION_PLANTILLA, formato, {campo: datos[campo] for campo in CAMPOS}],
+        cls=DjangoJSONEncoder, sort_keys=True,
+    )
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+
+def ruta(huella_recibo, formato=FORMATO):
+    # Un subdirectorio por los dos primeros caracteres para no juntar millones de archivos
+    return os.path.join(settings.REPORTES_DIR, 'recibos', huella_recibo[:2], f"{huella_recibo}.{formato}")
+
+
+def renderizar(datos, formato=FORMATO):
+    html = render_to_string(PLANTILLA, {'venta': datos})
+    if formato == 'pdf':
+        return HTML(string=html).write_pdf()
+    return html.encode('utf-8')
+
+
+def obtener(datos, formato=FORMATO):
+    """(huella, ruta) del recibo; solo se renderiza si aún no está en disco."""
+    huella_recibo = huella(datos, formato)
+    destino = ruta(huella_recibo, formato)
+    if not os.path.exists(destino):
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        # Temporal único (por proceso y por hilo) y rename atómico: dos generadores del mismo recibo no se pisan
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(destino), prefix=f"{huella_recibo}.",
+                                         suffix='.tmp', delete=False) as archivo:
+            temporal = archivo.name
+            try:
+                archivo.write(renderizar(datos, formato))
+            except BaseException:
+                archivo.close()
+                os.remove(temporal)
+                raise
+        os.replace(temporal, destino)
+    return huella_recibo, destino
+
+
+def _generar(datos):
+    return obtener(datos)[1]
+
+
+def generar_dia(fecha, procesos=None):
+    """
+    Genera los recibos que falten de las ventas del día. Con varios
+    procesos se reparten en un pool. Devuelve cuántos se generaron.
+    """
+    procesos = settings.RECIBOS_PROCESOS if procesos is None else procesos
+    faltantes = [
+        datos for datos in ventas_historicas(fecha_venta__range=rango_dia(fecha))
+        if not os.path.exists(ruta(huella(datos)))
+    ]
+    if procesos <= 1 or len(faltantes) < 2:
+        for datos in faltantes:
+            _generar(datos)
+    else:
+        # Como en datos_sinteticos: procesos limpios con Django cargado antes de recibir trabajo
+        with get_context('spawn').Pool(procesos, initializer=django.setup) as pool:
+            for _ in pool.imap_unordered(_generar, faltantes, chunksize=50):
+                pass
+    return len(faltantes)
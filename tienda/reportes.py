@@ -0,0 +1,95 @@
+# tienda/reportes.py
+# ===============================================================
+# REPORTE DE VENTAS DEL DÍA Y SUS SNAPSHOTS
+# `cerrar_dia` guarda el reporte de un día ya cerrado como HTML y JSON
+# comprimidos en settings.REPORTES_DIR. Las fechas pasadas se sirven
+# desde esos archivos (la vista el HTML, la API el JSON); solo el día
+# actual se calcula en vivo. Cada sucursal tiene además su propio
+# snapshot con solo sus ventas. Si un día cerrado recibe ventas después
+# (cargas sin conexión, cierre antes de tiempo), el consumidor de
+# eventos 'snapshots' lo vuelve a generar.
+# ===============================================================
+
+import gzip
+import json
+import os
+from datetime import datetime, time
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .archivo import ventas_historicas
+from .models import Sucursal
+
+PLANTILLA_CONTENIDO = 'tienda/reporte_ventas_contenido.html'
+
+
+def rango_dia(fecha):
+    """Inicio y fin del día en hora local."""
+    inicio = timezone.make_aware(datetime.combine(fecha, time.min))
+    fin = timezone.make_aware(datetime.combine(fecha, time.max))
+    return inicio, fin
+
+
+def datos_reporte(fecha, sucursal_id=None):
+    """Contexto del reporte: ventas del día (incluye archivadas) y totales, de una sucursal o de todas."""
+    filtros = {'fecha_venta__range': rango_dia(fecha)}
+    sucursal = None
+    if sucursal_id is not None:
+        filtros['sucursal_id'] = sucursal_id
+        sucursal = Sucursal.objects.values_list('nombre', flat=True).get(pk=sucursal_id)
+    ventas = list(ventas_historicas(**filtros))
+    return {
+        'ventas_hoy': ventas,
+        'total_ventas_dia': sum(venta['total'] for venta in ventas),
+        'cantidad_ventas': len(ventas),
+        'fecha': fecha,
+        'sucursal': sucursal,
+    }
+
+
+def ruta_snapshot(fecha, extension, sucursal_id=None):
+    carpeta = 'ventas' if sucursal_id is None else os.path.join('ventas', f"sucursal-{sucursal_id}")
+    return os.path.join(settings.REPORTES_DIR, carpeta, f"{fecha.isoformat()}.{extension}.gz")
+
+
+def _escribir_gzip(ruta, contenido):
+    # Se escribe a un archivo temporal y se renombra para no dejar snapshots a medias
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    temporal = f"{ruta}.tmp"
+    with gzip.open(temporal, 'wt', encoding='utf-8') as archivo:
+        archivo.write(contenido)
+    os.replace(temporal, ruta)
+
+
+def _guardar_snapshots(fecha, sucursal_id=None):
+    datos = datos_reporte(fecha, sucursal_id)
+    _escribir_gzip(ruta_snapshot(fecha, 'html', sucursal_id), render_to_string(PLANTILLA_CONTENIDO, datos))
+    _escribir_gzip(ruta_snapshot(fecha, 'json', sucursal_id), json.dumps(datos, cls=DjangoJSONEncoder))
+    return datos
+
+
+def cerrar_dia(fecha):
+    """
+    Genera los snapshots HTML y JSON del día, de la cadena y de cada
+    sucursal activa. Devuelve el contexto del de la cadena.
+    """
+    for sucursal_id in Sucursal.objects.filter(activa=True).values_list('id', flat=True):
+        _guardar_snapshots(fecha, sucursal_id)
+    return _guardar_snapshots(fecha)
+
+
+def dia_cerrado(fecha):
+    """True si el día ya tiene snapshot de la cadena."""
+    return os.path.exists(ruta_snapshot(fecha, 'html'))
+
+
+def leer_snapshot(fecha, extension='html', sucursal_id=None):
+    """Contenido del snapshot, o None si ese día no se ha cerrado."""
+    try:
+        with gzip.open(ruta_snapshot(fecha, extension, sucursal_id), 'rt', encoding='utf-8') as archivo:
+            return archivo.read()
+    except FileNotFoundError:
+        return None
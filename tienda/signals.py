@@ -0,0 +1,67 @@
+# tienda/signals.py
+# ===============================================================
+# SEÑALES DE LA APP TIENDA (se conectan en TiendaConfig.ready)
+# ===============================================================
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import contadores
+from .models import Categoria, Cliente, Producto, RegistroEliminado
+
+# Nombre con el que cada modelo aparece en la sincronización de terminales
+MODELOS_SINCRONIZADOS = {
+    Producto: 'productos',
+    Categoria: 'categorias',
+    Cliente: 'clientes',
+}
+
+
+@receiver(post_delete, sender=Producto)
+@receiver(post_delete, sender=Categoria)
+@receiver(post_delete, sender=Cliente)
+def registrar_eliminacion(sender, instance, **kwargs):
+    """Deja una lápida para que los terminales borren su copia local."""
+    RegistroEliminado.objects.create(modelo=MODELOS_SINCRONIZADOS[sender], objeto_id=instance.pk)
+
+
+# ===============================================================
+# CONTADORES DE CATEGORÍA Y PROVEEDOR
+# ===============================================================
+# Campos de Producto que cambian los contadores
+CAMPOS_CONTADORES = ('categoria_id', 'proveedor_id', 'activo', 'stock', 'precio_venta')
+
+
+def _toca_contadores(update_fields):
+    if update_fields is None:
+        return True
+    return any(Producto._meta.get_field(campo).attname in CAMPOS_CONTADORES for campo in update_fields)
+
+
+@receiver(pre_save, sender=Producto)
+def recordar_estado_producto(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Lee de la base el estado previo para calcular el delta en post_save.
+    No sirven los valores con que se cargó la instancia: el consumidor de
+    stock y los ajustes cambian la fila con UPDATE mientras tanto. Un
+    save(update_fields=...) que no toca esos campos se ahorra la consulta.
+    """
+    instance._estado_contadores = None
+    if raw or instance._state.adding or instance.pk is None or not _toca_contadores(update_fields):
+        return
+    instance._estado_contadores = Producto.objects.filter(pk=instance.pk).values_list(*CAMPOS_CONTADORES).first()
+
+
+@receiver(post_save, sender=Producto)
+def actualizar_contadores_guardado(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return  # loaddata: se corrige con `reparar_contadores`
+    if not created and not _toca_contadores(update_fields):
+        return
+    contadores.aplicar_cambio(getattr(instance, '_estado_contadores', None), contadores.estado(instance))
+    instance._estado_contadores = None
+
+
+@receiver(post_delete, sender=Producto)
+def actualizar_contadores_eliminacion(sender, instance, **kwargs):
+    contadores.aplicar_cambio(contadores.estado(instance), None)
@@ -0,0 +1,89 @@
+# tienda/sucursales.py
+# ===============================================================
+# SUCURSALES: ALCANCE DE LAS CONSULTAS Y STOCK POR SUCURSAL
+# Un empleado con PerfilUsuario.sucursal solo consulta su sucursal:
+# las vistas filtran por sucursal_id, la primera columna de los índices
+# de Venta, VentaArchivo y Existencia, así cada sucursal recorre solo
+# su parte. Sin sucursal (oficina central) se ve toda la cadena.
+# Producto.stock sigue siendo el total de la cadena; los cambios de
+# stock mueven también la Existencia de la sucursal con mover_existencias().
+# ===============================================================
+
+from django.conf import settings
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Existencia, Producto, Sucursal
+
+
+def sucursal_de(user):
+    """id de la sucursal del usuario, o None si ve todas."""
+    perfil = getattr(user, 'perfil', None)
+    return perfil.sucursal_id if perfil is not None else None
+
+
+def principal_id():
+    """id de la sucursal principal; en una base nueva (o de pruebas) se crea la primera vez."""
+    sucursal, _ = Sucursal.objects.get_or_create(codigo=settings.SUCURSAL_PRINCIPAL, defaults={'nombre': 'Matriz'})
+    return sucursal.pk
+
+
+def para_registrar(user):
+    """Sucursal a la que se cargan las ventas y ajustes del usuario: la suya o la principal."""
+    return sucursal_de(user) or principal_id()
+
+
+def filtros(user):
+    """Filtros para ventas_historicas() y resumen_historico() con el alcance del usuario."""
+    sucursal_id = sucursal_de(user)
+    return {} if sucursal_id is None else {'sucursal_id': sucursal_id}
+
+
+def acotar(queryset, user):
+    """El queryset (de un modelo con sucursal) limitado a la sucursal del usuario."""
+    return queryset.filter(**filtros(user))
+
+
+def anotar_existencia(productos, sucursal_id):
+    """Anota `existencia` con el stock de la sucursal (subconsulta por la llave única)."""
+    existencia = Existencia.objects.filter(sucursal_id=sucursal_id, producto=OuterRef('pk')).values('cantidad')[:1]
+    return productos.annotate(existencia=Coalesce(Subquery(existencia), 0))
+
+
+def mover_existencias(cantidades):
+    """
+    Suma {(sucursal_id, producto_id): cantidad} a las existencias: crea
+    las filas que falten y aplica un UPDATE por fila.
+    """
+    cantidades = {clave: cantidad for clave, cantidad in cantidades.items() if cantidad}
+    if not cantidades:
+        return
+    Existencia.objects.bulk_create(
+        [Existencia(sucursal_id=sucursal_id, producto_id=producto_id) for sucursal_id, producto_id in cantidades],
+        ignore_conflicts=True,
+    )
+    ahora = timezone.now()
+    for (sucursal_id, producto_id), cantidad in cantidades.items():
+        Existencia.objects.filter(sucursal_id=sucursal_id, producto_id=producto_id).update(
+            cantidad=F('cantidad') + cantidad, fecha_actualizacion=ahora,
+        )
+
+
+def completar_existencias(tamano_lote=1000):
+    """
+    Los productos creados con bulk_create (datos sintéticos) no tienen
+    existencias: su stock se asigna a la sucursal principal. Devuelve cuántos.
+    """
+    principal = principal_id()
+    sin_existencia = Producto.objects.filter(existencias__isnull=True).values_list('id', 'stock').order_by('id')
+    creadas = 0
+    while True:
+        lote = list(sin_existencia[:tamano_lote])
+        if not lote:
+            return creadas
+        Existencia.objects.bulk_create(
+            [Existencia(sucursal_id=principal, producto_id=pk, cantidad=stock) for pk, stock in lote],
+            ignore_conflicts=True,
+        )
+        creadas += len(lote)
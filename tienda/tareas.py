@@ -0,0 +1,227 @@
+# tienda/tareas.py
+# ===============================================================
+# COLA DE TAREAS EN LA BASE DE DATOS (sin Redis ni Celery)
+# Las vistas llaman a encolar(), que inserta una fila en tienda_tarea, y
+# responden de inmediato. `manage.py worker` toma las pendientes con
+# SELECT ... FOR UPDATE SKIP LOCKED (MySQL 8, PostgreSQL), así varios
+# workers no se pisan, y las ejecuta en un pool de hilos. Un fallo se
+# reintenta con espera exponencial hasta max_intentos; después la tarea
+# queda en 'error' con su traceback.
+# ===============================================================
+
+import logging
+import os
+import random
+import socket
+import threading
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from . import compras_cliente
+from .models import Cliente, Tarea, Venta, VentaArchivo
+
+logger = logging.getLogger(__name__)
+
+REGISTRO = {}
+
+
+def tarea(nombre):
+    """Registra una función como tarea: @tarea('nombre'). Los argumentos deben ser JSON."""
+    def registrar(funcion):
+        REGISTRO[nombre] = funcion
+        return funcion
+    return registrar
+
+
+def encolar(nombre, max_intentos=None, retraso=0, **argumentos):
+    """Crea la tarea; el worker la tomará pasados `retraso` segundos."""
+    if nombre not in REGISTRO:
+        raise KeyError(f"Tarea desconocida: {nombre}")
+    return Tarea.objects.create(
+        nombre=nombre,
+        argumentos=argumentos,
+        max_intentos=max_intentos or settings.TAREAS_MAX_INTENTOS,
+        disponible_en=timezone.now() + timedelta(seconds=retraso),
+    )
+
+
+def encolar_una_vez(nombre, **argumentos):
+    """
+    Como encolar(), pero si ya hay una tarea con el mismo nombre y
+    argumentos pendiente o en proceso devuelve esa en lugar de crear otra.
+    """
+    existente = Tarea.objects.filter(
+        nombre=nombre, argumentos=argumentos, estado__in=[Tarea.PENDIENTE, Tarea.EN_PROCESO],
+    ).first()
+    return existente or encolar(nombre, **argumentos)
+
+
+def nombre_trabajador():
+    return f"{socket.gethostname()}:{os.getpid()}"[:100]
+
+
+def espera_reintento(intentos):
+    """Segundos antes del siguiente intento: exponencial con tope y un poco de azar."""
+    espera = min(settings.TAREAS_ESPERA_BASE * 2 ** (intentos - 1), settings.TAREAS_ESPERA_MAXIMA)
+    # El azar evita que las tareas que fallaron juntas se reintenten juntas
+    return espera * random.uniform(0.5, 1)
+
+
+# ===============================================================
+# TOMAR Y EJECUTAR
+# ===============================================================
+def tomar(cantidad, trabajador):
+    """Marca hasta `cantidad` tareas disponibles como 'en_proceso' y las devuelve."""
+    ahora = timezone.now()
+    disponibles = Tarea.objects.filter(estado=Tarea.PENDIENTE, disponible_en__lte=ahora).order_by('id')
+    marcar = {'estado': Tarea.EN_PROCESO, 'trabajador': trabajador, 'fecha_inicio': ahora,
+              'intentos': F('intentos') + 1}
+    with transaction.atomic():
+        if connection.features.has_select_for_update_skip_locked:
+            # Las filas que otro worker tiene bloqueadas se saltan en lugar de esperar
+            ids = list(disponibles.select_for_update(skip_locked=True).values_list('id', flat=True)[:cantidad])
+            Tarea.objects.filter(pk__in=ids).update(**marcar)
+        else:
+            # Sin SKIP LOCKED (SQLite, MySQL < 8): UPDATE condicional por fila, como en eliminaciones.py
+            ids = [
+                pk for pk in disponibles.values_list('id', flat=True)[:cantidad]
+                if Tarea.objects.filter(pk=pk, estado=Tarea.PENDIENTE).update(**marcar)
+            ]
+    return list(Tarea.objects.filter(pk__in=ids).order_by('id'))
+
+
+def ejecutar(tarea):
+    """Ejecuta una tarea ya tomada y guarda el resultado. Devuelve True si terminó bien."""
+    try:
+        REGISTRO[tarea.nombre](**tarea.argumentos)
+    except Exception:
+        detalle = traceback.format_exc()
+        ahora = timezone.now()
+        pendientes = Tarea.objects.filter(pk=tarea.pk)
+        if tarea.intentos >= tarea.max_intentos:
+            logger.error("Tarea %s #%s falló %s veces:\n%s", tarea.nombre, tarea.pk, tarea.intentos, detalle)
+            pendientes.update(estado=Tarea.ERROR, error=detalle, fecha_fin=ahora)
+        else:
+            espera = espera_reintento(tarea.intentos)
+            logger.warning("Tarea %s #%s falló (intento %s); se reintenta en %.0f s",
+                           tarea.nombre, tarea.pk, tarea.intentos, espera)
+            pendientes.update(estado=Tarea.PENDIENTE, error=detalle,
+                              disponible_en=ahora + timedelta(seconds=espera))
+        return False
+    Tarea.objects.filter(pk=tarea.pk).update(estado=Tarea.COMPLETADA, error='', fecha_fin=timezone.now())
+    return True
+
+
+def rescatar_abandonadas():
+    """
+    Devuelve a 'pendiente' las tareas 'en_proceso' de un worker que murió
+    (llevan más de TAREAS_TIEMPO_MAXIMO segundos). Devuelve cuántas.
+    """
+    limite = timezone.now() - timedelta(seconds=settings.TAREAS_TIEMPO_MAXIMO)
+    abandonadas = Tarea.objects.filter(estado=Tarea.EN_PROCESO, fecha_inicio__lt=limite)
+    agotadas = abandonadas.filter(intentos__gte=F('max_intentos')).update(
+        estado=Tarea.ERROR, error='El worker no terminó la tarea a tiempo.', fecha_fin=timezone.now(),
+    )
+    return agotadas + abandonadas.update(estado=Tarea.PENDIENTE, disponible_en=timezone.now())
+
+
+def _ejecutar_en_hilo(tarea):
+    # Cada hilo tiene su propia conexión; se renueva como al inicio y fin de una petición
+    close_old_connections()
+    try:
+        return ejecutar(tarea)
+    finally:
+        close_old_connections()
+
+
+def trabajar(hilos=4, espera=2.0, una_vez=False, detener=None):
+    """
+    Bucle del worker: mantiene hasta `hilos` tareas en ejecución y toma
+    más cuando se libera un hilo. Con `una_vez` termina cuando la cola
+    queda vacía. `detener` es un threading.Event. Devuelve las ejecutadas.
+    """
+    detener = detener or threading.Event()
+    trabajador = nombre_trabajador()
+    ejecutadas = 0
+    en_curso = set()
+    with ThreadPoolExecutor(hilos, thread_name_prefix='tarea') as pool:
+        while not detener.is_set():
+            rescatar_abandonadas()
+            libres = hilos - len(en_curso)
+            nuevas = tomar(libres, trabajador) if libres else []
+            en_curso.update(pool.submit(_ejecutar_en_hilo, tarea) for tarea in nuevas)
+            if not en_curso:
+                if una_vez:
+                    break
+                detener.wait(espera)
+                continue
+            terminadas, en_curso = wait(en_curso, timeout=espera, return_when=FIRST_COMPLETED)
+            ejecutadas += len(terminadas)
+        # Al detenerse se dejan terminar las que ya estaban en curso
+        ejecutadas += len(wait(en_curso).done)
+    return ejecutadas
+
+
+# ===============================================================
+# TAREAS DE LA TIENDA
+# ===============================================================
+@tarea('crear_usuario_cliente')
+def crear_usuario_de_cliente(cliente_id):
+    """
+    El usuario del cliente se crea en la petición sin contraseña (reserva
+    el nombre); el hash PBKDF2 del teléfono se calcula aquí.
+    """
+    with transaction.atomic():
+        cliente = Cliente.objects.select_for_update().select_related('user').filter(pk=cliente_id).first()
+        if cliente is None or cliente.user is None:
+            return  # Se eliminó
+        if cliente.user.has_usable_password():
+            return  # Ya tiene contraseña
+        cliente.user.set_password(cliente.telefono)  # Teléfono será la contraseña
+        cliente.user.save(update_fields=['password'])
+
+
+@tarea('eliminar_cliente')
+def eliminar_cliente(cliente_id, tamano_lote=500):
+    """
+    Borra por lotes las ventas del cliente (con su evento VENTA_ELIMINADA)
+    y después el cliente (con su lápida).
+    """
+    from .eliminaciones import _borrar_ventas, _en_lotes
+
+    for modelo in (Venta, VentaArchivo):
+        _en_lotes(modelo.objects.filter(cliente_id=cliente_id), tamano_lote, _borrar_ventas)
+    cliente = Cliente.objects.filter(pk=cliente_id).first()
+    if cliente is not None:
+        cliente.delete()
+    compras_cliente.invalidar(cliente_id)
+
+
+@tarea('procesar_eliminaciones')
+def procesar_eliminaciones(tamano_lote=500):
+    from .eliminaciones import procesar_pendientes
+
+    procesar_pendientes(tamano_lote)
+
+
+@tarea('generar_recibos')
+def generar_recibos(fecha):
+    """Recibos de las ventas de un día cerrado (fecha en AAAA-MM-DD)."""
+    from .recibos import generar_dia
+
+    generar_dia(parse_date(fecha))
+
+
+@tarea('pronosticar_pedidos')
+def pronosticar_pedidos(fecha):
+    """Sugerencias de pedido con las ventas hasta un día cerrado (fecha en AAAA-MM-DD)."""
+    from .pronostico import generar
+
+    generar(parse_date(fecha))
@@ -1,3 +1,1506 @@
-from django.test import TestCase
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib import admin
+from django.contrib.admin import helpers
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import IntegrityError, connection
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import Count, F, Sum
+from django.forms.models import model_to_dict
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver, reverse
+from django.utils import timezone
+
+from . import (
+    archivo, compras_cliente, consultas_lentas, contadores, eliminaciones, eventos, fabricas, forms, inventario,
+    limites, lote_ventas, permisos, precios, pronostico, recibos, reportes, sucursales, tareas, views,
+)
+from .admin import PaginadorEstimado, estimar_filas
+from .models import (
+    Categoria, Cliente, EliminacionProgramada, EventoVenta, Existencia, MovimientoInventario, PerfilUsuario,
+    PrecioHistorico, Producto, Proveedor, PuntoControl, RegistroEliminado, ResumenVentasDia, Sucursal,
+    SugerenciaPedido, Tarea, Venta, VentaArchivo,
+)
+from .reportes import rango_dia
+
+
+# ===============================================================
+# EVENTOS DE VENTA (OUTBOX)
+# ===============================================================
+class EventosTests(TestCase):
+
+    def setUp(self):
+        self.producto = fabricas.crear_producto(precio_venta=Decimal('4.00'), stock=50)
+
+    def stock(self):
+        self.producto.refresh_from_db()
+        return self.producto.stock
+
+    def test_cada_consumidor_procesa_cada_evento_una_vez(self):
+        fabricas.crear_venta(producto=self.producto, cantidad=3)
+        fabricas.crear_venta(producto=self.producto, cantidad=2)
+        self.assertEqual(eventos.procesar_pendientes('stock'), 2)
+        self.assertEqual(eventos.procesar_pendientes('stock'), 0)
+        self.assertEqual(self.stock(), 45)
+        self.assertEqual(MovimientoInventario.objects.filter(tipo=MovimientoInventario.VENTA).count(), 2)
+
+        eventos.procesar_pendientes('resumen_diario')
+        eventos.procesar_pendientes('resumen_diario')
+        resumen = ResumenVentasDia.objects.get(fecha=timezone.localdate())
+        self.assertEqual((resumen.ventas, resumen.ingresos), (2, Decimal('20.00')))
+        self.assertEqual(PuntoControl.objects.get(consumidor='stock').ultimo_evento_id, EventoVenta.objects.last().id)
+
+    def test_evento_confirmado_tarde_no_se_salta(self):
+        # El evento de la primera venta obtiene su id antes, pero su transacción confirma después
+        primera = fabricas.crear_venta(producto=self.producto, cantidad=3)
+        fabricas.crear_venta(producto=self.producto, cantidad=2)
+        tardio = EventoVenta.objects.get(payload__venta_id=primera.pk)
+        EventoVenta.objects.filter(pk=tardio.pk).delete()
+
+        eventos.procesar_pendientes('stock')
+        self.assertEqual(self.stock(), 48)
+        self.assertEqual(list(PuntoControl.objects.get(consumidor='stock').huecos), [str(tardio.pk)])
+
+        EventoVenta.objects.create(id=tardio.pk, tipo=tardio.tipo, payload=tardio.payload)
+        self.assertEqual(eventos.procesar_pendientes('stock'), 1)
+        self.assertEqual(self.stock(), 45)
+        self.assertEqual(PuntoControl.objects.get(consumidor='stock').huecos, {})
+        self.assertEqual(eventos.procesar_pendientes('stock'), 0)
+
+    def test_hueco_de_transaccion_revertida_se_olvida(self):
+        primera = fabricas.crear_venta(producto=self.producto)
+        fabricas.crear_venta(producto=self.producto)
+        EventoVenta.objects.filter(payload__venta_id=primera.pk).delete()
+        eventos.procesar_pendientes('stock')
+        with override_settings(EVENTOS_ESPERA_HUECO=0):
+            eventos.procesar_pendientes('stock')
+        self.assertEqual(PuntoControl.objects.get(consumidor='stock').huecos, {})
+
+    def resumen_de_hoy(self):
+        eventos.procesar_pendientes('resumen_diario')
+        resumen = ResumenVentasDia.objects.get(fecha=timezone.localdate())
+        return resumen.ventas, resumen.ingresos
+
+    def test_venta_eliminada_se_resta_del_resumen(self):
+        venta = fabricas.crear_venta(producto=self.producto, cantidad=3)
+        fabricas.crear_venta(producto=self.producto, cantidad=2)
+        self.assertEqual(self.resumen_de_hoy(), (2, Decimal('20.00')))
+
+        venta.delete()
+        self.assertEqual(self.resumen_de_hoy(), (1, Decimal('8.00')))
+        # Eliminar una venta no devuelve stock (igual que antes de la bandeja)
+        eventos.procesar_pendientes('stock')
+        self.assertEqual(self.stock(), 45)
+
+    def test_eliminar_cliente_resta_sus_ventas_del_resumen(self):
+        cliente = fabricas.crear_cliente()
+        for cantidad in (1, 2):
+            fabricas.crear_venta(producto=self.producto, cliente=cliente, cantidad=cantidad)
+        fabricas.crear_venta(producto=self.producto, cantidad=5)
+        self.assertEqual(self.resumen_de_hoy(), (3, Decimal('32.00')))
+
+        tareas.eliminar_cliente(cliente.pk, tamano_lote=1)
+        self.assertEqual(self.resumen_de_hoy(), (1, Decimal('20.00')))
+
+
+# ===============================================================
+# LIBRO DE INVENTARIO
+# ===============================================================
+class InventarioTests(TestCase):
+
+    def setUp(self):
+        administrador = fabricas.crear_usuario('administrador', password=fabricas.PASSWORD_PRUEBAS, is_staff=True)
+        self.producto = fabricas.crear_producto(stock=20, creado_por=administrador)
+        inventario.registrar_ajuste(self.producto, 0, nota='Stock inicial')
+
+    def test_stock_en_un_momento_con_cortes(self):
+        inventario.registrar_movimiento(self.producto, MovimientoInventario.REABASTECIMIENTO, 10)
+        antes_del_corte = timezone.now()
+        self.assertEqual(inventario.tomar_cortes(), 1)
+        self.assertEqual(inventario.tomar_cortes(), 0)
+        inventario.registrar_movimiento(self.producto, MovimientoInventario.AJUSTE, -4)
+
+        self.assertEqual(inventario.stock_en(self.producto), 26)
+        self.assertEqual(inventario.stock_en(self.producto, antes_del_corte), 30)
+        self.assertEqual(inventario.tomar_cortes(), 1)
+        self.assertEqual(self.producto.cortes.order_by('-id').first().stock, 26)
+        self.assertEqual(list(inventario.conciliar()), [])
+
+    def test_conciliar_detecta_stock_fuera_del_libro(self):
+        Producto.objects.filter(pk=self.producto.pk).update(stock=F('stock') + 5)
+        self.assertEqual([p.pk for p in inventario.conciliar()], [self.producto.pk])
+
+    def datos_enviados(self, form, **cambios):
+        """Lo que el navegador envía con el formulario tal como se cargó (con los iniciales ocultos)."""
+        datos = {}
+        for campo in form:
+            if campo.value() is not None:
+                datos[campo.html_name] = campo.value()
+            if campo.field.show_hidden_initial:
+                datos[campo.html_initial_name] = campo.initial
+        return {**datos, **cambios}
+
+    def vender_mientras_se_edita(self):
+        fabricas.crear_venta(producto=self.producto, cantidad=3)
+        eventos.procesar_pendientes('stock')
+
+    def assertAjusteSinPisarVentas(self, usuario):
+        self.producto.refresh_from_db()
+        self.assertEqual(self.producto.stock, 22)
+        ajuste = MovimientoInventario.objects.filter(tipo=MovimientoInventario.AJUSTE).latest('id')
+        self.assertEqual((ajuste.cantidad, ajuste.usuario), (5, usuario))
+        self.assertEqual(list(inventario.conciliar()), [])
+
+    def test_editar_aplica_la_diferencia_sin_pisar_ventas(self):
+        administrador = self.producto.creado_por
+        self.client.login(username=administrador.username, password=fabricas.PASSWORD_PRUEBAS)
+        url = reverse('producto_editar', args=[self.producto.pk])
+
+        respuesta = self.client.get(url)
+        self.assertContains(respuesta, '<input type="hidden" name="initial-stock" value="20">', html=True)
+        form = respuesta.context['form']
+        self.vender_mientras_se_edita()
+        respuesta = self.client.post(url, self.datos_enviados(form, stock=25))
+        self.assertRedirects(respuesta, reverse('producto_lista'))
+        self.assertAjusteSinPisarVentas(administrador)
+
+    def test_admin_aplica_la_diferencia_sin_pisar_ventas(self):
+        administrador = self.producto.creado_por
+        self.client.login(username=administrador.username, password=fabricas.PASSWORD_PRUEBAS)
+        url = reverse('admin:tienda_producto_change', args=[self.producto.pk])
+
+        form = self.client.get(url).context['adminform'].form
+        self.vender_mientras_se_edita()
+        respuesta = self.client.post(url, self.datos_enviados(form, stock=25))
+        self.assertEqual(respuesta.status_code, 302)
+        self.assertAjusteSinPisarVentas(administrador)
+
+    def test_admin_lista_editable_aplica_la_diferencia(self):
+        administrador = self.producto.creado_por
+        self.client.login(username=administrador.username, password=fabricas.PASSWORD_PRUEBAS)
+        url = reverse('admin:tienda_producto_changelist')
+
+        formset = self.client.get(url).context['cl'].formset
+        self.vender_mientras_se_edita()
+        datos = {f"{formset.prefix}-{campo}": valor for campo, valor in formset.management_form.initial.items()}
+        datos.update(self.datos_enviados(formset.forms[0], **{f"{formset.forms[0].prefix}-stock": 25}))
+        respuesta = self.client.post(url, {**datos, '_save': 'Guardar'})
+        self.assertEqual(respuesta.status_code, 302)
+        self.assertAjusteSinPisarVentas(administrador)
+
+
+# ===============================================================
+# AJUSTE MASIVO DE PRECIOS
+# ===============================================================
+class PreciosTests(TestCase):
+
+    def setUp(self):
+        self.categoria = fabricas.crear_categoria()
+        self.caro = fabricas.crear_producto(categoria=self.categoria, precio_venta=Decimal('10.00'))
+        self.barato = fabricas.crear_producto(categoria=self.categoria, precio_venta=Decimal('0.50'))
+        self.otro = fabricas.crear_producto(precio_venta=Decimal('10.00'))
+
+    def precios(self):
+        return [Producto.objects.get(pk=p.pk).precio_venta for p in (self.caro, self.barato, self.otro)]
+
+    def test_porcentaje_en_un_solo_update_con_historial(self):
+        with CaptureQueriesContext(connection) as consultas:
+            cambiados = precios.ajustar_precios(precios.filtrar_productos(categoria=self.categoria),
+                                                precios.PORCENTAJE, Decimal('10'), motivo='Inflación')
+        self.assertEqual(cambiados, 2)
+        actualizaciones = [c['sql'] for c in consultas if c['sql'].startswith('UPDATE "tienda_producto"')]
+        self.assertEqual(len(actualizaciones), 1)
+        self.assertEqual(self.precios(), [Decimal('11.00'), Decimal('0.55'), Decimal('10.00')])
+        self.assertEqual(
+            sorted(PrecioHistorico.objects.values_list('precio_anterior', 'precio_nuevo', 'motivo')),
+            [(Decimal('0.50'), Decimal('0.55'), 'Inflación'), (Decimal('10.00'), Decimal('11.00'), 'Inflación')],
+        )
+        self.assertEqual(list(contadores.descuadres()), [])
+
+    def test_monto_negativo_no_deja_precios_bajo_cero(self):
+        call_command('ajustar_precios', monto='-5', categoria=self.categoria.pk, stdout=StringIO())
+        self.assertEqual(self.precios(), [Decimal('5.00'), Decimal('0.00'), Decimal('10.00')])
+        self.assertEqual(PrecioHistorico.objects.get(producto=self.barato).precio_nuevo, Decimal('0.00'))
+
+    def test_comando_rechaza_valores_no_numericos(self):
+        for valor in ('abc', 'NaN'):
+            with self.subTest(valor=valor), self.assertRaises(CommandError):
+                call_command('ajustar_precios', porcentaje=valor, stdout=StringIO())
+        self.assertFalse(PrecioHistorico.objects.exists())
+
+
+# ===============================================================
+# COPIA DEL PRODUCTO EN LA VENTA Y ELIMINACIÓN LÓGICA
+# ===============================================================
+class ProductoEnVentaTests(TestCase):
+
+    def setUp(self):
+        self.producto = fabricas.crear_producto(nombre='Café molido', sku='CAF-001')
+        self.venta = fabricas.crear_venta(producto=self.producto)
+
+    def test_la_venta_conserva_nombre_y_sku(self):
+        Producto.objects.filter(pk=self.producto.pk).update(nombre='Café de grano', sku='CAF-002')
+        self.producto.delete()
+        self.venta.refresh_from_db()
+        self.assertIsNone(self.venta.producto_id)
+        self.assertEqual((self.venta.producto_nombre, self.venta.producto_sku), ('Café molido', 'CAF-001'))
+
+    def test_eliminar_producto_solo_lo_desactiva(self):
+        administrador = fabricas.crear_usuario('administrador', password=fabricas.PASSWORD_PRUEBAS)
+        self.client.login(username=administrador.username, password=fabricas.PASSWORD_PRUEBAS)
+        self.client.post(reverse('producto_eliminar', args=[self.producto.pk]))
+
+        self.producto.refresh_from_db()
+        self.assertFalse(self.producto.activo)
+        self.assertTrue(Venta.objects.filter(pk=self.venta.pk, producto=self.producto).exists())
+        self.assertNotContains(self.client.get(reverse('producto_lista')), 'Café molido')
+        self.assertNotIn(self.producto, forms.VentaForm().fields['producto'].queryset)
+        inicio = self.client.get(reverse('home')).context
+        self.assertEqual(inicio['total_productos'], 0)
+        self.assertNotIn(self.producto, inicio['productos_recientes'])
+        self.assertEqual(list(contadores.descuadres()), [])
+
+
+# ===============================================================
+# ELIMINACIÓN PROGRAMADA DE CATEGORÍAS Y PROVEEDORES
+# ===============================================================
+class EliminacionesTests(TestCase):
+
+    def setUp(self):
+        self.categoria = fabricas.crear_categoria()
+        self.proveedor = fabricas.crear_proveedor()
+        self.productos = [
+            fabricas.crear_producto(categoria=self.categoria, proveedor=self.proveedor, stock=5) for _ in range(3)
+        ]
+        for producto in self.productos:
+            inventario.registrar_ajuste(producto, 0, nota='Stock inicial')
+        self.conservado = fabricas.crear_producto(proveedor=self.proveedor)
+        self.ventas = [fabricas.crear_venta(producto=producto) for producto in self.productos]
+        administrador = fabricas.crear_usuario('administrador', password=fabricas.PASSWORD_PRUEBAS)
+        self.client.login(username=administrador.username, password=fabricas.PASSWORD_PRUEBAS)
+
+    def test_impacto_antes_de_confirmar(self):
+        respuesta = self.client.get(reverse('categoria_eliminar', args=[self.categoria.pk]))
+        self.assertEqual(respuesta.context['impacto'], {'productos': 3, 'ventas': 3, 'movimientos': 3})
+        self.assertEqual(eliminaciones.impacto_proveedor(self.proveedor), {'productos': 4})
+
+    def test_categoria_programada_se_borra_por_lotes(self):
+        url = reverse('categoria_eliminar', args=[self.categoria.pk])
+        self.client.post(url)
+        self.client.post(url)
+        self.assertEqual(EliminacionProgramada.objects.get().estado, EliminacionProgramada.PENDIENTE)
+        self.assertEqual(Tarea.objects.get().nombre, 'procesar_eliminaciones')
+        self.assertTrue(Categoria.objects.filter(pk=self.categoria.pk).exists())
+
+        self.assertEqual(eliminaciones.procesar_pendientes(tamano_lote=2), 1)
+        eliminacion = EliminacionProgramada.objects.get()
+        self.assertEqual(eliminacion.estado, EliminacionProgramada.COMPLETADA)
+        # 3 ventas desligadas + 3 movimientos + 3 productos y sus 3 existencias + la categoría
+        self.assertEqual(eliminacion.filas_afectadas, 13)
+        self.assertFalse(Categoria.objects.filter(pk=self.categoria.pk).exists())
+        self.assertFalse(Producto.objects.filter(pk__in=[p.pk for p in self.productos]).exists())
+        self.assertFalse(MovimientoInventario.objects.filter(producto__isnull=True).exists())
+        ventas = Venta.objects.filter(pk__in=[v.pk for v in self.ventas])
+        self.assertEqual(ventas.filter(producto__isnull=True).count(), 3)
+        self.assertEqual(
+            sorted(RegistroEliminado.objects.values_list('modelo', 'objeto_id')),
+            [('categorias', self.categoria.pk)] + [('productos', p.pk) for p in self.productos],
+        )
+        self.proveedor.refresh_from_db()
+        self.assertEqual(self.proveedor.productos_activos, 1)
+        self.assertEqual(list(contadores.descuadres()), [])
+
+    def test_proveedor_programado_deja_productos_sin_proveedor(self):
+        self.client.post(reverse('proveedor_eliminar', args=[self.proveedor.pk]))
+        eliminaciones.procesar_pendientes(tamano_lote=3)
+        self.assertFalse(Proveedor.objects.filter(pk=self.proveedor.pk).exists())
+        self.assertEqual(Producto.objects.filter(proveedor__isnull=True).count(), 4)
+        self.assertEqual(list(contadores.descuadres()), [])
+
+
+# ===============================================================
+# ARCHIVO DE VENTAS ANTIGUAS
+# ===============================================================
+class ArchivoVentasTests(TestCase):
+
+    def setUp(self):
+        self.cliente = fabricas.crear_cliente()
+        hace_un_anio = timezone.now() - timedelta(days=400)
+        self.antiguas = [
+            fabricas.crear_venta(cliente=self.cliente, cantidad=numero,
+                                 fecha_venta=hace_un_anio + timedelta(hours=numero))
+            for numero in range(1, 6)
+        ]
+        self.reciente = fabricas.crear_venta(cliente=self.cliente)
+
+    def test_mueve_por_lotes_conservando_los_ids(self):
+        antes = archivo.resumen_historico(cliente_id=self.cliente.pk)
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(archivo.archivar_ventas(dias=365, tamano_lote=2), 5)
+        inserciones = [c for c in consultas if c['sql'].startswith('INSERT INTO "tienda_ventaarchivo"')]
+        self.assertEqual(len(inserciones), 3)
+
+        self.assertEqual(list(Venta.objects.values_list('id', flat=True)), [self.reciente.pk])
+        self.assertEqual(
+            list(VentaArchivo.objects.order_by('id').values_list('id', 'cantidad')),
+            [(venta.pk, venta.cantidad) for venta in self.antiguas],
+        )
+        self.assertEqual(archivo.archivar_ventas(dias=365), 0)
+
+        historicas = archivo.ventas_historicas(cliente_id=self.cliente.pk)
+        self.assertEqual([venta['id'] for venta in historicas],
+                         [self.reciente.pk] + [venta.pk for venta in reversed(self.antiguas)])
+        self.assertEqual(archivo.resumen_historico(cliente_id=self.cliente.pk), antes)
+
+
+# ===============================================================
+# SNAPSHOTS DE DÍAS CERRADOS
+# ===============================================================
+class SnapshotsTests(TestCase):
+
+    def setUp(self):
+        directorio = tempfile.mkdtemp(prefix='tienda-snapshots-')
+        self.addCleanup(shutil.rmtree, directorio)
+        ajustes = override_settings(REPORTES_DIR=directorio)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+        self.ayer = timezone.localdate() - timedelta(days=1)
+        self.vendedor = fabricas.crear_usuario('administrador', password=fabricas.PASSWORD_PRUEBAS)
+        self.client.login(username=self.vendedor.username, password=fabricas.PASSWORD_PRUEBAS)
+        self.producto = fabricas.crear_producto(precio_venta=Decimal('8.00'))
+        self.cliente = fabricas.crear_cliente()
+        fabricas.crear_venta(producto=self.producto, cliente=self.cliente,
+                             fecha_venta=timezone.make_aware(datetime.combine(self.ayer, time(10))))
+        reportes.cerrar_dia(self.ayer)
+        eventos.procesar_pendientes('snapshots')
+
+    def api_ventas(self):
+        return self.client.get(reverse('api_ventas'), {'fecha': self.ayer.isoformat()})
+
+    def test_dia_cerrado_se_sirve_del_snapshot(self):
+        with mock.patch.object(reportes, 'ventas_historicas') as consulta:
+            html = self.client.get(reverse('reporte_ventas'), {'fecha': self.ayer.isoformat()})
+            datos = self.api_ventas().json()
+            consulta.assert_not_called()
+        self.assertContains(html, self.producto.nombre)
+        self.assertEqual((datos['cantidad_ventas'], datos['total_ventas_dia']), (1, '8.00'))
+
+    def test_venta_cargada_despues_del_cierre_rehace_el_snapshot(self):
+        self.client.post(reverse('api_ventas_lote'), {'ventas': [{
+            'clave': 'terminal-1-0001', 'cliente': self.cliente.pk, 'producto': self.producto.pk, 'cantidad': 2,
+            'fecha_venta': timezone.make_aware(datetime.combine(self.ayer, time(18))).isoformat(),
+        }]}, content_type='application/json')
+        self.assertEqual(self.api_ventas().json()['cantidad_ventas'], 1)
+
+        eventos.procesar_pendientes('snapshots')
+        datos = self.api_ventas().json()
+        self.assertEqual((datos['cantidad_ventas'], datos['total_ventas_dia']), (2, '24.00'))
+        self.assertContains(self.client.get(reverse('reporte_ventas'), {'fecha': self.ayer.isoformat()}), '24.00')
+
+    def test_ventas_de_dias_sin_cerrar_no_generan_snapshots(self):
+        antier = self.ayer - timedelta(days=1)
+        fabricas.crear_venta(producto=self.producto,
+                             fecha_venta=timezone.make_aware(datetime.combine(antier, time(9))))
+        eventos.procesar_pendientes('snapshots')
+        self.assertFalse(reportes.dia_cerrado(antier))
+
+
+# ===============================================================
+# API DEL CATÁLOGO (ETag / Last-Modified)
+# ===============================================================
+class CatalogoApiTests(TestCase):
+
+    def setUp(self):
+        self.productos = [fabricas.crear_producto(), fabricas.crear_producto()]
+        self.usuario = fabricas.crear_usuario('administrador', password=fabricas.PASSWORD_PRUEBAS)
+        self.client.login(username=self.usuario.username, password=fabricas.PASSWORD_PRUEBAS)
+        self.url = reverse('api_productos')
+
+    def test_catalogo_con_validadores_responde_304(self):
+        respuesta = self.client.get(self.url)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual([p['id'] for p in respuesta.json()['productos']], [p.pk for p in self.productos])
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=respuesta['ETag']).status_code, 304)
+        self.assertEqual(
+            self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=respuesta['Last-Modified']).status_code, 304,
+        )
+
+    def test_todo_update_masivo_cambia_el_etag(self):
+        # Un UPDATE que no asigna fecha_actualizacion no debe dejar el catálogo en caché de los terminales
+        etag = self.client.get(self.url)['ETag']
+        Producto.objects.filter(pk=self.productos[0].pk).update(stock=F('stock') - 1)
+        respuesta = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+
+        self.productos[1].descripcion = 'Nueva descripción'
+        Producto.objects.bulk_update([self.productos[1]], ['descripcion'])
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=respuesta['ETag']).status_code, 200)
+
+    def test_crear_y_editar_por_la_api(self):
+        etag = self.client.get(self.url)['ETag']
+        respuesta = self.client.post(self.url, {
+            'nombre': 'Té verde', 'descripcion': 'Caja', 'precio_venta': '30.00', 'stock': 12,
+            'categoria': self.productos[0].categoria_id, 'activo': True,
+        }, content_type='application/json')
+        self.assertEqual(respuesta.status_code, 201)
+        nuevo = respuesta.json()['id']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        respuesta = self.client.patch(reverse('api_producto_detalle', args=[nuevo]), {'precio_venta': '32.50'},
+                                      content_type='application/json')
+        self.assertEqual((respuesta.json()['precio_venta'], respuesta.json()['stock']), ('32.50', 12))
+        self.assertEqual(PrecioHistorico.objects.get(producto_id=nuevo).precio_anterior, Decimal('30.00'))
+        self.assertNotIn(nuevo, [producto.pk for producto in inventario.conciliar()])
+
+    def test_editar_stock_por_la_api_no_pisa_ventas(self):
+        producto = fabricas.crear_producto(stock=20)
+        inventario.registrar_ajuste(producto, 0, nota='Stock inicial')
+        url = reverse('api_producto_detalle', args=[producto.pk])
+        leido = self.client.get(url).json()['stock']
+        fabricas.crear_venta(producto=producto, cantidad=3)
+        eventos.procesar_pendientes('stock')
+
+        self.assertEqual(self.client.patch(url, {'stock': 25}, content_type='application/json').status_code, 400)
+        respuesta = self.client.patch(url, {'stock': 25, 'stock_anterior': leido}, content_type='application/json')
+        self.assertEqual((respuesta.status_code, respuesta.json()['stock']), (409, 17))
+        respuesta = self.client.patch(url, {'stock': 22, 'stock_anterior': 17}, content_type='application/json')
+        self.assertEqual(respuesta.json()['stock'], 22)
+
+        fabricas.crear_venta(producto=producto, cantidad=2)
+        eventos.procesar_pendientes('stock')
+        respuesta = self.client.patch(url, {'ajuste_stock': 5}, content_type='application/json')
+        self.assertEqual(respuesta.json()['stock'], 25)
+        self.assertNotIn(producto, inventario.conciliar())
+
+
+# ===============================================================
+# SINCRONIZACIÓN DE TERMINALES
+# ===============================================================
+@override_settings(SINCRONIZACION_MARGEN_SEGUNDOS=30)
+class SincronizacionTests(TestCase):
+
+    def setUp(self):
+        self.ahora = timezone.now()
+        self.hace_un_minuto = self.ahora - timedelta(minutes=1)
+        self.productos = [fabricas.crear_producto() for _ in range(3)]
+        Producto.objects.update(fecha_actualizacion=self.hace_un_minuto)
+        Categoria.objects.update(fecha_actualizacion=self.hace_un_minuto)
+        usuario = fabricas.crear_usuario('vendedor', password=fabricas.PASSWORD_PRUEBAS)
+        self.client.login(username=usuario.username, password=fabricas.PASSWORD_PRUEBAS)
+
+    def sincronizar(self, cursor=None):
+        with mock.patch('tienda.api.timezone.now', return_value=self.ahora):
+            respuesta = self.client.get(reverse('api_sincronizar'), {'cursor': cursor} if cursor else {})
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta.json()
+
+    def test_carga_inicial_por_paginas(self):
+        with mock.patch('tienda.api.LIMITE_SINCRONIZACION', 2):
+            primera = self.sincronizar()
+            segunda = self.sincronizar(primera['cursor'])
+        self.assertFalse(primera['completo'])
+        self.assertTrue(segunda['completo'])
+        self.assertEqual([p['id'] for p in primera['productos'] + segunda['productos']],
+                         [p.pk for p in self.productos])
+        self.assertEqual(len(primera['categorias']) + len(segunda['categorias']), 3)
+        self.assertEqual(self.sincronizar(segunda['cursor'])['productos'], [])
+
+    def test_margen_retiene_las_filas_recientes(self):
+        cursor = self.sincronizar()['cursor']
+        limite = self.ahora - timedelta(seconds=30)
+        Producto.objects.filter(pk=self.productos[0].pk).update(fecha_actualizacion=limite)
+        Producto.objects.filter(pk=self.productos[1].pk).update(fecha_actualizacion=limite - timedelta(microseconds=1))
+
+        datos = self.sincronizar(cursor)
+        self.assertEqual([p['id'] for p in datos['productos']], [self.productos[1].pk])
+        # La fila retenida llega en cuanto sale del margen, aunque el cursor ya avanzó
+        self.ahora += timedelta(seconds=1)
+        self.assertEqual([p['id'] for p in self.sincronizar(datos['cursor'])['productos']], [self.productos[0].pk])
+
+    def test_lapidas_de_eliminados(self):
+        cursor = self.sincronizar()['cursor']
+        eliminado = self.productos[2].pk
+        self.productos[2].delete()
+        self.assertEqual(self.sincronizar(cursor)['eliminados'], [])
+
+        self.ahora += timedelta(minutes=1)
+        datos = self.sincronizar(cursor)
+        self.assertEqual(datos['eliminados'], [{'modelo': 'productos', 'id': eliminado}])
+        self.assertEqual(self.sincronizar(datos['cursor'])['eliminados'], [])
+
+    def test_cursor_invalido(self):
+        respuesta = self.client.get(reverse('api_sincronizar'), {'cursor': 'no-es-un-cursor'})
+        self.assertEqual(respuesta.status_code, 400)
+
+
+# ===============================================================
+# CARGA POR LOTES DE VENTAS SIN CONEXIÓN
+# ===============================================================
+class LoteVentasTests(TestCase):
+
+    def setUp(self):
+        self.vendedor = fabricas.crear_usuario('vendedor', password=fabricas.PASSWORD_PRUEBAS)
+        self.client.login(username=self.vendedor.username, password=fabricas.PASSWORD_PRUEBAS)
+        self.cliente = fabricas.crear_cliente()
+        self.producto = fabricas.crear_producto(precio_venta=Decimal('3.00'))
+
+    def item(self, clave, **campos):
+        return {'clave': clave, 'cliente': self.cliente.pk, 'producto': self.producto.pk, 'cantidad': 1, **campos}
+
+    def enviar(self, *items):
+        respuesta = self.client.post(reverse('api_ventas_lote'), {'ventas': list(items)},
+                                     content_type='application/json')
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta.json()['resultados']
+
+    def test_reenviar_el_lote_no_duplica_ventas(self):
+        lote = [self.item('t1-1', cantidad=2), self.item('t1-2'), self.item('t1-1')]
+        primera = self.enviar(*lote)
+        self.assertEqual([r['estado'] for r in primera], ['creada', 'creada', 'duplicada'])
+        self.assertEqual(primera[2]['venta_id'], primera[0]['venta_id'])
+
+        segunda = self.enviar(*lote)
+        self.assertEqual([r['estado'] for r in segunda], ['duplicada'] * 3)
+        self.assertEqual([r['venta_id'] for r in segunda], [r['venta_id'] for r in primera])
+        self.assertEqual(Venta.objects.count(), 2)
+        self.assertEqual(EventoVenta.objects.count(), 2)
+        self.assertEqual(Venta.objects.get(clave_idempotencia='t1-1').total, Decimal('6.00'))
+
+    def test_clave_registrada_por_otra_peticion_se_reintenta(self):
+        insertar = lote_ventas._insertar
+
+        def otra_peticion_gana(pendientes, *args):
+            if insertar_mock.call_count == 1:
+                # Entre la consulta de claves y el INSERT otra petición registró la primera venta
+                insertar(pendientes[:1], *args)
+                raise IntegrityError('Duplicate entry for clave_idempotencia')
+            return insertar(pendientes, *args)
+
+        with mock.patch.object(lote_ventas, '_insertar', side_effect=otra_peticion_gana) as insertar_mock:
+            resultados = lote_ventas.registrar_lote([self.item('t2-1'), self.item('t2-2')], self.vendedor,
+                                                    sucursales.principal_id())
+        self.assertEqual(insertar_mock.call_count, 2)
+        self.assertEqual([r['estado'] for r in resultados], ['duplicada', 'creada'])
+        self.assertEqual(Venta.objects.count(), 2)
+
+    def test_rechaza_fechas_futuras_y_referencias_invalidas(self):
+        inactivo = fabricas.crear_producto(activo=False)
+        resultados = self.enviar(
+            self.item('t3-1', fecha_venta=(timezone.now() + timedelta(hours=1)).isoformat()),
+            self.item('t3-2', cliente=999999),
+            self.item('t3-3', producto=inactivo.pk),
+            self.item('t3-4', fecha_venta='ayer'),
+            self.item('t3-5', fecha_venta=(timezone.now() - timedelta(days=3)).isoformat()),
+        )
+        self.assertEqual([list(r.get('errores', {})) for r in resultados],
+                         [['fecha_venta'], ['cliente'], ['producto'], ['fecha_venta'], []])
+        self.assertEqual(resultados[4]['estado'], 'creada')
+        self.assertEqual(Venta.objects.get().sucursal.codigo, 'MATRIZ')
+
+
+# ===============================================================
+# CONTADORES DE CATEGORÍA Y PROVEEDOR
+# ===============================================================
+class ContadoresTests(TestCase):
+
+    def setUp(self):
+        self.categoria = fabricas.crear_categoria()
+        self.proveedor = fabricas.crear_proveedor()
+        self.producto = fabricas.crear_producto(categoria=self.categoria, proveedor=self.proveedor,
+                                                precio_venta=Decimal('2.50'), stock=12)
+
+    def guardados(self):
+        return [
+            list(modelo.objects.order_by('pk').values_list('pk', 'productos_activos', 'valor_stock',
+                                                           'productos_stock_bajo'))
+            for modelo in (Categoria, Proveedor)
+        ]
+
+    def assertIgualQueRecalcular(self):
+        guardados = self.guardados()
+        contadores.recalcular()
+        self.assertEqual(guardados, self.guardados())
+
+    def test_crear(self):
+        self.assertEqual(self.guardados()[0], [(self.categoria.pk, 1, Decimal('30.00'), 0)])
+        self.assertIgualQueRecalcular()
+
+    def test_editar_precio_stock_y_categoria(self):
+        otra = fabricas.crear_categoria()
+        self.producto.precio_venta = Decimal('4.00')
+        self.producto.stock = 5
+        self.producto.categoria = otra
+        self.producto.save()
+        otra.refresh_from_db()
+        self.assertEqual((otra.productos_activos, otra.valor_stock, otra.productos_stock_bajo),
+                         (1, Decimal('20.00'), 1))
+        self.assertIgualQueRecalcular()
+
+    def test_venta_descontada_por_el_consumidor(self):
+        fabricas.crear_venta(producto=self.producto, cantidad=4)
+        eventos.procesar_pendientes('stock')
+        self.categoria.refresh_from_db()
+        self.assertEqual((self.categoria.valor_stock, self.categoria.productos_stock_bajo), (Decimal('20.00'), 1))
+        self.assertIgualQueRecalcular()
+
+    def test_desactivar_y_reactivar(self):
+        administrador = fabricas.crear_usuario('administrador', password=fabricas.PASSWORD_PRUEBAS)
+        self.client.login(username=administrador.username, password=fabricas.PASSWORD_PRUEBAS)
+        self.client.post(reverse('producto_eliminar', args=[self.producto.pk]))
+        self.assertEqual(self.guardados()[1], [(self.proveedor.pk, 0, Decimal('0.00'), 0)])
+        self.assertIgualQueRecalcular()
+
+        self.producto.refresh_from_db()
+        self.producto.activo = True
+        self.producto.save()
+        self.assertIgualQueRecalcular()
+
+    def test_eliminar(self):
+        self.producto.delete()
+        self.assertEqual(self.guardados()[0], [(self.categoria.pk, 0, Decimal('0.00'), 0)])
+        self.assertIgualQueRecalcular()
+
+    def test_guardar_campos_ajenos_a_los_contadores_no_consulta_el_estado(self):
+        self.producto.descripcion = 'Otra descripción'
+        with self.assertNumQueries(1):
+            self.producto.save(update_fields=['descripcion'])
+        self.assertIgualQueRecalcular()
+
+
+# ===============================================================
+# ADMIN DE TABLAS GRANDES
+# ===============================================================
+class AdminTablasGrandesTests(TestCase):
+
+    def setUp(self):
+        self.ventas = [fabricas.crear_venta(cantidad=1), fabricas.crear_venta(cantidad=3)]
+
+    def test_paginador_estima_solo_sin_filtros(self):
+        with mock.patch('tienda.admin.estimar_filas', return_value=50000):
+            with self.assertNumQueries(0):
+                self.assertEqual(PaginadorEstimado(Venta.objects.all(), 100).count, 50000)
+            self.assertEqual(PaginadorEstimado(Venta.objects.filter(cantidad__gt=1), 100).count, 1)
+        # Tablas pequeñas (o motores sin estadísticas) se cuentan exacto
+        with mock.patch('tienda.admin.estimar_filas', return_value=500):
+            self.assertEqual(PaginadorEstimado(Venta.objects.all(), 100).count, 2)
+        self.assertIsNone(estimar_filas(Venta))
+
+    def test_venta_admin_de_solo_lectura(self):
+        usuario = fabricas.crear_usuario('administrador', password=fabricas.PASSWORD_PRUEBAS, is_staff=True)
+        self.client.login(username=usuario.username, password=fabricas.PASSWORD_PRUEBAS)
+        url = reverse('admin:tienda_venta_changelist')
+
+        respuesta = self.client.get(url, {'q': self.ventas[1].pk})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual([venta.pk for venta in respuesta.context['cl'].result_list], [self.ventas[1].pk])
+        self.assertFalse(respuesta.context['cl'].show_full_result_count)
+        self.assertNotContains(respuesta, reverse('admin:tienda_venta_add'))
+
+        cambio = reverse('admin:tienda_venta_change', args=[self.ventas[0].pk])
+        self.assertEqual(self.client.get(cambio).status_code, 200)
+        self.assertEqual(self.client.post(cambio, {'cantidad': 9}).status_code, 403)
+        borrar = reverse('admin:tienda_venta_delete', args=[self.ventas[0].pk])
+        self.assertEqual(self.client.post(borrar, {'post': 'yes'}).status_code, 403)
+        self.assertEqual(Venta.objects.get(pk=self.ventas[0].pk).cantidad, 1)
+
+
+# ===============================================================
+# ÍNDICES: cada consulta frecuente de las vistas debe usar uno
+# ===============================================================
+@skipUnless(connection.vendor == 'sqlite', 'El plan se revisa con EXPLAIN QUERY PLAN de SQLite')
+class IndicesConsultasTests(TestCase):
+
+    def assertUsaIndice(self, queryset, indice):
+        plan = queryset.explain()
+        self.assertIn(indice, plan, f"La consulta no usa {indice}:\n{plan}")
+
+    def test_listas_ordenadas_por_nombre(self):
+        self.assertUsaIndice(Categoria.objects.all(), 'categoria_nombre_idx')
+        self.assertUsaIndice(Proveedor.objects.all(), 'proveedor_nombre_idx')
+        self.assertUsaIndice(Cliente.objects.all(), 'cliente_apellido_nombre_idx')
+
+    def test_ventas_del_dia(self):
+        # venta_lista y reporte_ventas
+        self.assertUsaIndice(Venta.objects.filter(fecha_venta__range=rango_dia(timezone.localdate())), 'venta_fecha_idx')
+
+    def test_compras_de_un_cliente(self):
+        # mis_compras: ventas recientes y archivadas del cliente, más recientes primero
+        self.assertUsaIndice(Venta.objects.filter(cliente_id=1), 'venta_cliente_fecha_idx')
+        self.assertUsaIndice(VentaArchivo.objects.filter(cliente_id=1).order_by('-fecha_venta'),
+                             'ventaarch_cliente_fecha_idx')
+
+    def test_total_de_compras_sin_leer_la_tabla(self):
+        plan = Venta.objects.filter(cliente_id=1).values('cliente').annotate(
+            total=Sum('total'), cantidad=Count('id'),
+        ).order_by().explain()
+        self.assertIn('COVERING INDEX venta_cliente_fecha_idx', plan)
+
+    def test_ventas_e_inventario_de_una_sucursal(self):
+        # Reportes y home de un empleado de sucursal; stock de la sucursal en la lista de productos
+        rango = rango_dia(timezone.localdate())
+        self.assertUsaIndice(Venta.objects.filter(sucursal_id=1, fecha_venta__range=rango), 'venta_sucursal_fecha_idx')
+        self.assertUsaIndice(VentaArchivo.objects.filter(sucursal_id=1, fecha_venta__range=rango),
+                             'ventaarch_sucursal_fecha_idx')
+        # La restricción única de Existencia; SQLite le da su propio nombre (sqlite_autoindex_...)
+        plan = Existencia.objects.filter(sucursal_id=1, producto_id=1).explain()
+        self.assertIn('USING INDEX', plan)
+        self.assertIn('(sucursal_id=? AND producto_id=?)', plan)
+
+    def test_perfiles_por_rol(self):
+        self.assertUsaIndice(PerfilUsuario.objects.filter(rol='gerente', activo=True), 'perfil_rol_activo_idx')
+
+    def test_sincronizacion_por_fecha_de_actualizacion(self):
+        desde = rango_dia(timezone.localdate())[0]
+        self.assertUsaIndice(
+            Producto.objects.filter(fecha_actualizacion__gte=desde).order_by('fecha_actualizacion', 'id'),
+            'producto_actualizacion_idx',
+        )
+
+
+@skipUnless(connection.vendor == 'mysql', 'El plan se revisa con EXPLAIN de MySQL')
+class IndicesMySQLTests(TestCase):
+
+    def test_productos_activos_por_nombre(self):
+        # producto_lista y el formulario de venta. SQLite compila `WHERE activo` sin comparar
+        # y no usa el índice; MySQL compara `activo = 1`, que es para lo que existe
+        plan = Producto.objects.filter(activo=True).explain()
+        self.assertIn('producto_activo_nombre_idx', plan, plan)
+
+
+# ===============================================================
+# LÍMITE DE INTENTOS DE LOGIN
+# ===============================================================
+@override_settings(LOGIN_INTENTOS_POR_USUARIO=3, LOGIN_INTENTOS_POR_IP=10, LOGIN_SEGUNDOS_POR_INTENTO=60)
+class LimiteLoginTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        fabricas.crear_usuario('vendedor', username='vendedor1', password='clave-segura-123')
+
+    def setUp(self):
+        cache.clear()
+
+    def intentar(self, password, username='vendedor1'):
+        return self.client.post(reverse('login'), {'username': username, 'password': password})
+
+    def test_bloquea_al_agotar_los_intentos_del_usuario(self):
+        for _ in range(3):
+            self.assertEqual(self.intentar('incorrecta').status_code, 200)
+        with mock.patch('django.contrib.auth.forms.authenticate') as autenticar:
+            respuesta = self.intentar('clave-segura-123')
+        self.assertEqual(respuesta.status_code, 429)
+        autenticar.assert_not_called()
+
+    def test_login_correcto_reinicia_los_intentos_del_usuario(self):
+        for _ in range(2):
+            self.intentar('incorrecta')
+        self.assertEqual(self.intentar('clave-segura-123').status_code, 302)
+        self.client.logout()
+        for _ in range(2):
+            self.intentar('incorrecta')
+        self.assertEqual(self.intentar('clave-segura-123').status_code, 302)
+
+    def test_la_ip_se_limita_aunque_cambie_el_usuario(self):
+        for numero in range(10):
+            self.intentar('incorrecta', username=f'usuario{numero}')
+        self.assertEqual(self.intentar('clave-segura-123').status_code, 429)
+
+    def test_intentos_concurrentes_no_superan_el_cupo(self):
+        request = RequestFactory().post('/', REMOTE_ADDR='10.0.0.1')
+        salida = threading.Barrier(12)
+
+        def intentar():
+            salida.wait()
+            return limites.reservar_intento(request, 'vendedor1')
+
+        with ThreadPoolExecutor(max_workers=12) as pool:
+            esperas = list(pool.map(lambda _: intentar(), range(12)))
+        self.assertEqual(esperas.count(0), 3)
+
+    def test_el_cupo_se_recupera_con_el_tiempo(self):
+        request = RequestFactory().post('/', REMOTE_ADDR='10.0.0.2')
+        inicio = 1000 * 180  # Inicio de una ventana de 3 intentos × 60 s
+        with mock.patch('tienda.limites.time.time', return_value=inicio):
+            for _ in range(3):
+                self.assertEqual(limites.reservar_intento(request, 'vendedor1'), 0)
+            self.assertEqual(limites.reservar_intento(request, 'vendedor1'), 240)
+        # En la ventana siguiente los 3 fallos pesan cada vez menos: a los 60 s ya cabe uno
+        with mock.patch('tienda.limites.time.time', return_value=inicio + 180 + 59):
+            self.assertGreater(limites.reservar_intento(request, 'vendedor1'), 0)
+        with mock.patch('tienda.limites.time.time', return_value=inicio + 180 + 60):
+            self.assertEqual(limites.reservar_intento(request, 'vendedor1'), 0)
+
+
+# ===============================================================
+# CONSULTAS LENTAS
+# ===============================================================
+class ConsultasLentasTests(TestCase):
+
+    def setUp(self):
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio)
+        self.archivo = f"{directorio}/consultas_lentas.jsonl"
+        # Umbral 0: se anotan todas las consultas de la petición
+        ajustes = override_settings(CONSULTAS_LENTAS_MS=0, CONSULTAS_LENTAS_ARCHIVO=self.archivo)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        # El logger guarda la ruta del archivo la primera vez: uno nuevo para cada prueba
+        parche = mock.patch.object(consultas_lentas, '_logger', None)
+        parche.start()
+        self.addCleanup(parche.stop)
+        self.addCleanup(self.cerrar_manejadores)
+
+    def cerrar_manejadores(self):
+        logger = logging.getLogger('tienda.consultas_lentas')
+        for manejador in list(logger.handlers):
+            logger.removeHandler(manejador)
+            manejador.close()
+
+    def test_anota_la_vista_el_origen_y_el_explain(self):
+        fabricas.crear_producto()
+        usuario = fabricas.crear_usuario('administrador', password=fabricas.PASSWORD_PRUEBAS)
+        self.client.login(username=usuario.username, password=fabricas.PASSWORD_PRUEBAS)
+
+        self.assertEqual(self.client.get(reverse('producto_lista')).status_code, 200)
+
+        registros = [
+            registro for registro in consultas_lentas.leer_registros(self.archivo)
+            if registro['vista'] == 'producto_lista' and 'FROM "tienda_producto"' in registro['sql']
+        ]
+        self.assertTrue(registros)
+        registro = registros[0]
+        self.assertEqual(registro['metodo'], 'GET')
+        self.assertTrue(registro['origen'].startswith('tienda/views.py:'))
+        # El plan de SQLite (EXPLAIN QUERY PLAN) nombra la tabla recorrida
+        self.assertTrue(registro['explain'])
+        self.assertIn('tienda_producto', str(registro['explain']))
+
+    def test_solo_los_select_llevan_explain(self):
+        producto = fabricas.crear_producto()
+        with connection.execute_wrapper(consultas_lentas.RegistroConsultasLentas()):
+            Producto.objects.filter(pk=producto.pk).update(stock=3)
+
+        registro = next(
+            registro for registro in consultas_lentas.leer_registros(self.archivo)
+            if registro['sql'].startswith('UPDATE')
+        )
+        self.assertIsNone(registro['explain'])
+
+
+# ===============================================================
+# PERFILADOR POR MUESTREO
+# ===============================================================
+class PerfiladorTests(TestCase):
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directorio)
+        fabricas.crear_producto()
+
+    def pedir_perfil(self, usuario):
+        self.client.login(username=usuario.username, password=fabricas.PASSWORD_PRUEBAS)
+        render = views.render
+
+        def render_lento(*args, **kwargs):
+            threading.Event().wait(0.05)  # Da tiempo a tomar varias muestras
+            return render(*args, **kwargs)
+
+        with override_settings(PERFILADOR_DIR=self.directorio, PERFILADOR_INTERVALO_MS=1), \
+                mock.patch('tienda.views.render', side_effect=render_lento):
+            return self.client.get(reverse('producto_lista'), HTTP_X_PERFILAR='1')
+
+    def test_el_personal_recibe_las_pilas_de_su_peticion(self):
+        usuario = fabricas.crear_usuario('administrador', password=fabricas.PASSWORD_PRUEBAS, is_staff=True)
+        respuesta = self.pedir_perfil(usuario)
+
+        self.assertEqual(respuesta.status_code, 200)
+        nombre = respuesta['X-Perfil']
+        self.assertIn('_producto_lista_', nombre)
+        with open(f"{self.directorio}/{nombre}", encoding='utf-8') as archivo:
+            lineas = archivo.read().splitlines()
+        # Formato collapsed: "marco;marco;... muestras", con la vista dentro de la pila
+        pilas = dict(linea.rsplit(' ', 1) for linea in lineas)
+        self.assertTrue(all(int(muestras) > 0 for muestras in pilas.values()))
+        self.assertTrue(any('producto_lista (tienda/views.py:' in pila for pila in pilas))
+
+    def test_sin_ser_personal_no_se_perfila(self):
+        usuario = fabricas.crear_usuario('administrador', password=fabricas.PASSWORD_PRUEBAS)
+        respuesta = self.pedir_perfil(usuario)
+
+        self.assertNotIn('X-Perfil', respuesta)
+        self.assertEqual(os.listdir(self.directorio), [])
+
+
+# ===============================================================
+# MÉTRICAS (/metrics)
+# ===============================================================
+class MetricasTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.producto = fabricas.crear_producto(precio_venta=Decimal('12.50'), stock=11)
+
+    def leer(self):
+        respuesta = self.client.get(reverse('metricas'), REMOTE_ADDR='127.0.0.1')
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta.content.decode()
+
+    def valor(self, texto, nombre):
+        for linea in texto.splitlines():
+            if linea.startswith(f"{nombre} "):
+                return Decimal(linea.split()[-1])
+        self.fail(f"No se encontró la métrica {nombre}")
+
+    def test_ventas_e_inventario_salen_de_los_resumenes(self):
+        fabricas.crear_venta(producto=self.producto, cantidad=2)
+        for nombre in ('stock', 'resumen_diario'):
+            eventos.procesar_pendientes(nombre)
+
+        texto = self.leer()
+        self.assertEqual(self.valor(texto, 'tienda_ventas_hoy'), 1)
+        self.assertEqual(self.valor(texto, 'tienda_ingresos_hoy'), Decimal('25.00'))
+        self.assertEqual(self.valor(texto, 'tienda_productos_activos'), 1)
+        # 11 - 2 = 9 unidades: ya es stock bajo
+        self.assertEqual(self.valor(texto, 'tienda_productos_stock_bajo'), 1)
+        self.assertEqual(self.valor(texto, 'tienda_valor_inventario'), Decimal('112.50'))
+
+    def test_la_latencia_se_agrupa_por_vista(self):
+        self.client.get(reverse('login'))
+        self.assertIn('tienda_peticion_duracion_segundos_count{vista="login"}', self.leer())
+
+    def test_solo_ips_permitidas(self):
+        self.assertEqual(self.client.get(reverse('metricas'), REMOTE_ADDR='10.0.0.8').status_code, 403)
+
+
+# ===============================================================
+# FÁBRICAS
+# ===============================================================
+class FabricasTests(TestCase):
+
+    def test_venta_completa_con_sus_relaciones(self):
+        venta = fabricas.crear_venta(cantidad=3)
+        self.assertEqual(venta.total, venta.producto.precio_venta * 3)
+        self.assertEqual(venta.producto_nombre, venta.producto.nombre)
+        self.assertEqual(venta.vendedor.perfil.rol, 'vendedor')
+        self.assertTrue(EventoVenta.objects.filter(payload__venta_id=venta.pk).exists())
+
+    def test_valores_unicos_y_sobrescribibles(self):
+        proveedor = fabricas.crear_proveedor()
+        productos = [fabricas.crear_producto(proveedor=proveedor) for _ in range(2)]
+        self.assertNotEqual(productos[0].sku, productos[1].sku)
+        self.assertEqual(Proveedor.objects.get().productos_activos, 2)
+        self.assertNotEqual(fabricas.crear_cliente().email, fabricas.crear_cliente().email)
+
+    def test_usuario_sin_password_no_calcula_hash(self):
+        self.assertFalse(fabricas.crear_usuario('gerente').has_usable_password())
+        usuario = fabricas.crear_usuario('administrador', password=fabricas.PASSWORD_PRUEBAS)
+        self.assertTrue(self.client.login(username=usuario.username, password=fabricas.PASSWORD_PRUEBAS))
+
+
+# ===============================================================
+# MIGRACIONES DE DATOS
+# El resto de las pruebas crea las tablas sin migraciones; aquí se
+# vuelve a 0003 y se recorren todas, con sus RunPython, sobre datos
+# creados con los modelos de ese momento.
+# ===============================================================
+@override_settings(MIGRATION_MODULES={})
+class MigracionesTests(TransactionTestCase):
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        # Las tablas ya están en su estado final: se anotan como migradas para poder volver atrás
+        for app, nombre in executor.loader.graph.nodes:
+            executor.recorder.record_applied(app, nombre)
+        self.addCleanup(self.migrar, None)
+
+    def migrar(self, migracion):
+        """Lleva `tienda` a la migración (None: la última) y devuelve sus modelos de ese momento."""
+        executor = MigrationExecutor(connection)
+        destino = [('tienda', migracion)] if migracion else executor.loader.graph.leaf_nodes('tienda')
+        executor.migrate(destino)
+        return executor.loader.project_state(destino).apps
+
+    def test_las_migraciones_de_datos_completan_lo_existente(self):
+        apps = self.migrar('0003_eventoventa_puntocontrol')
+        categoria = apps.get_model('tienda', 'Categoria').objects.create(nombre='Abarrotes')
+        producto = apps.get_model('tienda', 'Producto').objects.create(
+            nombre='Arroz', descripcion='1 kg', precio_venta=Decimal('20.00'), stock=8, categoria=categoria,
+        )
+        cliente = apps.get_model('tienda', 'Cliente').objects.create(
+            nombre='Ana', apellido='Ruiz', email='ana@tienda.test', telefono='6620000000', direccion='Centro',
+        )
+        venta = apps.get_model('tienda', 'Venta').objects.create(
+            cliente=cliente, producto=producto, cantidad=2, precio_unitario=Decimal('20.00'), total=Decimal('40.00'),
+        )
+
+        self.migrar(None)
+
+        producto = Producto.objects.get(pk=producto.pk)
+        # 0004: el stock de ese momento es el corte inicial del libro
+        self.assertEqual(list(producto.cortes.values_list('stock', flat=True)), [8])
+        self.assertEqual(list(inventario.conciliar()), [])
+        # 0006: la venta conserva el nombre del producto
+        venta = Venta.objects.get(pk=venta.pk)
+        self.assertEqual(venta.producto_nombre, 'Arroz')
+        # 0012 y 0015: contadores de la categoría
+        categoria = Categoria.objects.get(pk=categoria.pk)
+        self.assertEqual(
+            (categoria.productos_activos, categoria.valor_stock, categoria.productos_stock_bajo),
+            (1, Decimal('160.00'), 1),
+        )
+        # 0015: resumen del día con la venta ya registrada
+        resumen = ResumenVentasDia.objects.get(fecha=timezone.localdate(venta.fecha_venta))
+        self.assertEqual((resumen.ventas, resumen.ingresos), (1, Decimal('40.00')))
+        # 0020: la venta y el stock quedan en la sucursal principal
+        self.assertEqual(venta.sucursal.codigo, 'MATRIZ')
+        self.assertEqual(list(producto.existencias.values_list('sucursal__codigo', 'cantidad')), [('MATRIZ', 8)])
+
+    @override_settings(SUCURSAL_PRINCIPAL='CENTRO')
+    def test_la_sucursal_principal_sale_de_settings(self):
+        apps = self.migrar('0019_sugerencia_pedido')
+        categoria = apps.get_model('tienda', 'Categoria').objects.create(nombre='Abarrotes')
+        apps.get_model('tienda', 'Producto').objects.create(
+            nombre='Arroz', descripcion='1 kg', precio_venta=Decimal('20.00'), stock=8, categoria=categoria,
+        )
+
+        self.migrar(None)
+
+        self.assertEqual(list(Sucursal.objects.values_list('codigo', flat=True)), ['CENTRO'])
+        self.assertEqual(Existencia.objects.get().sucursal_id, sucursales.principal_id())
+
+
+# ===============================================================
+# DATOS SINTÉTICOS (generar_datos)
+# ===============================================================
+class GenerarDatosTests(TestCase):
+
+    def generar(self, **opciones):
+        valores = dict(categorias=3, proveedores=2, productos=40, clientes=25, empleados=10, ventas=300,
+                       dias=14, lote=50, semilla=5, prefijo='t', stdout=StringIO())
+        valores.update(opciones)
+        call_command('generar_datos', **valores)
+
+    def test_genera_todas_las_tablas_con_contadores_cuadrados(self):
+        # Un producto que ya tenía libro descuenta lo que vendan las ventas generadas
+        existente = fabricas.crear_producto(stock=1000)
+        inventario.registrar_ajuste(existente, 0, nota='Stock inicial')
+        self.generar()
+        self.assertEqual(Producto.objects.count(), 41)
+        self.assertEqual(Cliente.objects.count(), 25)
+        self.assertEqual(PerfilUsuario.objects.filter(rol='vendedor').count(), 7)
+        self.assertEqual(Venta.objects.count(), 300)
+        self.assertEqual(ResumenVentasDia.objects.aggregate(n=Sum('ventas'))['n'], 300)
+        # SQLite suma los decimales como flotantes: se comparan al centavo
+        self.assertAlmostEqual(ResumenVentasDia.objects.aggregate(i=Sum('ingresos'))['i'],
+                               Venta.objects.aggregate(i=Sum('total'))['i'], places=2)
+        self.assertEqual(list(contadores.descuadres()), [])
+
+        # Libro de inventario: un ajuste inicial por producto generado y un movimiento por venta
+        self.assertEqual(list(inventario.conciliar()), [])
+        self.assertEqual(MovimientoInventario.objects.filter(tipo=MovimientoInventario.VENTA).count(), 300)
+        vendidas = Venta.objects.filter(producto=existente).aggregate(n=Sum('cantidad'))['n'] or 0
+        existente.refresh_from_db()
+        self.assertEqual(existente.stock, 1000 - vendidas)
+        self.assertEqual(Existencia.objects.aggregate(n=Sum('cantidad'))['n'],
+                         Producto.objects.aggregate(n=Sum('stock'))['n'])
+
+    def test_misma_semilla_mismos_datos(self):
+        self.generar(ventas=0)
+        primeros = list(Producto.objects.order_by('sku').values_list('sku', 'precio_venta', 'stock'))
+        Producto.objects.all().delete()
+        self.generar(categorias=0, proveedores=0, clientes=0, empleados=0, ventas=0)
+        self.assertEqual(primeros, list(Producto.objects.order_by('sku').values_list('sku', 'precio_venta', 'stock')))
+
+
+# ===============================================================
+# COLA DE TAREAS
+# ===============================================================
+@tareas.tarea('prueba_falla')
+def _tarea_que_falla():
+    raise RuntimeError('falla de prueba')
+
+
+class TareasTests(TestCase):
+
+    def setUp(self):
+        self.vendedor = fabricas.crear_usuario('vendedor', password=fabricas.PASSWORD_PRUEBAS)
+        self.client.login(username=self.vendedor.username, password=fabricas.PASSWORD_PRUEBAS)
+
+    def ejecutar_pendientes(self):
+        for tarea in tareas.tomar(10, 'pruebas'):
+            tareas.ejecutar(tarea)
+
+    def test_cliente_crear_encola_su_usuario(self):
+        respuesta = self.client.post(reverse('cliente_crear'), {
+            'nombre': 'Marta', 'apellido': 'Ruiz', 'email': 'marta@example.com',
+            'telefono': '6621234567', 'direccion': 'Centro',
+        })
+        self.assertRedirects(respuesta, reverse('cliente_lista'))
+        cliente = Cliente.objects.get(email='marta@example.com')
+        # El usuario ya existe (reserva el nombre); la contraseña llega con la tarea
+        self.assertEqual(cliente.user.perfil.rol, 'cliente')
+        self.assertFalse(cliente.user.has_usable_password())
+        self.assertEqual(Tarea.objects.get().nombre, 'crear_usuario_cliente')
+
+        self.ejecutar_pendientes()
+        cliente.user.refresh_from_db()
+        self.assertTrue(cliente.user.check_password('6621234567'))
+        self.assertEqual(Tarea.objects.get().estado, Tarea.COMPLETADA)
+
+    def test_nombre_de_usuario_reservado_antes_de_la_tarea(self):
+        datos = {'nombre': 'Marta', 'apellido': 'Ruiz', 'email': 'marta@example.com',
+                 'telefono': '6621234567', 'direccion': 'Centro'}
+        self.client.post(reverse('cliente_crear'), datos)
+        # Sin correr la tarea, otro cliente con el mismo nombre ya no puede tomar el usuario
+        respuesta = self.client.post(reverse('api_clientes'), dict(datos, email='marta2@example.com'),
+                                     content_type='application/json')
+        self.assertEqual(respuesta.status_code, 409)
+        self.assertEqual(Cliente.objects.count(), 1)
+        self.assertEqual(Tarea.objects.count(), 1)
+
+    def test_cliente_eliminar_borra_ventas_en_segundo_plano(self):
+        venta = fabricas.crear_venta()
+        for _ in range(2):
+            self.client.post(reverse('cliente_eliminar', args=[venta.cliente_id]))
+        self.assertTrue(Cliente.objects.filter(pk=venta.cliente_id).exists())
+        self.assertEqual(Tarea.objects.filter(nombre='eliminar_cliente').count(), 1)
+        self.ejecutar_pendientes()
+        self.assertFalse(Cliente.objects.filter(pk=venta.cliente_id).exists())
+        self.assertFalse(Venta.objects.filter(pk=venta.pk).exists())
+
+    def test_admin_elimina_clientes_con_la_tarea(self):
+        ventas = [fabricas.crear_venta(), fabricas.crear_venta()]
+        usuario = fabricas.crear_usuario('administrador', password=fabricas.PASSWORD_PRUEBAS, is_staff=True)
+        self.client.login(username=usuario.username, password=fabricas.PASSWORD_PRUEBAS)
+
+        borrar = reverse('admin:tienda_cliente_delete', args=[ventas[0].cliente_id])
+        self.assertEqual(self.client.get(borrar).status_code, 200)
+        self.client.post(borrar, {'post': 'yes'})
+        self.client.post(reverse('admin:tienda_cliente_changelist'), {
+            'action': 'delete_selected', 'post': 'yes', helpers.ACTION_CHECKBOX_NAME: [v.cliente_id for v in ventas],
+        })
+        self.assertEqual(Cliente.objects.count(), 2)
+        self.assertEqual(Tarea.objects.filter(nombre='eliminar_cliente').count(), 2)
+
+        self.ejecutar_pendientes()
+        self.assertFalse(Cliente.objects.exists())
+        self.assertFalse(Venta.objects.exists())
+
+    def test_una_tarea_tomada_no_se_vuelve_a_tomar(self):
+        tareas.encolar('prueba_falla')
+        self.assertEqual(len(tareas.tomar(5, 'uno')), 1)
+        self.assertEqual(tareas.tomar(5, 'dos'), [])
+
+    def test_reintentos_con_espera_hasta_el_maximo(self):
+        tareas.encolar('prueba_falla', max_intentos=2)
+        with self.assertLogs('tienda.tareas', 'WARNING'):
+            self.ejecutar_pendientes()
+        tarea = Tarea.objects.get()
+        self.assertEqual((tarea.estado, tarea.intentos), (Tarea.PENDIENTE, 1))
+        self.assertGreater(tarea.disponible_en, timezone.now())
+        self.assertIn('falla de prueba', tarea.error)
+
+        Tarea.objects.update(disponible_en=timezone.now())
+        with self.assertLogs('tienda.tareas', 'ERROR'):
+            self.ejecutar_pendientes()
+        self.assertEqual(Tarea.objects.get().estado, Tarea.ERROR)
+
+
+# ===============================================================
+# RECIBOS
+# ===============================================================
+class RecibosTests(TestCase):
+
+    def setUp(self):
+        usuario = fabricas.crear_usuario('cliente', password=fabricas.PASSWORD_PRUEBAS)
+        self.venta = fabricas.crear_venta(cliente=fabricas.crear_cliente(user=usuario), cantidad=2)
+        self.client.login(username=usuario.username, password=fabricas.PASSWORD_PRUEBAS)
+        self.url = reverse('venta_recibo', args=[self.venta.pk])
+
+    def test_segunda_descarga_sale_de_la_cache(self):
+        respuesta = self.client.get(self.url)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIn(self.venta.producto_nombre, b''.join(respuesta.streaming_content).decode())
+
+        with mock.patch.object(recibos, 'renderizar') as renderizar:
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+            renderizar.assert_not_called()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=respuesta['ETag']).status_code, 304)
+
+    def test_cliente_no_ve_recibos_ajenos(self):
+        ajena = fabricas.crear_venta()
+        self.assertEqual(self.client.get(reverse('venta_recibo', args=[ajena.pk])).status_code, 404)
+
+    def test_generar_dia_solo_crea_los_faltantes(self):
+        hoy = timezone.localdate()
+        self.assertEqual(recibos.generar_dia(hoy, procesos=1), 1)
+        self.assertEqual(recibos.generar_dia(hoy, procesos=1), 0)
+        # Si la venta cambia, su huella también: el recibo se vuelve a generar
+        Venta.objects.filter(pk=self.venta.pk).update(producto_nombre='Otro nombre')
+        self.assertEqual(recibos.generar_dia(hoy, procesos=1), 1)
+
+    def test_dos_hilos_generan_el_mismo_recibo(self):
+        datos = list(archivo.ventas_historicas(pk=self.venta.pk))[0]
+        # Los dos hilos abren su temporal antes de que cualquiera termine de renderizar
+        juntos = threading.Barrier(2, timeout=5)
+
+        def renderizar(datos, formato):
+            juntos.wait()
+            return b'recibo'
+
+        with mock.patch.object(recibos, 'renderizar', renderizar), ThreadPoolExecutor(2) as pool:
+            rutas = [futuro.result() for futuro in [pool.submit(recibos.obtener, datos) for _ in range(2)]]
+        self.assertEqual(rutas[0], rutas[1])
+        with open(rutas[0][1], 'rb') as recibo:
+            self.assertEqual(recibo.read(), b'recibo')
+        self.assertFalse([nombre for nombre in os.listdir(os.path.dirname(rutas[0][1])) if nombre.endswith('.tmp')])
+
+
+# ===============================================================
+# RESUMEN DE COMPRAS DEL CLIENTE
+# ===============================================================
+class ComprasClienteTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.usuario = fabricas.crear_usuario('cliente', password=fabricas.PASSWORD_PRUEBAS, email='otro@example.com')
+        self.cliente = fabricas.crear_cliente(user=self.usuario)
+        self.client.login(username=self.usuario.username, password=fabricas.PASSWORD_PRUEBAS)
+
+    def test_home_usa_la_relacion_con_el_usuario(self):
+        propia = fabricas.crear_venta(cliente=self.cliente)
+        # Otro cliente con el email del usuario: antes aparecían sus compras
+        fabricas.crear_venta(cliente=fabricas.crear_cliente(email=self.usuario.email))
+        resumen = self.client.get(reverse('home')).context['resumen']
+        self.assertEqual([compra['id'] for compra in resumen['recientes']], [propia.pk])
+
+    def test_resumen_incluye_archivadas_y_ordena_favoritos(self):
+        producto = fabricas.crear_producto(precio_venta=Decimal('5.00'))
+        fabricas.crear_venta(cliente=self.cliente, producto=producto, cantidad=4)
+        fabricas.crear_venta(cliente=self.cliente, cantidad=1)
+        VentaArchivo.objects.create(
+            id=999, cliente=self.cliente, producto=producto, producto_nombre=producto.nombre,
+            cantidad=2, precio_unitario=Decimal('5.00'), total=Decimal('10.00'), fecha_venta=timezone.now(),
+        )
+        datos = self.client.get(reverse('api_mis_compras')).json()
+        self.assertEqual(datos['totales']['cantidad'], 3)
+        self.assertEqual(len(datos['meses']), compras_cliente.MESES)
+        self.assertEqual(datos['meses'][-1]['compras'], 3)
+        self.assertEqual((datos['favoritos'][0]['producto_id'], datos['favoritos'][0]['unidades']), (producto.pk, 6))
+
+    def test_cache_se_invalida_con_nuevas_ventas(self):
+        fabricas.crear_venta(cliente=self.cliente)
+        eventos.procesar_pendientes('resumen_clientes')
+        self.assertEqual(compras_cliente.resumen(self.cliente.pk)['totales']['cantidad'], 1)
+        with mock.patch.object(compras_cliente, 'calcular') as calcular:
+            compras_cliente.resumen(self.cliente.pk)
+            calcular.assert_not_called()
+
+        fabricas.crear_venta(cliente=self.cliente)
+        eventos.procesar_pendientes('resumen_clientes')
+        self.assertEqual(compras_cliente.resumen(self.cliente.pk)['totales']['cantidad'], 2)
+
+
+# ===============================================================
+# MATRIZ DE PERMISOS
+# ===============================================================
+class PermisosTests(TestCase):
+    # URLs sin permiso de la matriz: públicas o que solo piden sesión
+    SIN_PERMISO = {'login', 'logout', 'home', 'home_view', 'mi_perfil', 'metricas'}
+
+    def _rutas(self):
+        for patron in get_resolver('tienda.urls').url_patterns:
+            argumentos = {nombre: 999999 for nombre in patron.pattern.converters}
+            yield patron.name, reverse(patron.name, kwargs=argumentos), patron.callback
+
+    def test_toda_url_tiene_permiso(self):
+        for nombre, _, vista in self._rutas():
+            with self.subTest(url=nombre):
+                if nombre in self.SIN_PERMISO:
+                    continue
+                self.assertTrue(getattr(vista, 'permisos_requeridos', None), f"{nombre} no declara permisos")
+
+    def test_cada_rol_segun_la_matriz(self):
+        for rol, _ in PerfilUsuario.ROLES:
+            usuario = fabricas.crear_usuario(rol, password=fabricas.PASSWORD_PRUEBAS)
+            self.client.login(username=usuario.username, password=fabricas.PASSWORD_PRUEBAS)
+            for nombre, url, vista in self._rutas():
+                requeridos = getattr(vista, 'permisos_requeridos', None)
+                if not requeridos:
+                    continue
+                with self.subTest(rol=rol, url=nombre):
+                    respuesta = self.client.get(url)
+                    # La API responde 403; las vistas HTML redirigen al home con el aviso
+                    denegado = respuesta.status_code == 403 or (
+                        respuesta.status_code == 302 and respuesta.url == reverse('home')
+                    )
+                    self.assertEqual(denegado, not permisos.puede(usuario, *requeridos))
+            self.client.logout()
+
+    def test_gerente_ve_productos_pero_no_los_edita(self):
+        gerente = fabricas.crear_usuario('gerente', password=fabricas.PASSWORD_PRUEBAS)
+        self.client.login(username=gerente.username, password=fabricas.PASSWORD_PRUEBAS)
+        fabricas.crear_producto()
+        respuesta = self.client.get(reverse('producto_lista'))
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertNotContains(respuesta, 'Nuevo Producto')
+        self.assertEqual(self.client.patch(reverse('api_productos')).status_code, 405)
+        self.assertEqual(self.client.post(reverse('api_productos'), {}, content_type='application/json').status_code, 403)
+
+    def test_matriz_rechaza_entradas_desconocidas(self):
+        with self.assertRaises(ImproperlyConfigured):
+            permisos._compilar({'producto': {'publicar': ('administrador',)}})
+        with self.assertRaises(ImproperlyConfigured):
+            permisos._compilar({'producto': {'ver': ('cajero',)}})
+        with self.assertRaises(ImproperlyConfigured):
+            permisos.validar('producto.publicar')
+
+
+# ===============================================================
+# PRONÓSTICO DE PEDIDOS
+# ===============================================================
+class PronosticoTests(TestCase):
+
+    def setUp(self):
+        self.hoy = timezone.localdate()
+        self.cliente = fabricas.crear_cliente()
+        self.vendedor = fabricas.crear_usuario('vendedor')
+
+    def vender_cada_dia(self, producto, cantidad, dias=28):
+        for atras in range(dias):
+            fecha = timezone.make_aware(datetime.combine(self.hoy - timedelta(days=atras), time(12)))
+            fabricas.crear_venta(cliente=self.cliente, vendedor=self.vendedor, producto=producto,
+                                 cantidad=cantidad, fecha_venta=fecha)
+
+    def test_sugiere_segun_velocidad_de_venta(self):
+        proveedor = Proveedor.objects.create(nombre='Distribuidora')
+        escaso = fabricas.crear_producto(stock=5, proveedor=proveedor)
+        sobrado = fabricas.crear_producto(stock=1000, proveedor=proveedor)
+        self.vender_cada_dia(escaso, 2)
+        self.vender_cada_dia(sobrado, 1)
+
+        self.assertEqual(pronostico.generar(self.hoy), 1)
+        sugerencia = SugerenciaPedido.objects.get()
+        self.assertEqual((sugerencia.producto_id, sugerencia.proveedor_id), (escaso.pk, proveedor.pk))
+        self.assertEqual((sugerencia.promedio_diario, sugerencia.demanda_diaria), (Decimal('2.00'), Decimal('2.00')))
+        self.assertEqual(sugerencia.dias_restantes, Decimal('2.5'))
+        # Ventas constantes: sin stock de seguridad, 2 × (7 + 14) días − 5 en stock
+        self.assertEqual(sugerencia.cantidad_sugerida, 37)
+
+        gerente = fabricas.crear_usuario('gerente', password=fabricas.PASSWORD_PRUEBAS)
+        self.client.login(username=gerente.username, password=fabricas.PASSWORD_PRUEBAS)
+        respuesta = self.client.get(reverse('pedidos_sugeridos'))
+        self.assertContains(respuesta, 'Distribuidora')
+        self.assertContains(respuesta, escaso.nombre)
+        self.assertNotContains(respuesta, sobrado.nombre)
+
+    def test_regenerar_reemplaza_las_del_dia(self):
+        self.vender_cada_dia(fabricas.crear_producto(stock=0), 1, dias=3)
+        pronostico.generar(self.hoy)
+        pronostico.generar(self.hoy)
+        self.assertEqual(SugerenciaPedido.objects.filter(fecha=self.hoy).count(), 1)
+
+    def test_cuenta_las_ventas_archivadas_dentro_de_la_ventana(self):
+        producto = fabricas.crear_producto()
+        self.vender_cada_dia(producto, 2, dias=7)
+        esperado = pronostico.ventas_diarias(self.hoy, 7)
+        # Un archivado con menos días que VENTAS_DIAS_ARCHIVO mueve ventas de la ventana
+        self.assertGreater(archivo.archivar_ventas(dias=3), 0)
+        self.assertEqual(pronostico.ventas_diarias(self.hoy, 7), esperado)
+        self.assertEqual(esperado[producto.pk], [2] * 7)
+
+    @skipUnless(pronostico.np is not None, 'NumPy no está instalado')
+    def test_numpy_y_python_coinciden(self):
+        series = [[(dia * producto) % 7 for dia in range(28)] for producto in range(1, 20)]
+        stocks = list(range(0, 190, 10))
+        pesos = pronostico.pesos_exponenciales(28, 7)
+        vectorizado = pronostico._calcular_numpy(series, stocks, pesos, 7, 14)
+        for esperado, obtenido in zip(pronostico._calcular_python(series, stocks, pesos, 7, 14), vectorizado):
+            self.assertAlmostEqual(esperado[1], obtenido[1])
+            self.assertEqual(esperado[3], obtenido[3])
+
+
+# ===============================================================
+# SUCURSALES
+# ===============================================================
+class SucursalesTests(TestCase):
+
+    def setUp(self):
+        self.centro = Sucursal.objects.create(codigo='CENTRO', nombre='Centro')
+        self.norte = Sucursal.objects.create(codigo='NORTE', nombre='Norte')
+        self.producto = fabricas.crear_producto(stock=30)
+        sucursales.mover_existencias({(self.centro.pk, self.producto.pk): 10, (self.norte.pk, self.producto.pk): 20})
+
+    def empleado(self, rol, sucursal):
+        usuario = fabricas.crear_usuario(rol, password=fabricas.PASSWORD_PRUEBAS)
+        PerfilUsuario.objects.filter(user=usuario).update(sucursal=sucursal)
+        self.client.login(username=usuario.username, password=fabricas.PASSWORD_PRUEBAS)
+        return usuario
+
+    def existencia(self, sucursal):
+        return Existencia.objects.get(sucursal=sucursal, producto=self.producto).cantidad
+
+    def test_venta_descuenta_la_existencia_de_su_sucursal(self):
+        self.empleado('vendedor', self.centro)
+        respuesta = self.client.post(reverse('venta_crear'), {
+            'cliente': fabricas.crear_cliente().pk, 'producto': self.producto.pk, 'cantidad': 3,
+            # Un empleado de sucursal no puede registrar en otra
+            'sucursal': self.norte.pk,
+        })
+        self.assertEqual(respuesta.status_code, 302)
+        self.assertEqual(Venta.objects.get().sucursal_id, self.centro.pk)
+
+        eventos.procesar_pendientes('stock')
+        self.producto.refresh_from_db()
+        self.assertEqual((self.existencia(self.centro), self.existencia(self.norte), self.producto.stock), (7, 20, 27))
+
+    def test_reportes_y_ventas_limitados_a_la_sucursal(self):
+        propia = fabricas.crear_venta(producto=self.producto, sucursal=self.centro)
+        ajena = fabricas.crear_venta(producto=self.producto, sucursal=self.norte)
+        self.empleado('administrador', self.centro)
+
+        datos = self.client.get(reverse('api_ventas')).json()
+        self.assertEqual([venta['id'] for venta in datos['ventas_hoy']], [propia.pk])
+        self.assertEqual(datos['sucursal'], 'Centro')
+        self.assertEqual(self.client.get(reverse('venta_eliminar', args=[ajena.pk])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('venta_recibo', args=[ajena.pk])).status_code, 404)
+        self.assertContains(self.client.get(reverse('producto_lista')), 'Stock en Centro')
+
+    def test_oficina_central_ve_toda_la_cadena(self):
+        fabricas.crear_venta(producto=self.producto, sucursal=self.centro)
+        fabricas.crear_venta(producto=self.producto, sucursal=self.norte)
+        # Sin sucursal asignada la venta va a la principal
+        sin_sucursal = fabricas.crear_venta(producto=self.producto)
+        self.assertEqual(sin_sucursal.sucursal.codigo, 'MATRIZ')
+        self.empleado('administrador', None)
+        self.assertEqual(self.client.get(reverse('api_ventas')).json()['cantidad_ventas'], 3)
+
+    def test_ajuste_de_stock_mueve_la_existencia(self):
+        self.empleado('administrador', self.norte)
+        self.client.post(reverse('producto_editar', args=[self.producto.pk]), {
+            'nombre': self.producto.nombre, 'descripcion': 'x', 'precio_venta': '10.00', 'stock': 35,
+            'initial-stock': self.producto.stock, 'categoria': self.producto.categoria_id, 'activo': 'on',
+        })
+        self.assertEqual((self.existencia(self.centro), self.existencia(self.norte)), (10, 25))
+
+    def test_cerrar_dia_guarda_un_snapshot_por_sucursal(self):
+        fabricas.crear_venta(producto=self.producto, sucursal=self.norte)
+        hoy = timezone.localdate()
+        reportes.cerrar_dia(hoy)
+        self.assertIn('Sucursal Norte', reportes.leer_snapshot(hoy, sucursal_id=self.norte.pk))
+        self.assertIn('No hay ventas', reportes.leer_snapshot(hoy, sucursal_id=self.centro.pk))
+        self.assertIsNotNone(reportes.leer_snapshot(hoy))
@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import views, api
 
 urlpatterns = [
     # Autenticación
@@ -39,9 +39,25 @@ urlpatterns = [
     path('ventas/crear/', views.venta_crear, name='venta_crear'),    # Crear venta
     path('ventas/eliminar/<int:pk>/', views.venta_eliminar, name='venta_eliminar'),  # Eliminar venta
     path('ventas/reporte/', views.reporte_ventas, name='reporte_ventas'),  # Reporte de ventas
+    path('ventas/<int:pk>/recibo/', views.venta_recibo, name='venta_recibo'),  # Recibo imprimible
+    path('pedidos/sugeridos/', views.pedidos_sugeridos, name='pedidos_sugeridos'),  # Pronóstico de compras
     path('ventas/crear/', views.venta_crear, name='venta_form'),
 
     path('mi-perfil/', views.mi_perfil, name='mi_perfil'),
     path('mis-compras/', views.mis_compras, name='mis_compras'),
 
+    # API JSON para terminales de punto de venta
+    path('api/productos/', api.productos, name='api_productos'),
+    path('api/productos/<int:pk>/', api.producto_detalle, name='api_producto_detalle'),
+    path('api/clientes/', api.clientes, name='api_clientes'),
+    path('api/clientes/<int:pk>/', api.cliente_detalle, name='api_cliente_detalle'),
+    path('api/clientes/<int:pk>/compras/', api.cliente_compras, name='api_cliente_compras'),
+    path('api/mis-compras/', api.mis_compras, name='api_mis_compras'),
+    path('api/ventas/', api.ventas, name='api_ventas'),
+    path('api/ventas/lote/', api.ventas_lote, name='api_ventas_lote'),
+    path('api/sincronizar/', api.sincronizar, name='api_sincronizar'),
+
+    # Métricas para Prometheus
+    path('metrics', views.metricas_prometheus, name='metricas'),
+
 ]
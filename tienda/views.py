@@ -5,15 +5,36 @@
 
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.contrib.auth import authenticate, login, logout
+from django.contrib.auth import login, logout
 from django.contrib import messages
 from django.contrib.auth.forms import AuthenticationForm
-from .models import Producto, Categoria, Proveedor, Cliente, PerfilUsuario, Venta
+from .models import Producto, Categoria, Proveedor, Cliente, PerfilUsuario, Venta, SugerenciaPedido, Sucursal
 from .forms import ProductoForm, CategoriaForm, ProveedorForm, ClienteForm, VentaForm, PerfilUsuarioForm, ClientePerfilForm
+from .forms import stock_visto
+from .inventario import guardar_con_ajuste, registrar_ajuste
+from .precios import registrar_cambio_precio
+from . import eliminaciones
+from .archivo import ventas_historicas, resumen_historico
+from . import reportes
+from . import contadores
+from . import limites
+from . import metricas
+from . import tareas
+from . import recibos
+from . import compras_cliente
+from . import permisos
+from . import pronostico
+from . import sucursales
 from django.contrib.auth.views import LoginView, LogoutView
 from django.utils import timezone
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils.dateparse import parse_date
 from datetime import datetime, time
 from django.contrib.auth.models import User
+from django.conf import settings
+from functools import wraps
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseForbidden, HttpResponseNotModified
 
 class CustomLoginView(LoginView):
     template_name = 'tienda/login.html'
@@ -22,32 +43,35 @@ class CustomLogoutView(LogoutView):
     next_page = 'login'
 
 # ===============================================================
-# DECORADOR PERSONALIZADO PARA ROLES
+# DECORADOR DE PERMISOS (matriz de tienda/permisos.py)
 # ===============================================================
-def rol_requerido(*roles_permitidos):
+def permiso_requerido(*permisos_requeridos):
     """
-    Verifica si el usuario tiene uno de los roles permitidos.
+    Verifica en la matriz de tienda/permisos.py que el usuario tenga uno
+    de los permisos ('modelo.accion').
     """
+    for permiso in permisos_requeridos:
+        permisos.validar(permiso)
+
     def decorator(view_func):
+        @wraps(view_func)
         def _wrapped_view(request, *args, **kwargs):
             if not request.user.is_authenticated:
                 messages.error(request, 'Debes iniciar sesión para acceder.')
                 return redirect('login')
 
-            if request.user.is_superuser:
+            if permisos.puede(request.user, *permisos_requeridos):
                 return view_func(request, *args, **kwargs)
 
-            try:
-                perfil = request.user.perfil
-                if perfil.rol in roles_permitidos:
-                    return view_func(request, *args, **kwargs)
-                else:
-                    messages.error(request, f'⚠️ Acceso denegado. Rol requerido: {", ".join(roles_permitidos)}')
-                    return redirect('home')
-            except PerfilUsuario.DoesNotExist:
+            if not request.user.is_superuser and not hasattr(request.user, 'perfil'):
                 messages.error(request, 'Tu cuenta no tiene un perfil asignado.')
-                return redirect('home')
+            else:
+                roles = {rol for permiso in permisos_requeridos for rol in permisos.roles_con(permiso)}
+                messages.error(request, f'⚠️ Acceso denegado. Rol requerido: {", ".join(sorted(roles))}')
+            return redirect('home')
 
+        # Para la prueba que revisa que cada URL tenga su permiso
+        _wrapped_view.permisos_requeridos = permisos_requeridos
         return _wrapped_view
     return decorator
 
@@ -61,19 +85,23 @@ def login_view(request):
         return redirect('home')
 
     if request.method == 'POST':
+        username = request.POST.get('username', '')
+        espera = limites.reservar_intento(request, username)
+        if espera:
+            # Se rechaza sin verificar la contraseña
+            messages.error(request, f'Demasiados intentos fallidos. Intenta de nuevo en {espera} segundos.')
+            form = AuthenticationForm(request, initial={'username': username})
+            return render(request, 'tienda/login.html', {'form': form}, status=429)
+
         form = AuthenticationForm(request, data=request.POST)
+        # is_valid() ya autentica; get_user() evita verificar la contraseña dos veces
         if form.is_valid():
-            username = form.cleaned_data.get('username')
-            password = form.cleaned_data.get('password')
-            user = authenticate(username=username, password=password)
-            if user:
-                login(request, user)
-                messages.success(request, f'Bienvenido {username}')
-                return redirect('home')
-            else:
-                messages.error(request, 'Usuario o contraseña incorrectos.')
-        else:
-            messages.error(request, 'Usuario o contraseña incorrectos.')
+            user = form.get_user()
+            login(request, user)
+            limites.registrar_exito(request, username)
+            messages.success(request, f'Bienvenido {user.username}')
+            return redirect('home')
+        messages.error(request, 'Usuario o contraseña incorrectos.')
     else:
         form = AuthenticationForm()
     return render(request, 'tienda/login.html', {'form': form})
@@ -92,19 +120,25 @@ def logout_view(request):
 @login_required
 def home(request):
     hoy = timezone.localdate()  # Fecha local
-    if request.user.perfil.rol == 'cliente':
-        mis_compras = Venta.objects.filter(cliente__email=request.user.email)
-        return render(request, 'tienda/home.html', {'mis_compras': mis_compras})
+    perfil = getattr(request.user, 'perfil', None)
+    if perfil is not None and perfil.es_cliente():
+        # Por la relación Cliente.user (no por email), agregado en SQL y desde la caché
+        cliente_id = Cliente.objects.filter(user=request.user).values_list('id', flat=True).first()
+        resumen = compras_cliente.resumen(cliente_id) if cliente_id else None
+        return render(request, 'tienda/home.html', {'vista_cliente': True, 'resumen': resumen})
     inicio = timezone.make_aware(datetime.combine(hoy, time.min))  # 00:00
     fin = timezone.make_aware(datetime.combine(hoy, time.max))     # 23:59:59
 
-    ventas_hoy = Venta.objects.filter(fecha_venta__range=(inicio, fin))
+    # Un empleado de sucursal ve las ventas de la suya (índice sucursal_id, fecha_venta)
+    ventas_hoy = sucursales.acotar(Venta.objects.filter(fecha_venta__range=(inicio, fin)), request.user)
 
-    total_productos = Producto.objects.count()
+    # Los productos dados de baja (eliminación lógica) no cuentan en el tablero
+    activos = Producto.objects.filter(activo=True)
+    total_productos = activos.count()
     total_categorias = Categoria.objects.count()
     total_proveedores = Proveedor.objects.count()
     total_clientes = Cliente.objects.count()
-    productos_recientes = Producto.objects.all()[:5]
+    productos_recientes = activos[:5]
 
     total_ventas_dia = sum(v.total for v in ventas_hoy)
     cantidad_ventas = ventas_hoy.count()
@@ -126,19 +160,28 @@ def home(request):
 # FORMULARIO 1: PRODUCTO → Tabla: tienda_producto
 # ===============================================================
 @login_required
-@rol_requerido('administrador', 'gerente')
+@permiso_requerido('producto.ver')
 def producto_lista(request):
-    productos = Producto.objects.all()
-    return render(request, 'tienda/producto_lista.html', {'productos': productos})
+    productos = Producto.objects.filter(activo=True)
+    sucursal_id = sucursales.sucursal_de(request.user)
+    if sucursal_id is not None:
+        # Stock de la sucursal del usuario en lugar del total de la cadena
+        productos = sucursales.anotar_existencia(productos, sucursal_id)
+        sucursal = Sucursal.objects.get(pk=sucursal_id)
+    else:
+        productos = productos.annotate(existencia=F('stock'))
+        sucursal = None
+    return render(request, 'tienda/producto_lista.html', {'productos': productos, 'sucursal': sucursal})
 
 
 @login_required
-@rol_requerido('administrador')
+@permiso_requerido('producto.crear')
 def producto_crear(request):
     if request.method == 'POST':
         form = ProductoForm(request.POST)
         if form.is_valid():
-            form.save()
+            producto = form.save()
+            registrar_ajuste(producto, 0, request.user, nota='Stock inicial')
             messages.success(request, '✅ Producto creado exitosamente.')
             return redirect('producto_lista')
     else:
@@ -147,13 +190,16 @@ def producto_crear(request):
 
 
 @login_required
-@rol_requerido('administrador')
+@permiso_requerido('producto.editar')
 def producto_editar(request, pk):
     producto = get_object_or_404(Producto, pk=pk)
+    precio_anterior = producto.precio_venta
     if request.method == 'POST':
         form = ProductoForm(request.POST, instance=producto)
         if form.is_valid():
-            form.save()
+            # La diferencia se toma contra el stock que el usuario vio al abrir el formulario
+            guardar_con_ajuste(producto, stock_visto(form), form.save, request.user)
+            registrar_cambio_precio(producto, precio_anterior, request.user)
             messages.success(request, '✅ Producto actualizado.')
             return redirect('producto_lista')
     else:
@@ -162,12 +208,15 @@ def producto_editar(request, pk):
 
 
 @login_required
-@rol_requerido('administrador')
+@permiso_requerido('producto.eliminar')
 def producto_eliminar(request, pk):
     producto = get_object_or_404(Producto, pk=pk)
     if request.method == 'POST':
-        producto.delete()
-        messages.success(request, '🗑️ Producto eliminado.')
+        # Eliminación lógica: un UPDATE de una fila, sin cascada sobre las ventas
+        with transaction.atomic():
+            if Producto.objects.filter(pk=producto.pk, activo=True).update(activo=False, fecha_actualizacion=timezone.now()):
+                contadores.aplicar_cambio(contadores.estado(producto), None)
+        messages.success(request, '🗑️ Producto desactivado.')
         return redirect('producto_lista')
     return render(request, 'tienda/producto_eliminar.html', {'producto': producto})
 
@@ -176,14 +225,14 @@ def producto_eliminar(request, pk):
 # FORMULARIO 2: CATEGORÍA → Tabla: tienda_categoria
 # ===============================================================
 @login_required
-@rol_requerido('administrador')
+@permiso_requerido('categoria.ver')
 def categoria_lista(request):
     categorias = Categoria.objects.all()
     return render(request, 'tienda/categoria_lista.html', {'categorias': categorias})
 
 
 @login_required
-@rol_requerido('administrador')
+@permiso_requerido('categoria.crear')
 def categoria_crear(request):
     if request.method == 'POST':
         form = CategoriaForm(request.POST)
@@ -197,7 +246,7 @@ def categoria_crear(request):
 
 
 @login_required
-@rol_requerido('administrador')
+@permiso_requerido('categoria.editar')
 def categoria_editar(request, pk):
     categoria = get_object_or_404(Categoria, pk=pk)
     if request.method == 'POST':
@@ -212,28 +261,32 @@ def categoria_editar(request, pk):
 
 
 @login_required
-@rol_requerido('administrador')
+@permiso_requerido('categoria.eliminar')
 def categoria_eliminar(request, pk):
     categoria = get_object_or_404(Categoria, pk=pk)
     if request.method == 'POST':
-        categoria.delete()
-        messages.success(request, 'Categoría eliminada.')
+        # El borrado en cascada se hace por lotes fuera de la petición
+        eliminaciones.programar(categoria, request.user)
+        messages.success(request, 'Eliminación de la categoría programada.')
         return redirect('categoria_lista')
-    return render(request, 'tienda/categoria_eliminar.html', {'categoria': categoria})
+    return render(request, 'tienda/categoria_eliminar.html', {
+        'categoria': categoria,
+        'impacto': eliminaciones.impacto_categoria(categoria),
+    })
 
 
 # ===============================================================
 # FORMULARIO 3: PROVEEDOR → Tabla: tienda_proveedor
 # ===============================================================
 @login_required
-@rol_requerido('administrador')
+@permiso_requerido('proveedor.ver')
 def proveedor_lista(request):
     proveedores = Proveedor.objects.all()
     return render(request, 'tienda/proveedor_lista.html', {'proveedores': proveedores})
 
 
 @login_required
-@rol_requerido('administrador')
+@permiso_requerido('proveedor.crear')
 def proveedor_crear(request):
     if request.method == 'POST':
         form = ProveedorForm(request.POST)
@@ -247,7 +300,7 @@ def proveedor_crear(request):
 
 
 @login_required
-@rol_requerido('administrador')
+@permiso_requerido('proveedor.editar')
 def proveedor_editar(request, pk):
     proveedor = get_object_or_404(Proveedor, pk=pk)
     if request.method == 'POST':
@@ -262,21 +315,24 @@ def proveedor_editar(request, pk):
 
 
 @login_required
-@rol_requerido('administrador')
+@permiso_requerido('proveedor.eliminar')
 def proveedor_eliminar(request, pk):
     proveedor = get_object_or_404(Proveedor, pk=pk)
     if request.method == 'POST':
-        proveedor.delete()
-        messages.success(request, 'Proveedor eliminado.')
+        eliminaciones.programar(proveedor, request.user)
+        messages.success(request, 'Eliminación del proveedor programada.')
         return redirect('proveedor_lista')
-    return render(request, 'tienda/proveedor_eliminar.html', {'proveedor': proveedor})
+    return render(request, 'tienda/proveedor_eliminar.html', {
+        'proveedor': proveedor,
+        'impacto': eliminaciones.impacto_proveedor(proveedor),
+    })
 
 
 # ===============================================================
 # FORMULARIO 4: CLIENTE → Tabla: tienda_cliente
 # ===============================================================
 @login_required
-@rol_requerido('administrador', 'gerente', 'vendedor')
+@permiso_requerido('cliente.ver')
 def cliente_lista(request):
     clientes = Cliente.objects.all()
     return render(request, 'tienda/cliente_lista.html', {'clientes': clientes})
@@ -285,36 +341,61 @@ def cliente_lista(request):
 from django.contrib.auth.models import User
 from .models import Cliente, PerfilUsuario  # 👈 asegúrate de tener esto arriba
 
+
+def crear_usuario_cliente(cliente):
+    """
+    Crea el usuario del cliente (rol 'cliente') y lo asocia, sin guardar el
+    cliente. Devuelve None si ya existe un usuario con ese nombre. Se crea
+    sin contraseña utilizable: el hash lo calcula la tarea 'crear_usuario_cliente'.
+    """
+    username = cliente.nombre.lower()
+
+    if User.objects.filter(username=username).exists():
+        return None
+
+    user = User(username=username, first_name=cliente.nombre, last_name=cliente.apellido, email=cliente.email)
+    user.set_unusable_password()
+    try:
+        with transaction.atomic():
+            user.save()
+    except IntegrityError:
+        return None  # Otra petición tomó el nombre entre la consulta y el INSERT
+
+    # 🔹 Crear perfil con rol "cliente"
+    PerfilUsuario.objects.create(user=user, rol='cliente')
+
+    # 🔹 Asociar cliente con usuario
+    cliente.user = user
+    return user
+
+
+def registrar_cliente(cliente):
+    """
+    Guarda el cliente con su usuario, que así reserva el nombre aunque la
+    contraseña todavía no exista, y encola el cálculo de la contraseña (el
+    hash es lento). Devuelve False si el nombre de usuario ya existe.
+    """
+    with transaction.atomic():
+        if crear_usuario_cliente(cliente) is None:
+            return False
+        cliente.save()
+        tareas.encolar('crear_usuario_cliente', cliente_id=cliente.pk)
+    return True
+
+
 @login_required
-@rol_requerido('administrador', 'gerente', 'vendedor')
+@permiso_requerido('cliente.crear')
 def cliente_crear(request):
     if request.method == 'POST':
         form = ClienteForm(request.POST)
         if form.is_valid():
             cliente = form.save(commit=False)
 
-            # 🔹 Crear usuario automáticamente
-            username = cliente.nombre.lower()
-            password = cliente.telefono  # Teléfono será la contraseña
-
-            # Evitar duplicados
-            if User.objects.filter(username=username).exists():
-                messages.error(request, f"Ya existe un usuario con el nombre '{username}'.")
+            # 🔹 Su usuario se crea en segundo plano (evitando duplicados)
+            if not registrar_cliente(cliente):
+                messages.error(request, f"Ya existe un usuario con el nombre '{cliente.nombre.lower()}'.")
                 return redirect('cliente_lista')
 
-            user = User.objects.create_user(username=username, password=password)
-            user.first_name = cliente.nombre
-            user.last_name = cliente.apellido
-            user.email = cliente.email
-            user.save()
-
-            # 🔹 Crear perfil con rol "cliente"
-            PerfilUsuario.objects.create(user=user, rol='cliente')
-
-            # 🔹 Asociar cliente con usuario
-            cliente.user = user
-            cliente.save()
-
             messages.success(request, f"Cliente '{cliente.nombre_completo}' registrado correctamente.")
             return redirect('cliente_lista')
     else:
@@ -324,7 +405,7 @@ def cliente_crear(request):
 
 
 @login_required
-@rol_requerido('administrador', 'gerente', 'vendedor')
+@permiso_requerido('cliente.editar')
 def cliente_editar(request, pk):
     cliente = get_object_or_404(Cliente, pk=pk)
     if request.method == 'POST':
@@ -339,12 +420,13 @@ def cliente_editar(request, pk):
 
 
 @login_required
-@rol_requerido('administrador', 'gerente', 'vendedor')
+@permiso_requerido('cliente.eliminar')
 def cliente_eliminar(request, pk):
     cliente = get_object_or_404(Cliente, pk=pk)
     if request.method == 'POST':
-        cliente.delete()
-        messages.success(request, 'Cliente eliminado.')
+        # Sus ventas se borran por lotes fuera de la petición (una sola tarea aunque se envíe dos veces)
+        tareas.encolar_una_vez('eliminar_cliente', cliente_id=cliente.pk)
+        messages.success(request, 'Eliminación del cliente programada.')
         return redirect('cliente_lista')
     return render(request, 'tienda/cliente_eliminar.html', {'cliente': cliente})
 
@@ -353,29 +435,19 @@ def cliente_eliminar(request, pk):
 # FORMULARIO 5: VENTA → Tabla: tienda_venta
 # ===============================================================
 @login_required
-@rol_requerido('administrador', 'gerente', 'vendedor')
+@permiso_requerido('venta.ver')
 def venta_lista(request):
-    hoy = timezone.now().date()
-    ventas_hoy = Venta.objects.filter(fecha_venta__date=hoy)
-    total_ventas_dia = sum(venta.total for venta in ventas_hoy)
-    cantidad_ventas = ventas_hoy.count()
-
-    context = {
-        'ventas_hoy': ventas_hoy,
-        'total_ventas_dia': total_ventas_dia,
-        'cantidad_ventas': cantidad_ventas,
-        'fecha': hoy,
-    }
+    context = reportes.datos_reporte(timezone.localdate(), sucursales.sucursal_de(request.user))
     return render(request, 'tienda/reporte_ventas.html', context)
 
 
 
 
 @login_required
-@rol_requerido('administrador', 'gerente', 'vendedor')
+@permiso_requerido('venta.crear')
 def venta_crear(request):
     if request.method == 'POST':
-        form = VentaForm(request.POST)
+        form = VentaForm(request.POST, sucursal_id=sucursales.sucursal_de(request.user))
         if form.is_valid():
             venta = form.save(commit=False)
             venta.vendedor = request.user  # 👈 asigna el usuario que crea la venta
@@ -383,16 +455,17 @@ def venta_crear(request):
             messages.success(request, 'Venta registrada correctamente.')
             return redirect('reporte_ventas')
     else:
-        form = VentaForm()
+        form = VentaForm(sucursal_id=sucursales.sucursal_de(request.user))
     return render(request, 'tienda/venta_form.html', {'form': form, 'accion': 'Registrar'})
 
 
 @login_required
-@rol_requerido('administrador')
+@permiso_requerido('venta.eliminar')
 def venta_eliminar(request, pk):
-    venta = get_object_or_404(Venta, pk=pk)
+    venta = get_object_or_404(sucursales.acotar(Venta.objects.all(), request.user), pk=pk)
     if request.method == 'POST':
         venta.delete()
+        compras_cliente.invalidar(venta.cliente_id)
         messages.success(request, 'Venta eliminada.')
         return redirect('venta_lista')
     return render(request, 'tienda/venta_eliminar.html', {'venta': venta})
@@ -400,26 +473,40 @@ def venta_eliminar(request, pk):
 
 
 @login_required
-@rol_requerido('administrador', 'gerente', 'vendedor')
+@permiso_requerido('reporte.ver')
 def reporte_ventas(request):
-    """Reporte de ventas del día"""
+    """Reporte de ventas del día (o de un día cerrado con ?fecha=AAAA-MM-DD)"""
     hoy = timezone.localdate()
-    
-    # Crear rango de inicio y fin del día en hora local
-    inicio = timezone.make_aware(datetime.combine(hoy, time.min))
-    fin = timezone.make_aware(datetime.combine(hoy, time.max))
+    try:
+        fecha = parse_date(request.GET.get('fecha') or '') or hoy
+    except ValueError:
+        fecha = hoy
+
+    # Los días ya cerrados se sirven desde su snapshot (el de la sucursal), sin consultar ventas
+    sucursal_id = sucursales.sucursal_de(request.user)
+    if fecha < hoy:
+        contenido = reportes.leer_snapshot(fecha, sucursal_id=sucursal_id)
+        if contenido is not None:
+            return render(request, 'tienda/reporte_ventas.html', {'contenido': contenido, 'fecha': fecha})
+
+    context = reportes.datos_reporte(fecha, sucursal_id)
+    return render(request, 'tienda/reporte_ventas.html', context)
 
-    ventas_hoy = Venta.objects.filter(fecha_venta__range=(inicio, fin))
-    total_ventas_dia = sum(venta.total for venta in ventas_hoy)
-    cantidad_ventas = ventas_hoy.count()
 
-    context = {
-        'ventas_hoy': ventas_hoy,
-        'total_ventas_dia': total_ventas_dia,
-        'cantidad_ventas': cantidad_ventas,
-        'fecha': hoy,
-    }
-    return render(request, 'tienda/reporte_ventas.html', context)
+@login_required
+@permiso_requerido('sugerenciapedido.ver')
+def pedidos_sugeridos(request):
+    """Lista de compras del último pronóstico nocturno, agrupada por proveedor"""
+    fecha = pronostico.ultima_fecha()
+    sugerencias = SugerenciaPedido.objects.filter(fecha=fecha).select_related('producto', 'proveedor').order_by(
+        'proveedor__nombre', 'dias_restantes',
+    )
+    return render(request, 'tienda/pedidos_sugeridos.html', {
+        'fecha': fecha,
+        'sugerencias': sugerencias,
+        # Se resaltan los productos que se agotarían antes de que llegue el pedido
+        'dias_entrega': settings.PEDIDOS_DIAS_ENTREGA,
+    })
 
 # tienda/views.py
 from .forms import PerfilUsuarioForm, ClientePerfilForm
@@ -454,19 +541,61 @@ def mi_perfil(request):
     })
 
 @login_required
-@rol_requerido('cliente')
+@permiso_requerido('venta.ver_propias')
 def mis_compras(request):
     """Historial de compras del cliente autenticado"""
     try:
         cliente = request.user.cliente
-        compras = Venta.objects.filter(cliente=cliente).order_by('-fecha_venta')
+        # Incluye las ventas ya archivadas
+        compras = ventas_historicas(cliente=cliente)
+        total_compras = resumen_historico(cliente=cliente)['total']
     except Cliente.DoesNotExist:
         messages.warning(request, 'No tienes compras registradas.')
         compras = []
-
-    total_compras = sum(venta.total for venta in compras)
+        total_compras = 0
 
     return render(request, 'tienda/mis_compras.html', {
         'compras': compras,
         'total_compras': total_compras,
     })
+
+
+@login_required
+@permiso_requerido('venta.ver', 'venta.ver_propias')
+def venta_recibo(request, pk):
+    """Recibo de una venta desde la caché en disco; un cliente solo ve los suyos y un empleado los de su sucursal."""
+    datos = recibos.datos_venta(pk)
+    if datos is None:
+        raise Http404('Venta no encontrada.')
+    if permisos.puede(request.user, 'venta.ver'):
+        sucursal_id = sucursales.sucursal_de(request.user)
+        if sucursal_id is not None and sucursal_id != datos['sucursal_id']:
+            raise Http404('Venta no encontrada.')
+    else:
+        cliente = getattr(request.user, 'cliente', None)
+        if cliente is None or cliente.pk != datos['cliente_id']:
+            raise Http404('Venta no encontrada.')
+
+    # La huella identifica el contenido: si el navegador ya lo tiene no se lee el archivo
+    etiqueta = f'"{recibos.huella(datos)}"'
+    if request.headers.get('If-None-Match') == etiqueta:
+        return HttpResponseNotModified(headers={'ETag': etiqueta})
+    _, ruta = recibos.obtener(datos)
+    respuesta = FileResponse(
+        open(ruta, 'rb'), content_type=recibos.TIPOS_CONTENIDO[recibos.FORMATO],
+        filename=f"recibo-{pk}.{recibos.FORMATO}",
+    )
+    respuesta['ETag'] = etiqueta
+    respuesta['Cache-Control'] = 'private, max-age=86400'
+    return respuesta
+
+
+# ===============================================================
+# MÉTRICAS PARA PROMETHEUS
+# ===============================================================
+def metricas_prometheus(request):
+    """Texto de Prometheus; sin login, limitado por IP (settings.METRICAS_IPS)."""
+    ips = settings.METRICAS_IPS
+    if ips is not None and request.META.get('REMOTE_ADDR') not in ips:
+        return HttpResponseForbidden('Acceso no permitido.')
+    return HttpResponse(metricas.exponer(), content_type='text/plain; version=0.0.4; charset=utf-8')